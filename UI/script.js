@@ -244,3 +244,122 @@ window.onclick = function(event) {
         closeOrderModal();
     }
 }
+
+// Switch to the previous (-1) or next (1) category, unless a modal is open
+function stepCategory(step) {
+    if (document.querySelector('.modal.active')) return false;
+
+    const buttons = document.querySelectorAll('.category-btn');
+    const categories = Object.keys(menuData);
+    const index = (categories.indexOf(currentCategory) + step + categories.length) % categories.length;
+    buttons[index].click();
+    return true;
+}
+
+// Switch category with the arrow keys (sent by left/right hand swipes)
+document.addEventListener('keydown', (e) => {
+    if (e.key !== 'ArrowLeft' && e.key !== 'ArrowRight') return;
+    if (stepCategory(e.key === 'ArrowRight' ? 1 : -1)) {
+        e.preventDefault();
+    }
+});
+
+// Gesture Bridge
+// Cursor and gesture events streamed by the gesture controller
+// (python gesture_controller.py --mouse websocket), without OS mouse events
+const GESTURE_BRIDGE_URL = 'ws://127.0.0.1:8765';
+const GESTURE_SCROLL_STEP = 40;  // pixels per scroll click
+const GESTURE_RECONNECT_MS = 1000;
+const CLICKABLE = 'button, .close-btn, .menu-item, .cart-item';
+
+const gestureCursor = { x: 0.5, y: 0.5, dirty: false, hovered: null, element: null };
+
+function createGestureCursor() {
+    const element = document.createElement('div');
+    element.id = 'gesture-cursor';
+    element.hidden = true;
+    document.body.appendChild(element);
+    gestureCursor.element = element;
+}
+
+// Element under a normalized (0..1) viewport position (the overlay
+// itself has pointer-events: none, so it is never the hit)
+function clickableAt(x, y) {
+    const target = document.elementFromPoint(x * window.innerWidth, y * window.innerHeight);
+    return target ? target.closest(CLICKABLE) || target : null;
+}
+
+// Draw only the newest position, once per display frame
+function renderGestureCursor() {
+    if (gestureCursor.dirty) {
+        gestureCursor.dirty = false;
+        const { x, y, element } = gestureCursor;
+        element.style.transform = `translate(${x * window.innerWidth}px, ${y * window.innerHeight}px)`;
+
+        const hovered = clickableAt(x, y);
+        if (hovered !== gestureCursor.hovered) {
+            if (gestureCursor.hovered) gestureCursor.hovered.classList.remove('gesture-hover');
+            if (hovered && hovered.matches(CLICKABLE)) hovered.classList.add('gesture-hover');
+            gestureCursor.hovered = hovered;
+        }
+    }
+    requestAnimationFrame(renderGestureCursor);
+}
+
+function gestureScroll(pixels) {
+    const cartScrollable = document.querySelector('#cart-modal.active .cart-scrollable');
+    if (cartScrollable) {
+        cartScrollable.scrollTop += pixels;
+    } else {
+        window.scrollBy(0, pixels);
+    }
+}
+
+function handleGestureMessage(message) {
+    switch (message.t) {
+        case 'c':
+            gestureCursor.x = message.x;
+            gestureCursor.y = message.y;
+            gestureCursor.dirty = true;
+            gestureCursor.element.hidden = false;
+            break;
+        case 'click': {
+            const target = clickableAt(message.x, message.y);
+            if (target) target.click();
+            break;
+        }
+        case 'scroll':
+            gestureScroll(-message.dy * GESTURE_SCROLL_STEP);
+            break;
+        case 'key':
+            if (message.key === 'left' || message.key === 'right') {
+                stepCategory(message.key === 'right' ? 1 : -1);
+            } else if (message.key === 'pageup' || message.key === 'pagedown') {
+                gestureScroll((message.key === 'pagedown' ? 0.9 : -0.9) * window.innerHeight);
+            }
+            break;
+        case 'gesture':
+            gestureCursor.element.dataset.gesture = message.kind === 'start' ? message.g : '';
+            break;
+    }
+}
+
+function connectGestureBridge() {
+    const socket = new WebSocket(GESTURE_BRIDGE_URL);
+    socket.onmessage = (e) => {
+        const message = JSON.parse(e.data);
+        // Acknowledge cursor updates so the bridge never queues stale ones
+        if (message.t === 'c') socket.send(`{"t":"ack","n":${message.n}}`);
+        handleGestureMessage(message);
+    };
+    socket.onclose = () => {
+        gestureCursor.element.hidden = true;
+        setTimeout(connectGestureBridge, GESTURE_RECONNECT_MS);
+    };
+}
+
+document.addEventListener('DOMContentLoaded', () => {
+    createGestureCursor();
+    requestAnimationFrame(renderGestureCursor);
+    connectGestureBridge();
+});
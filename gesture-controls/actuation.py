@@ -0,0 +1,465 @@
+"""
+AeroTouch - Mouse output backends
+The controller sends cursor moves, clicks and scrolls through one of these
+backends instead of calling pyautogui directly.
+
+- PyAutoGUIBackend: real system mouse events (needs a display)
+- XlibBackend: X11 XTest events sent directly, flushed once per batch
+- UInputBackend: Linux kernel uinput virtual pointer (no display server needed)
+- RecordingBackend: keeps the events in memory, for headless runs and replays
+
+AsyncBackend wraps any of them so the frame loop only queues events: moves
+are coalesced, the cursor position is tracked in-process, and the OS calls
+run on a background thread. SyncBackend sends (and flushes) each event from
+the frame loop instead. Both record the time spent sending and the latency
+from frame capture to output in metrics.py.
+"""
+
+import threading
+import time
+from collections import deque
+
+from metrics import metrics
+
+# Screen size reported by RecordingBackend when none is given
+DEFAULT_SCREEN_SIZE = (1920, 1080)
+
+# Keys backends can press (pyautogui names), used for swipe navigation
+KEYS = ('pageup', 'pagedown', 'left', 'right')
+
+# X11 keysym names of KEYS
+_X11_KEYSYMS = {'pageup': 'Prior', 'pagedown': 'Next', 'left': 'Left', 'right': 'Right'}
+
+
+class PyAutoGUIBackend:
+    """System mouse output through pyautogui."""
+
+    def __init__(self):
+        # Imported here so headless runs never need a display
+        import pyautogui
+
+        # Disable PyAutoGUI fail-safe (optional, but be careful)
+        pyautogui.FAILSAFE = True
+        # No forced sleep after each call; the frame loop paces the events
+        pyautogui.PAUSE = 0
+        self.pyautogui = pyautogui
+
+    def size(self):
+        return self.pyautogui.size()
+
+    def position(self):
+        return self.pyautogui.position()
+
+    def move_to(self, x, y):
+        self.pyautogui.moveTo(x, y)
+
+    def click(self):
+        self.pyautogui.click()
+
+    def scroll(self, amount):
+        self.pyautogui.scroll(amount)
+
+    def press(self, key):
+        self.pyautogui.press(key)
+
+    def flush(self):
+        pass
+
+
+class XlibBackend:
+    """System mouse output through the X11 XTest extension (python-xlib)."""
+
+    def __init__(self):
+        # Imported here so the dependency is only needed when used
+        from Xlib import X, XK, display
+        from Xlib.ext import xtest
+
+        self.X = X
+        self.xtest = xtest
+        self.display = display.Display()
+        self.root = self.display.screen().root
+        self.keycodes = {key: self.display.keysym_to_keycode(XK.string_to_keysym(name))
+                         for key, name in _X11_KEYSYMS.items()}
+
+    def size(self):
+        screen = self.display.screen()
+        return screen.width_in_pixels, screen.height_in_pixels
+
+    def position(self):
+        pointer = self.root.query_pointer()
+        return pointer.root_x, pointer.root_y
+
+    def move_to(self, x, y):
+        self.xtest.fake_input(self.display, self.X.MotionNotify, x=int(x), y=int(y))
+
+    def _press(self, button):
+        self.xtest.fake_input(self.display, self.X.ButtonPress, button)
+        self.xtest.fake_input(self.display, self.X.ButtonRelease, button)
+
+    def click(self):
+        self._press(1)
+
+    def scroll(self, amount):
+        # Buttons 4 and 5 are the wheel up/down "clicks"
+        for _ in range(abs(amount)):
+            self._press(4 if amount > 0 else 5)
+
+    def press(self, key):
+        keycode = self.keycodes[key]
+        self.xtest.fake_input(self.display, self.X.KeyPress, keycode)
+        self.xtest.fake_input(self.display, self.X.KeyRelease, keycode)
+
+    def flush(self):
+        self.display.flush()
+
+
+class UInputBackend:
+    """
+    Virtual absolute pointer through Linux uinput (python-evdev). Needs
+    write access to /dev/uinput; the OS cursor position cannot be queried,
+    so position() is the last position sent.
+    """
+
+    def __init__(self, screen_size=DEFAULT_SCREEN_SIZE):
+        # Imported here so the dependency is only needed when used
+        from evdev import AbsInfo, UInput, ecodes
+
+        self.ecodes = ecodes
+        self.screen_size = screen_size
+        self.cursor = (screen_size[0] // 2, screen_size[1] // 2)
+        self.device = UInput({
+            ecodes.EV_KEY: [ecodes.BTN_LEFT] + [self._keycode(key) for key in KEYS],
+            ecodes.EV_REL: [ecodes.REL_WHEEL],
+            ecodes.EV_ABS: [
+                (ecodes.ABS_X, AbsInfo(0, 0, screen_size[0] - 1, 0, 0, 0)),
+                (ecodes.ABS_Y, AbsInfo(0, 0, screen_size[1] - 1, 0, 0, 0)),
+            ],
+        }, name='aerotouch-pointer')
+
+    def size(self):
+        return self.screen_size
+
+    def position(self):
+        return self.cursor
+
+    def move_to(self, x, y):
+        e = self.ecodes
+        self.cursor = (x, y)
+        self.device.write(e.EV_ABS, e.ABS_X, int(x))
+        self.device.write(e.EV_ABS, e.ABS_Y, int(y))
+
+    def click(self):
+        e = self.ecodes
+        self.device.write(e.EV_KEY, e.BTN_LEFT, 1)
+        self.device.syn()
+        self.device.write(e.EV_KEY, e.BTN_LEFT, 0)
+
+    def scroll(self, amount):
+        self.device.write(self.ecodes.EV_REL, self.ecodes.REL_WHEEL, amount)
+
+    def _keycode(self, key):
+        return getattr(self.ecodes, 'KEY_' + key.upper())
+
+    def press(self, key):
+        e = self.ecodes
+        self.device.write(e.EV_KEY, self._keycode(key), 1)
+        self.device.syn()
+        self.device.write(e.EV_KEY, self._keycode(key), 0)
+
+    def flush(self):
+        self.device.syn()
+
+    def close(self):
+        self.device.close()
+
+
+class RecordingBackend:
+    """Records mouse events as (timestamp, action, args) instead of sending them."""
+
+    def __init__(self, screen_size=DEFAULT_SCREEN_SIZE):
+        self.screen_size = screen_size
+        self.cursor = (screen_size[0] // 2, screen_size[1] // 2)
+        self.events = []
+
+    def size(self):
+        return self.screen_size
+
+    def position(self):
+        return self.cursor
+
+    def move_to(self, x, y):
+        self.cursor = (x, y)
+        self.events.append((time.perf_counter(), 'move', (x, y)))
+
+    def click(self):
+        self.events.append((time.perf_counter(), 'click', ()))
+
+    def scroll(self, amount):
+        self.events.append((time.perf_counter(), 'scroll', (amount,)))
+
+    def press(self, key):
+        self.events.append((time.perf_counter(), 'press', (key,)))
+
+    def flush(self):
+        pass
+
+    def counts(self):
+        """Return {action: number of events}."""
+        counts = {}
+        for _, action, _ in self.events:
+            counts[action] = counts.get(action, 0) + 1
+        return counts
+
+
+class SyncBackend:
+    """Sends every event from the calling thread and flushes it right away."""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def size(self):
+        return self.backend.size()
+
+    def position(self):
+        return self.backend.position()
+
+    def _send(self, send, *args):
+        start = time.perf_counter_ns()
+        send(*args)
+        self.backend.flush()
+        end = time.perf_counter_ns()
+        metrics.record('output', end - start)
+        metrics.record('capture_to_output', end - metrics.frame_ns)
+
+    def move_to(self, x, y):
+        self._send(self.backend.move_to, x, y)
+
+    def click(self):
+        self._send(self.backend.click)
+
+    def scroll(self, amount):
+        self._send(self.backend.scroll, amount)
+
+    def press(self, key):
+        self._send(self.backend.press, key)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        if hasattr(self.backend, 'close'):
+            self.backend.close()
+
+
+class AsyncBackend:
+    """
+    Queues mouse events for a background thread instead of sending them
+    from the frame loop.
+
+    The cursor position is tracked here, so position() never asks the OS.
+    A queued move that has not been sent yet is replaced by the next one,
+    and consecutive scrolls are summed. While no events are queued the
+    tracked position is refreshed from the OS every RESYNC_INTERVAL
+    seconds, in case the mouse was moved by hand.
+
+    If the wrapped backend raises, the batch being sent is dropped and the
+    exception is re-raised in the caller's thread from the next queued
+    event, flush() or close().
+    """
+
+    # Seconds without events before the tracked position is re-read from the OS
+    RESYNC_INTERVAL = 0.5
+
+    # Seconds close() waits for the queued events to be sent
+    CLOSE_TIMEOUT = 5.0
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.screen_size = tuple(backend.size())
+        self.cursor = tuple(backend.position())
+        self._cond = threading.Condition()
+        self._events = deque()
+        self._sending = 0     # events in the batch being sent
+        self._closed = False
+        self._error = None    # exception from the output thread, not yet re-raised
+        self._generation = 0  # bumped on every queued event
+        self._frame_ns = 0    # capture time of the oldest frame with queued events
+        self.queued = 0
+        self.coalesced = 0
+        self.sent = 0
+        self.dropped = 0  # events still queued when close() gave up
+        self.batches = 0
+        self.send_ns = 0
+        self.max_send_ns = 0
+        self._thread = threading.Thread(target=self._run, name='aerotouch-output', daemon=True)
+        self._thread.start()
+
+    def size(self):
+        return self.screen_size
+
+    def position(self):
+        return self.cursor
+
+    def _raise_error(self):
+        """Re-raise (once) an exception the output thread hit; call with the lock held."""
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def _queue(self, action, args):
+        with self._cond:
+            self._raise_error()
+            self.queued += 1
+            self._generation += 1
+            if action == 'move':
+                self.cursor = args
+            if not self._events:
+                self._frame_ns = metrics.frame_ns
+            last = self._events[-1] if self._events else None
+            if last is not None and last[0] == action == 'move':
+                self._events[-1] = (action, args)
+                self.coalesced += 1
+            elif last is not None and last[0] == action == 'scroll':
+                self._events[-1] = (action, (last[1][0] + args[0],))
+                self.coalesced += 1
+            else:
+                self._events.append((action, args))
+            self._cond.notify_all()
+
+    def move_to(self, x, y):
+        self._queue('move', (x, y))
+
+    def click(self):
+        self._queue('click', ())
+
+    def scroll(self, amount):
+        self._queue('scroll', (amount,))
+
+    def press(self, key):
+        self._queue('press', (key,))
+
+    def flush(self):
+        """Block until every queued event has been sent."""
+        with self._cond:
+            while (self._events or self._sending) and self._thread.is_alive():
+                self._cond.wait(0.1)
+            self._raise_error()
+
+    def close(self):
+        """
+        Send the remaining events, stop the output thread and close the
+        wrapped backend. If the backend is still stuck in a call after
+        CLOSE_TIMEOUT, the queued events are dropped (and reported) and the
+        backend is left open rather than closed under the output thread.
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(self.CLOSE_TIMEOUT)
+        if self._thread.is_alive():
+            with self._cond:
+                self.dropped += len(self._events)
+                self._events.clear()
+                sending = self._sending
+            print(f"Mouse output stalled: {self.dropped} queued events dropped, "
+                  f"{sending} still being sent")
+        elif hasattr(self.backend, 'close'):
+            self.backend.close()
+        with self._cond:
+            self._raise_error()
+
+    def _next_batch(self):
+        """
+        Wait for queued events and take them all with the capture time of
+        their oldest frame. Returns (None, 0) once closed and drained, or an
+        empty list after RESYNC_INTERVAL idle seconds.
+        """
+        with self._cond:
+            while not self._events:
+                if self._closed:
+                    return None, 0
+                if not self._cond.wait(self.RESYNC_INTERVAL):
+                    return [], 0
+            batch = list(self._events)
+            self._events.clear()
+            self._sending = len(batch)
+            return batch, self._frame_ns
+
+    def _fail(self, error):
+        """Keep an exception from the wrapped backend for the caller."""
+        with self._cond:
+            self._sending = 0
+            self._error = error
+            self._cond.notify_all()
+
+    def _run(self):
+        send = {
+            'move': self.backend.move_to,
+            'click': self.backend.click,
+            'scroll': self.backend.scroll,
+            'press': self.backend.press,
+        }
+        while True:
+            generation = self._generation
+            batch, frame_ns = self._next_batch()
+            if batch is None:
+                return
+
+            if not batch:
+                # Idle: pick up cursor moves made with the real mouse
+                try:
+                    position = tuple(self.backend.position())
+                except Exception as error:
+                    self._fail(error)
+                    continue
+                with self._cond:
+                    if generation == self._generation:
+                        self.cursor = position
+                continue
+
+            start = time.perf_counter_ns()
+            try:
+                for action, args in batch:
+                    send[action](*args)
+                self.backend.flush()
+            except Exception as error:
+                self._fail(error)
+                continue
+            end = time.perf_counter_ns()
+            elapsed = end - start
+            metrics.record('output', elapsed)
+            metrics.record('capture_to_output', end - frame_ns)
+
+            with self._cond:
+                self._sending = 0
+                self.sent += len(batch)
+                self.batches += 1
+                self.send_ns += elapsed
+                self.max_send_ns = max(self.max_send_ns, elapsed)
+                self._cond.notify_all()
+
+    def format(self):
+        mean_ms = self.send_ns / max(self.batches, 1) / 1e6
+        return (f"output: {self.queued} queued, {self.coalesced} coalesced, "
+                f"{self.sent} sent in {self.batches} batches "
+                f"({mean_ms:.2f}/{self.max_send_ns / 1e6:.2f} ms per batch), "
+                f"{self.dropped} dropped at close")
+
+
+def make_backend(name='auto'):
+    """
+    Create a system mouse backend by name: 'pyautogui', 'xlib', 'uinput',
+    or 'auto' (xlib when an X display is reachable, else pyautogui).
+    """
+    if name == 'pyautogui':
+        return PyAutoGUIBackend()
+    if name == 'xlib':
+        return XlibBackend()
+    if name == 'uinput':
+        return UInputBackend()
+    if name == 'auto':
+        try:
+            return XlibBackend()
+        except Exception:
+            return PyAutoGUIBackend()
+    raise ValueError(f"Unknown mouse backend '{name}'")
@@ -0,0 +1,82 @@
+"""
+AeroTouch - Actuation benchmark
+Measures how long the frame loop spends sending mouse events when they are
+sent directly versus queued on AsyncBackend. The system mouse is simulated
+by a recording backend that stalls on every OS call the way the old
+pyautogui setup did (position query + move with a 10 ms forced pause), so no
+display is needed.
+
+Usage:
+    python benchmark_actuation.py [--frames 300] [--stall-ms 10] [--fps 30]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from actuation import AsyncBackend, RecordingBackend
+
+
+class StallingBackend(RecordingBackend):
+    """RecordingBackend whose calls take as long as a real OS round-trip."""
+
+    def __init__(self, stall):
+        super().__init__()
+        self.stall = stall
+
+    def position(self):
+        time.sleep(self.stall)
+        return super().position()
+
+    def move_to(self, x, y):
+        time.sleep(self.stall)
+        super().move_to(x, y)
+
+    def click(self):
+        time.sleep(self.stall)
+        super().click()
+
+    def scroll(self, amount):
+        time.sleep(self.stall)
+        super().scroll(amount)
+
+
+def run(backend, frames, fps):
+    """Move the cursor once per frame (click every 30th); return per-frame call times (ms)."""
+    times = np.empty(frames)
+    for i in range(frames):
+        start = time.perf_counter()
+        x, y = backend.position()
+        backend.move_to(x + 3, y + 1)
+        if i % 30 == 29:
+            backend.click()
+        times[i] = (time.perf_counter() - start) * 1000
+        # The rest of the frame (capture + inference) before the next event
+        time.sleep(max(0.0, 1 / fps - times[i] / 1000))
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--stall-ms', type=float, default=10.0,
+                        help="simulated time of one OS mouse call (default: 10)")
+    parser.add_argument('--fps', type=float, default=30.0)
+    args = parser.parse_args()
+
+    stall = args.stall_ms / 1000
+    for label, direct in (('direct', True), ('async ', False)):
+        output = StallingBackend(stall)
+        backend = output if direct else AsyncBackend(output)
+        times = run(backend, args.frames, args.fps)
+        if not direct:
+            backend.close()
+        print(f"{label}: {times.mean():7.3f} ms/frame mean, {times.max():7.3f} ms max "
+              f"in the frame loop, {output.counts()} sent")
+        if not direct:
+            print(f"        {backend.format()}")
+
+
+if __name__ == "__main__":
+    main()
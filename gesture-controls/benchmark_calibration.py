@@ -0,0 +1,161 @@
+"""
+AeroTouch - Calibration benchmark
+Runs synthetic sessions (synthetic_hands.py) of users with different hand
+sizes in the image (camera distances) and finger spreads through the
+rule-based registry with and without per-user calibration (calibration.py)
+and reports:
+
+- per-frame gesture accuracy per user, after the first second
+- the cursor gain each user ends up with
+- a user swap without the track being lost: frames until calibration
+  starts over and settles on the new user
+- the per-frame cost of the calibration
+
+Then it replays a trace (a synthetic session, or recordings given with
+--trace) scaled about the wrist as if the user stood closer or farther, and
+counts the frames whose gesture differs from the unscaled trace.
+
+Usage:
+    python benchmark_calibration.py [--frames 900]
+    python benchmark_calibration.py --trace session.npz --scales 0.5,0.75,1.5
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+import landmark_features as lf
+import synthetic_hands
+from calibration import REFERENCE_PALM, HandCalibration
+from gesture_registry import registry
+from input_sources import load_trace
+
+# (name, hand scale in the image, finger spread in degrees)
+USERS = [
+    ('adult, close', 1.4, 10.0),
+    ('adult', 1.0, 8.0),
+    ('teen, farther', 0.75, 6.0),
+    ('kid', 0.6, 5.0),
+    ('kid, far', 0.45, 4.0),
+]
+
+# Frames per second of the sessions, and frames left out of the accuracy
+FRAME_RATE = 30
+WARM_UP = FRAME_RATE
+
+# Within this fraction of the true palm size counts as settled
+SETTLED = 0.1
+
+# Registry gesture index -> synthetic label (gestures without one count as none)
+_LABELS = np.array([synthetic_hands.GESTURES.index(name) if name in synthetic_hands.GESTURES
+                    else synthetic_hands.NONE for name in registry.names] + [synthetic_hands.NONE])
+
+
+def session_labels(frames, rng):
+    """A user's gestures: an open hand to start with, then held gestures of 0.5-1.5 s."""
+    labels = [synthetic_hands.GESTURES.index('claw_open')] * FRAME_RATE
+    while len(labels) < frames:
+        label = int(rng.integers(-1, len(synthetic_hands.GESTURES)))
+        labels += [label] * int(rng.integers(FRAME_RATE // 2, FRAME_RATE * 3 // 2))
+    return np.array(labels[:frames])
+
+
+def session(scale, spread, frames, seed):
+    """(landmarks, labels) of one user's session."""
+    labels = session_labels(frames, np.random.default_rng(seed))
+    return synthetic_hands.random_poses(frames, scale=(scale, scale), rotation=(-10.0, 10.0),
+                                        spread=(spread, spread), labels=labels, noise=0.002,
+                                        seed=seed)
+
+
+def run(poses, calibrate):
+    """Gesture label per frame, and the palm size estimate per frame."""
+    calibration = HandCalibration()
+    features = lf.new_feature_array()
+    winners = np.empty(len(poses), dtype=np.intp)
+    palms = np.empty(len(poses))
+    for i, pose in enumerate(poses):
+        lf.compute_features(pose, out=features)
+        if calibrate:
+            calibration.update(pose, features)
+            calibration.normalize(features, out=features)
+        matched = registry.score(features) > 0
+        winners[i] = matched.argmax() if matched.any() else -1
+        palms[i] = calibration.palm
+    return _LABELS[winners], palms, calibration
+
+
+def settled_after(palms, true_palm, start=0):
+    """Frames after start until the palm estimate stays within SETTLED of true_palm."""
+    off = np.flatnonzero(np.abs(palms[start:] / true_palm - 1) > SETTLED)
+    return int(off[-1]) + 1 if len(off) else 0
+
+
+def scale_about_wrist(landmarks, scale):
+    wrist = landmarks[:, lf.WRIST:lf.WRIST + 1]
+    return (landmarks - wrist) * scale + wrist
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--frames', type=int, default=30 * FRAME_RATE, help="frames per session")
+    parser.add_argument('--trace', action='append', metavar='PATH',
+                        help="recorded trace to replay scaled (repeat for more)")
+    parser.add_argument('--scales', default='0.5,0.75,1.5',
+                        help="scales to replay the traces at (default: 0.5,0.75,1.5)")
+    args = parser.parse_args()
+
+    print(f"accuracy per frame after the first {WARM_UP} ({args.frames} frames per user):")
+    print(f"  {'user':16} {'scale':>5} {'spread':>6} {'fixed':>7} {'calibrated':>10} "
+          f"{'cursor gain':>11}")
+    for index, (name, scale, spread) in enumerate(USERS):
+        poses, labels = session(scale, spread, args.frames, seed=index)
+        fixed, _, _ = run(poses, calibrate=False)
+        calibrated, _, calibration = run(poses, calibrate=True)
+        print(f"  {name:16} {scale:5.2f} {spread:6.0f} "
+              f"{np.mean(fixed[WARM_UP:] == labels[WARM_UP:]):7.1%} "
+              f"{np.mean(calibrated[WARM_UP:] == labels[WARM_UP:]):10.1%} "
+              f"{calibration.cursor_gain:6.2f} (1/{scale:g} = {1 / scale:.2f})")
+
+    # One user takes over from another without the hand being lost
+    half = args.frames // 2
+    adult, _ = session(1.0, 8.0, half, seed=10)
+    kid, _ = session(0.5, 5.0, half, seed=11)
+    _, palms, calibration = run(np.concatenate((adult, kid)), calibrate=True)
+    print(f"\nuser swap (scale 1.0 -> 0.5 at frame {half}): {calibration.resets} reset(s), "
+          f"palm estimate settled on the new user after "
+          f"{settled_after(palms, REFERENCE_PALM * 0.5, half)} frames")
+
+    poses, _ = session(1.0, 8.0, args.frames, seed=20)
+    features = lf.new_feature_array()
+    start = time.perf_counter()
+    for pose in poses:
+        lf.compute_features(pose, out=features)
+    base = time.perf_counter() - start
+    calibration = HandCalibration()
+    start = time.perf_counter()
+    for pose in poses:
+        lf.compute_features(pose, out=features)
+        calibration.update(pose, features)
+        calibration.normalize(features, out=features)
+    cost = (time.perf_counter() - start - base) / len(poses)
+    print(f"calibration cost: {cost * 1e6:.1f} us/frame (update + normalize)")
+
+    traces = [(path, load_trace(path)) for path in args.trace or []]
+    if not traces:
+        traces = [('synthetic session', (poses, np.ones(len(poses), dtype=bool), None))]
+    print("\nframes whose gesture differs from the unscaled trace:")
+    for path, (landmarks, present, _) in traces:
+        landmarks = landmarks[present]
+        original = {calibrate: run(landmarks, calibrate)[0] for calibrate in (False, True)}
+        print(f"  {path} ({len(landmarks)} frames with a hand)")
+        for scale in map(float, args.scales.split(',')):
+            scaled = scale_about_wrist(landmarks, scale)
+            changed = [np.mean(run(scaled, calibrate)[0] != original[calibrate])
+                       for calibrate in (False, True)]
+            print(f"    scale {scale:4.2f}: fixed {changed[0]:6.1%}, calibrated {changed[1]:6.1%}")
+
+
+if __name__ == "__main__":
+    main()
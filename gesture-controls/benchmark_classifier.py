@@ -0,0 +1,117 @@
+"""
+AeroTouch - Learned classifier benchmark
+Trains the MLP and nearest-centroid classifiers (gesture_classifier.py) on
+synthetic poses (synthetic_hands.py) and compares them with the rule-based
+registry on held-out poses:
+
+- accuracy on test sets that vary one thing at a time beyond the training
+  data: hand size (camera distance), rotation and landmark noise
+- time per frame for one hand (as the controller scores it) and batched
+
+Synthetic hands are cleaner than MediaPipe's; for the accuracy on real
+recordings use train_classifier.py eval.
+
+Usage:
+    python benchmark_classifier.py [--train 20000] [--test 5000]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+import gesture_classifier as gcl
+import landmark_features as lf
+import synthetic_hands
+from gesture_registry import registry
+
+CLASSES = list(synthetic_hands.GESTURES) + [gcl.NONE_CLASS]
+
+# Test sets: random_poses() arguments over the defaults
+TEST_SETS = [
+    ('nominal', dict(scale=(0.9, 1.1), rotation=(-10.0, 10.0))),
+    ('training range', dict()),
+    ('small/large hands', dict(scale=(0.45, 1.8))),
+    ('rotated 20-35 deg', dict(rotation=(20.0, 35.0))),
+    ('noisy', dict(noise=0.008, jitter=0.025)),
+]
+
+BATCH = 1024
+
+
+def labelled(count, seed, **variation):
+    landmarks, labels = synthetic_hands.random_poses(count, seed=seed, **variation)
+    return landmarks, np.where(labels == synthetic_hands.NONE, len(CLASSES) - 1, labels)
+
+
+def rules_predict(landmarks):
+    """Class index per hand the rules pick; open_hand is only a precondition, so 'none'."""
+    winners = registry.classify_batch(lf.compute_features(landmarks))
+    lookup = np.array([CLASSES.index(name) if name in CLASSES else len(CLASSES) - 1
+                       for name in registry.names] + [len(CLASSES) - 1])
+    return lookup[winners]
+
+
+def time_single(score, poses):
+    start = time.perf_counter()
+    for pose in poses:
+        score(pose)
+    return (time.perf_counter() - start) / len(poses)
+
+
+def time_batched(predict, poses):
+    start = time.perf_counter()
+    for i in range(0, len(poses), BATCH):
+        predict(poses[i:i + BATCH])
+    return (time.perf_counter() - start) / len(poses)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--train', type=int, default=20000, help="training poses")
+    parser.add_argument('--test', type=int, default=5000, help="poses per test set")
+    parser.add_argument('--epochs', type=int, default=gcl.EPOCHS)
+    args = parser.parse_args()
+
+    landmarks, labels = labelled(args.train, seed=1)
+    start = time.perf_counter()
+    mlp = gcl.train_mlp(landmarks, labels, CLASSES, epochs=args.epochs)
+    mlp_training = time.perf_counter() - start
+    start = time.perf_counter()
+    centroid = gcl.train_centroid(landmarks, labels, CLASSES)
+    centroid_training = time.perf_counter() - start
+    print(f"trained on {args.train} poses: MLP {mlp_training:.1f} s, "
+          f"centroid {centroid_training:.2f} s")
+
+    print(f"\naccuracy ({args.test} poses each, {len(CLASSES)} classes incl. none):")
+    print(f"  {'':20} {'rules':>7} {'centroid':>9} {'MLP':>7}")
+    for index, (name, variation) in enumerate(TEST_SETS):
+        poses, truth = labelled(args.test, seed=100 + index, **variation)
+        scores = [np.mean(predict(poses) == truth)
+                  for predict in (rules_predict, centroid.predict, mlp.predict)]
+        print(f"  {name:20} " + " ".join(f"{score:>{width}.1%}"
+                                         for score, width in zip(scores, (7, 9, 7))))
+
+    poses, _ = labelled(args.test, seed=99)
+    features = lf.new_feature_array()
+
+    def rules_single(pose):
+        return registry.score(lf.compute_features(pose, out=features))
+
+    def model_single(model):
+        # As handle_hand scores a hand with --classifier
+        return lambda pose: model.score(pose, rules_single(pose))
+
+    print("\nper frame:")
+    print(f"  {'':20} {'one hand':>10} {'batched':>10}")
+    for name, single, batched in (
+            ('rules', rules_single, rules_predict),
+            ('rules + centroid', model_single(centroid), centroid.predict),
+            ('rules + MLP', model_single(mlp), mlp.predict)):
+        print(f"  {name:20} {time_single(single, poses) * 1e6:7.1f} us "
+              f"{time_batched(batched, poses) * 1e6:7.2f} us")
+    print("  (batched: the model alone, without the rules)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+AeroTouch - Cursor filter benchmark
+Runs the cursor filters from cursor_filter.py offline over the tracked hand
+position (index MCP) of recorded traces and reports, per filter:
+
+- jitter: RMS cursor movement per frame while the hand rests (screen pixels)
+- lag: delay of the cursor behind the hand while it moves (ms), including
+  the simulated capture-to-actuation latency that kalman predicts away
+- error: RMS cursor deviation while the hand moves (screen pixels)
+
+The "true" hand path is a zero-phase (centered) smoothing of the trace, or
+the exact path for --synthetic traces.
+
+Usage:
+    python benchmark_cursor_filter.py session.npz [more traces...] [--latency 60]
+    python benchmark_cursor_filter.py --synthetic
+"""
+
+import argparse
+
+import numpy as np
+
+import landmark_features as lf
+from cursor_filter import FILTERS, CursorFilter
+from input_sources import load_trace
+
+# Screen scale used to express errors in pixels (matches the default
+# RecordingBackend screen times the controller's CURSOR_SENSITIVITY)
+SCREEN_SCALE = np.array([1920, 1080]) * 1.5
+
+# Hand speed (normalized units/s) below which the hand counts as resting,
+# and how long it must have rested before jitter is measured (seconds)
+REST_SPEED = 0.05
+REST_SETTLE = 0.25
+
+# Half width (frames) of the centered smoothing used as reference path
+REFERENCE_RADIUS = 3
+
+# Frame gaps longer than this (seconds) split a trace into segments
+MAX_GAP = 0.25
+
+# Lags searched when aligning the cursor with the reference path (seconds)
+LAG_SEARCH = np.arange(-0.1, 0.3, 0.002)
+
+
+def synthetic_trace(seconds=60.0, fps=30.0, noise=0.003, seed=0):
+    """
+    Hand moving between random points with minimum-jerk strokes and rests,
+    sampled with timing jitter plus landmark noise. Returns
+    (timestamps, measured xy, true xy).
+    """
+    rng = np.random.default_rng(seed)
+    timestamps = np.cumsum(rng.normal(1 / fps, 0.1 / fps, int(seconds * fps)))
+    timestamps -= timestamps[0]
+
+    # Alternate rests and strokes of random length
+    knots, points = [0.0], [rng.uniform(0.2, 0.8, 2)]
+    while knots[-1] < timestamps[-1]:
+        knots.append(knots[-1] + rng.uniform(0.3, 1.2))   # rest
+        points.append(points[-1])
+        knots.append(knots[-1] + rng.uniform(0.2, 0.6))   # stroke
+        points.append(rng.uniform(0.2, 0.8, 2))
+    knots, points = np.array(knots), np.array(points)
+
+    segment = np.clip(np.searchsorted(knots, timestamps, side='right') - 1, 0, len(knots) - 2)
+    s = (timestamps - knots[segment]) / (knots[segment + 1] - knots[segment])
+    s = 10 * s ** 3 - 15 * s ** 4 + 6 * s ** 5  # minimum-jerk profile
+    true = points[segment] + (points[segment + 1] - points[segment]) * s[:, None]
+    measured = true + rng.normal(0, noise, true.shape)
+    return timestamps, measured, true
+
+
+def trace_segments(path):
+    """Yield (timestamps, xy) for each continuous run of hand frames in a trace."""
+    landmarks, present, timestamps = load_trace(path)
+    xy = landmarks[:, lf.INDEX_MCP, :2].astype(np.float64)
+    start = None
+    for i in range(len(present) + 1):
+        split = (i == len(present) or not present[i]
+                 or (start is not None and timestamps[i] - timestamps[i - 1] > MAX_GAP))
+        if split and start is not None:
+            if i - start > 2 * REFERENCE_RADIUS:
+                yield timestamps[start:i], xy[start:i]
+            start = None
+        if i < len(present) and present[i] and start is None:
+            start = i
+
+
+def reference_path(xy):
+    """Zero-phase moving average (edges use a shrinking window)."""
+    kernel = np.ones(2 * REFERENCE_RADIUS + 1)
+    padded = np.pad(xy, ((REFERENCE_RADIUS, REFERENCE_RADIUS), (0, 0)), mode='edge')
+    return np.stack([np.convolve(padded[:, a], kernel / kernel.sum(), mode='valid')
+                     for a in range(2)], axis=1)
+
+
+def run_filter(kind, timestamps, xy, latency):
+    """Filtered (and for kalman, predicted) position for every frame."""
+    cursor_filter = CursorFilter(kind)
+    out = np.empty_like(xy)
+    for i in range(len(xy)):
+        out[i] = cursor_filter.update(timestamps[i], xy[i, 0], xy[i, 1], latency)
+    return out
+
+
+def interpolate(timestamps, path, at):
+    return np.stack([np.interp(at, timestamps, path[:, a]) for a in range(2)], axis=1)
+
+
+def evaluate(kind, segments, latency):
+    """Return (jitter px, lag ms, moving error px) for one filter over all segments."""
+    rest_steps, move_errors = [], []
+    lag_errors = np.zeros(len(LAG_SEARCH))
+    for timestamps, xy, true in segments:
+        out = run_filter(kind, timestamps, xy, latency)
+        speed = np.hypot(*np.gradient(true, timestamps, axis=0).T)
+        inside = timestamps + latency <= timestamps[-1]
+
+        # The cursor is shown `latency` after capture; compare with where the hand is then
+        shown = interpolate(timestamps, true, timestamps + latency)
+        error = np.hypot(*((out - shown) * SCREEN_SCALE).T)
+        moving = speed >= REST_SPEED
+        last_moved = np.maximum.accumulate(np.where(moving, timestamps, -np.inf))
+        rest = inside & (timestamps - last_moved >= REST_SETTLE)
+        moving &= inside
+        steps = np.hypot(*(np.diff(out, axis=0, prepend=out[:1]) * SCREEN_SCALE).T)
+        rest_steps.append(steps[rest])
+        move_errors.append(error[moving])
+
+        for j, lag in enumerate(LAG_SEARCH):
+            aligned = interpolate(timestamps, true, timestamps + latency - lag)
+            lag_errors[j] += np.sum(((out - aligned)[moving] * SCREEN_SCALE) ** 2)
+
+    rest_steps = np.concatenate(rest_steps)
+    move_errors = np.concatenate(move_errors)
+    jitter = np.sqrt(np.mean(rest_steps ** 2)) if len(rest_steps) else float('nan')
+    moving_error = np.sqrt(np.mean(move_errors ** 2)) if len(move_errors) else float('nan')
+    lag = LAG_SEARCH[np.argmin(lag_errors)] * 1000 if len(move_errors) else float('nan')
+    return jitter, lag, moving_error
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('traces', nargs='*', help="landmark traces (.npz or recorded)")
+    parser.add_argument('--synthetic', action='store_true',
+                        help="use a generated trace with a known hand path")
+    parser.add_argument('--latency', type=float, default=60.0,
+                        help="capture-to-actuation latency to simulate (ms, default: 60)")
+    args = parser.parse_args()
+    if not args.traces and not args.synthetic:
+        parser.error("give at least one trace or --synthetic")
+
+    segments = []
+    if args.synthetic:
+        segments.append(synthetic_trace())
+    for path in args.traces:
+        for timestamps, xy in trace_segments(path):
+            segments.append((timestamps, xy, reference_path(xy)))
+
+    frames = sum(len(segment[0]) for segment in segments)
+    print(f"{frames} frames in {len(segments)} segments, "
+          f"{args.latency:.0f} ms simulated latency")
+    print(f"{'filter':10} {'jitter px':>10} {'lag ms':>8} {'moving px':>10}")
+    for kind in FILTERS:
+        jitter, lag, moving_error = evaluate(kind, segments, args.latency / 1000)
+        print(f"{kind:10} {jitter:10.2f} {lag:8.1f} {moving_error:10.2f}")
+
+
+if __name__ == "__main__":
+    main()
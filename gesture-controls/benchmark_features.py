@@ -0,0 +1,132 @@
+"""
+AeroTouch - Feature extraction microbenchmark
+Compares the per-frame cost of classifying a hand with the original
+attribute-based detectors against the vectorized landmark_features +
+gesture_registry path, and checks that both agree on the detected gesture.
+Also shows that the registry's cost stays flat as the gesture set grows.
+
+Usage:
+    python benchmark_features.py [--frames 5000] [--repeats 5]
+
+Per-frame times are the best of --repeats passes over the frames.
+"""
+
+import argparse
+import time
+import numpy as np
+from mediapipe.framework.formats import landmark_pb2
+
+import landmark_features as lf
+from gesture_registry import GESTURES, GestureRegistry, registry
+from gesture_controller import (
+    get_finger_positions,
+    detect_closed_fist,
+    detect_point_up,
+    detect_point_down,
+    detect_claw_open,
+)
+
+# A relaxed open hand in normalized image coordinates (x, y, z)
+OPEN_HAND = np.array([
+    [0.50, 0.80, 0.0],
+    [0.44, 0.76, 0.0], [0.39, 0.70, 0.0], [0.36, 0.64, 0.0], [0.33, 0.59, 0.0],
+    [0.45, 0.60, 0.0], [0.44, 0.50, 0.0], [0.44, 0.44, 0.0], [0.44, 0.39, 0.0],
+    [0.50, 0.59, 0.0], [0.50, 0.48, 0.0], [0.50, 0.42, 0.0], [0.50, 0.36, 0.0],
+    [0.55, 0.60, 0.0], [0.56, 0.50, 0.0], [0.56, 0.45, 0.0], [0.57, 0.40, 0.0],
+    [0.60, 0.63, 0.0], [0.62, 0.56, 0.0], [0.63, 0.52, 0.0], [0.64, 0.48, 0.0],
+], dtype=np.float32)
+
+
+def random_poses(count, noise=0.06, seed=0):
+    """Jitter the open hand so every gesture branch gets exercised."""
+    rng = np.random.default_rng(seed)
+    return OPEN_HAND + rng.normal(0.0, noise, size=(count, lf.NUM_LANDMARKS, 3)).astype(np.float32)
+
+
+def to_mediapipe_like(pose):
+    """A (21, 3) array as MediaPipe's NormalizedLandmarkList (what hands.process returns)."""
+    return landmark_pb2.NormalizedLandmarkList(landmark=[
+        landmark_pb2.NormalizedLandmark(x=float(x), y=float(y), z=float(z)) for x, y, z in pose])
+
+
+def classify_legacy(hand_landmarks):
+    positions = get_finger_positions(hand_landmarks)
+    if detect_closed_fist(positions):
+        return 'closed_fist'
+    if detect_point_up(positions):
+        return 'point_up'
+    if detect_point_down(positions):
+        return 'point_down'
+    if detect_claw_open(positions):
+        return 'claw_open'
+    return None
+
+
+def classify_vectorized(hand_landmarks, landmarks, features):
+    lf.landmarks_to_array(hand_landmarks, out=landmarks)
+    lf.compute_features(landmarks, out=features)
+    return registry.classify(features)
+
+
+def time_per_frame(fn, hands, repeats=1):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        labels = [fn(hand) for hand in hands]
+        best = min(best, time.perf_counter() - start)
+    return best / len(hands), labels
+
+
+def registry_scaling(features, repeats=(1, 2, 4, 8)):
+    """Time registry.classify on one frame as the gesture table grows."""
+    rows = []
+    for repeat in repeats:
+        table = GESTURES * repeat
+        scaled = GestureRegistry(table)
+        start = time.perf_counter()
+        for _ in range(2000):
+            scaled.classify(features)
+        rows.append((len(table), (time.perf_counter() - start) / 2000))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--frames', type=int, default=5000)
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    poses = random_poses(args.frames)
+    hands = [to_mediapipe_like(pose) for pose in poses]
+    landmarks = lf.new_landmark_array()
+    features = lf.new_feature_array()
+
+    legacy_time, legacy_labels = time_per_frame(classify_legacy, hands, args.repeats)
+    vector_time, _ = time_per_frame(
+        lambda hand: classify_vectorized(hand, landmarks, features), hands, args.repeats)
+
+    # Batched features + classification, e.g. for offline analysis of recorded traces
+    batch_features = lf.new_feature_array(len(poses))
+    start = time.perf_counter()
+    registry.classify_batch(lf.compute_features(poses, out=batch_features))
+    batch_time = (time.perf_counter() - start) / len(poses)
+
+    # Only the first four registry gestures exist in the legacy priority chain
+    active = GestureRegistry(GESTURES[:4])
+    active_labels = [active.names[i] if i >= 0 else None
+                     for i in active.classify_batch(batch_features)]
+    agree = sum(a == b for a, b in zip(legacy_labels, active_labels))
+
+    print(f"frames:            {args.frames}")
+    print(f"legacy detectors:  {legacy_time * 1e6:8.2f} us/frame")
+    print(f"vectorized:        {vector_time * 1e6:8.2f} us/frame "
+          f"({legacy_time / vector_time:.1f}x)")
+    print(f"batched:           {batch_time * 1e6:8.2f} us/frame")
+    print(f"agreement:         {agree}/{args.frames}")
+    print("registry cost by gesture count:")
+    for count, per_frame in registry_scaling(batch_features[0]):
+        print(f"  {count:3d} gestures:     {per_frame * 1e6:8.2f} us/frame")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+AeroTouch - Frame path benchmark
+Compares the per-frame cost of getting a camera frame ready for hand
+inference (and the preview) in the original loop against the reusable
+buffer path in frame_path.py. Reports time and bytes of new image
+allocations per frame; hand inference itself is not included.
+
+Usage:
+    python benchmark_frame_path.py [--frames 500] [--width 640] [--height 480]
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from frame_path import FrameBuffers
+
+
+def legacy_path(frame, preview):
+    """What the frame loop did before: flip, BGR->RGB, then RGB->BGR to draw on."""
+    frame = cv2.flip(frame, 1)
+    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    rgb_frame.flags.writeable = False
+    rgb_frame.flags.writeable = True
+    return cv2.cvtColor(rgb_frame, cv2.COLOR_RGB2BGR)
+
+
+def buffered_path(buffers):
+    def run(frame, preview):
+        buffers.to_rgb(frame)
+        if preview:
+            return buffers.mirrored(frame)
+        return frame
+    return run
+
+
+def measure(path, frame, frames, preview):
+    """Return (microseconds per frame, allocated bytes per frame)."""
+    # Warm up so first-use buffer allocations are not counted
+    path(frame, preview)
+
+    start = time.perf_counter()
+    for _ in range(frames):
+        path(frame, preview)
+    elapsed = (time.perf_counter() - start) / frames
+
+    # NumPy (and OpenCV's output arrays) report their allocations to tracemalloc
+    tracemalloc.start()
+    allocated = 0
+    for _ in range(frames):
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        path(frame, preview)
+        _, peak = tracemalloc.get_traced_memory()
+        allocated += peak - before
+    tracemalloc.stop()
+    return elapsed * 1e6, allocated / frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--frames', type=int, default=500)
+    parser.add_argument('--width', type=int, default=640)
+    parser.add_argument('--height', type=int, default=480)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 256, size=(args.height, args.width, 3), dtype=np.uint8)
+    frame_bytes = frame.nbytes
+
+    print(f"{args.width}x{args.height}, {args.frames} frames "
+          f"(one frame = {frame_bytes / 1024:.0f} KiB)")
+    for preview in (True, False):
+        label = 'preview on ' if preview else 'preview off'
+        for name, path in (('before', legacy_path), ('after ', buffered_path(FrameBuffers()))):
+            us, allocated = measure(path, frame, args.frames, preview)
+            print(f"{label} {name}: {us:8.1f} us/frame, "
+                  f"{allocated / 1024:8.1f} KiB allocated/frame "
+                  f"({allocated / frame_bytes:.1f} frames)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+AeroTouch - Gesture debouncing benchmark
+Replays per-frame gesture scores through single-frame decisions and through
+GestureStateMachine (gesture_states.py) with several window sizes, and
+reports for each:
+
+- triggers: gesture starts fired
+- false: starts of a gesture the hand was not actually holding
+- latency: time from a held gesture's start to its trigger (mean / 95th pct)
+- missed: held gestures that never triggered
+
+It also times a claw (moving the cursor) closing into a fist (a click)
+while the claw still matches for a few frames, as it can with the learned
+classifier's scores: the fist has priority, so it should click as soon as it
+is entered instead of waiting for the claw to fade.
+
+The "actually held" gesture is a centered majority vote over the raw
+per-frame decisions for recorded traces, or the known labels for
+--synthetic traces (random gesture segments with flipped and dropped
+frames).
+
+Usage:
+    python benchmark_gesture_states.py session.npz [more traces...]
+    python benchmark_gesture_states.py --synthetic [--flip 0.1]
+"""
+
+import argparse
+
+import numpy as np
+
+import landmark_features as lf
+from gesture_registry import registry
+from gesture_states import WINDOW, GestureStateMachine
+from input_sources import load_trace
+
+# Half width (frames) of the majority vote used as reference labels
+REFERENCE_RADIUS = 7
+
+# Held gestures shorter than this (frames) are not counted for latency/missed
+MIN_SEGMENT = 8
+
+# Window sizes compared against single-frame decisions
+WINDOWS = (3, WINDOW, 8)
+
+NO_GESTURE = -1
+
+
+def synthetic_scores(seconds=300.0, fps=30.0, flip=0.1, dropout=0.03, seed=0):
+    """
+    Alternate idle and random gestures held 0.5-2 s. Each frame matches its
+    true gesture, except a `flip` fraction that matches a random other
+    gesture (or none) and a `dropout` fraction with no hand at all.
+    Returns (timestamps, scores with NaN rows for no hand, true labels).
+    """
+    rng = np.random.default_rng(seed)
+    frames = int(seconds * fps)
+    count = len(registry.names)
+    timestamps = np.arange(frames) / fps
+
+    truth = np.empty(frames, dtype=np.intp)
+    i, idle = 0, True
+    while i < frames:
+        length = int(rng.uniform(0.5, 2.0) * fps)
+        truth[i:i + length] = NO_GESTURE if idle else rng.integers(count)
+        i, idle = i + length, not idle
+
+    observed = truth.copy()
+    flipped = rng.random(frames) < flip
+    observed[flipped] = rng.integers(NO_GESTURE, count, flipped.sum())
+    scores = np.full((frames, count), -0.02, dtype=np.float32)
+    hit = observed >= 0
+    scores[np.flatnonzero(hit), observed[hit]] = 0.02
+    scores[rng.random(frames) < dropout] = np.nan
+    return timestamps, scores, truth
+
+
+def trace_scores(path):
+    """Registry scores of every frame of a trace (NaN rows where no hand)."""
+    landmarks, present, timestamps = load_trace(path)
+    scores = np.full((len(landmarks), len(registry.names)), np.nan, dtype=np.float32)
+    if present.any():
+        scores[present] = registry.score_batch(lf.compute_features(landmarks[present]))
+    return timestamps, scores
+
+
+def single_frame_labels(scores):
+    """First matching gesture per frame, or NO_GESTURE."""
+    matched = scores > 0  # NaN rows match nothing
+    return np.where(matched.any(axis=1), matched.argmax(axis=1), NO_GESTURE)
+
+
+def majority_labels(labels):
+    """Centered majority vote over 2 * REFERENCE_RADIUS + 1 frames."""
+    values = np.arange(NO_GESTURE, len(registry.names))
+    onehot = (labels[:, None] == values[None, :]).astype(np.float32)
+    kernel = np.ones(2 * REFERENCE_RADIUS + 1, dtype=np.float32)
+    votes = np.stack([np.convolve(onehot[:, k], kernel, mode='same')
+                      for k in range(len(values))], axis=1)
+    return values[votes.argmax(axis=1)]
+
+
+def starts_single_frame(scores):
+    """(frame, gesture) where the single-frame decision changes to a gesture."""
+    labels = single_frame_labels(scores)
+    previous = np.concatenate(([NO_GESTURE], labels[:-1]))
+    frames = np.flatnonzero((labels != previous) & (labels != NO_GESTURE))
+    return [(int(i), int(labels[i])) for i in frames]
+
+
+def starts_debounced(timestamps, scores, window):
+    """(frame, gesture) of every start event of a GestureStateMachine."""
+    machine = GestureStateMachine(window=window)
+    index = {name: i for i, name in enumerate(registry.names)}
+    starts = []
+    for i, (timestamp, row) in enumerate(zip(timestamps, scores)):
+        machine.update(None if np.isnan(row[0]) else row, timestamp)
+        starts.extend((i, index[e.gesture]) for e in machine.events if e.kind == 'start')
+    return starts
+
+
+def claw_to_fist(window, overlap, fps=30.0):
+    """
+    Milliseconds from the first fist frame to its start event after 1 s of
+    claw_open, when the claw keeps matching for `overlap` more frames.
+    """
+    claw, fist = registry.names.index('claw_open'), registry.names.index('closed_fist')
+    machine = GestureStateMachine(window=window)
+    scores = np.full(len(registry.names), -0.02, dtype=np.float32)
+    frame = 0
+    for i in range(int(fps) + overlap + 2 * window + 10):
+        scores[:] = -0.02
+        if i < fps + overlap:
+            scores[claw] = 0.02
+        if i >= fps:
+            scores[fist] = 0.02
+        machine.update(scores, i / fps)
+        if machine.started('closed_fist'):
+            return (i - fps) / fps * 1000
+    return float('nan')
+
+
+def evaluate(timestamps, reference, starts, slack):
+    """Return (triggers, false triggers, latencies (s), segments, missed)."""
+    false = 0
+    for frame, gesture in starts:
+        # A trigger is right if the gesture was held at or shortly before it
+        if gesture not in reference[max(0, frame - slack):frame + 1]:
+            false += 1
+
+    latencies, segments, missed = [], 0, 0
+    start_frames = {}
+    for frame, gesture in starts:
+        start_frames.setdefault(gesture, []).append(frame)
+    boundaries = np.flatnonzero(np.diff(reference)) + 1
+    for begin, end in zip(np.concatenate(([0], boundaries)),
+                          np.concatenate((boundaries, [len(reference)]))):
+        gesture = reference[begin]
+        if gesture == NO_GESTURE or end - begin < MIN_SEGMENT:
+            continue
+        segments += 1
+        hits = [f for f in start_frames.get(gesture, ()) if begin - slack <= f < end + slack]
+        if hits:
+            latencies.append(max(0.0, timestamps[min(hits)] - timestamps[begin]))
+        else:
+            missed += 1
+    return len(starts), false, latencies, segments, missed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('traces', nargs='*', help="landmark traces (.npz or recorded)")
+    parser.add_argument('--synthetic', action='store_true',
+                        help="use generated gesture scores with known labels")
+    parser.add_argument('--flip', type=float, default=0.1,
+                        help="fraction of misclassified frames in --synthetic (default: 0.1)")
+    args = parser.parse_args()
+    if not args.traces and not args.synthetic:
+        parser.error("give at least one trace or --synthetic")
+
+    sessions = []
+    if args.synthetic:
+        sessions.append(synthetic_scores(flip=args.flip))
+    for path in args.traces:
+        timestamps, scores = trace_scores(path)
+        sessions.append((timestamps, scores, majority_labels(single_frame_labels(scores))))
+
+    minutes = sum(s[0][-1] - s[0][0] for s in sessions if len(s[0]) > 1) / 60
+    print(f"{sum(len(s[0]) for s in sessions)} frames, {minutes:.1f} min")
+    print(f"{'decision':14} {'triggers':>8} {'false':>6} {'false/min':>9} "
+          f"{'latency ms':>14} {'missed':>10}")
+    methods = [('single frame', None)] + [(f"window {w}", w) for w in WINDOWS]
+    for label, window in methods:
+        totals = [0, 0, [], 0, 0]
+        for timestamps, scores, reference in sessions:
+            if window is None:
+                starts = starts_single_frame(scores)
+            else:
+                starts = starts_debounced(timestamps, scores, window)
+            result = evaluate(timestamps, reference, starts, window or 1)
+            for k in (0, 1, 3, 4):
+                totals[k] += result[k]
+            totals[2].extend(result[2])
+        triggers, false, latencies, segments, missed = totals
+        latencies = np.array(latencies) * 1000
+        latency = (f"{latencies.mean():5.0f} / {np.percentile(latencies, 95):5.0f}"
+                   if len(latencies) else "-")
+        print(f"{label:14} {triggers:8d} {false:6d} {false / max(minutes, 1e-9):9.1f} "
+              f"{latency:>14} {missed:4d}/{segments:<5d}")
+
+    overlaps = (0, 5, 15)
+    print("\nclaw closing into a fist, fist start after its first frame (ms):")
+    print(f"{'claw overlap':14} " + " ".join(f"{f'{n} frames':>10}" for n in overlaps))
+    for window in WINDOWS:
+        print(f"{f'window {window}':14} "
+              + " ".join(f"{claw_to_fist(window, n):10.0f}" for n in overlaps))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,392 @@
+"""
+AeroTouch - Gesture recognition benchmark
+Drives gesture recognition and the gesture actions with synthetic hands
+(synthetic_hands.py), without a camera, hand inference or a display, so a
+threshold change can be checked for regressions:
+
+- accuracy of the registry rules on test sets that vary hand size,
+  rotation and noise, the confusion between gestures, and where each
+  gesture's recall goes: its own predicates fail, or an earlier gesture in
+  the registry also matches and wins
+- the original detect_* functions and the registry's per-gesture
+  predicates: how often each fires on its own gesture and on the others
+- classifier throughput: one hand per call as the frame loop does it, in
+  batches, and in one compute_features + classify_batch call over the whole
+  pose set (features and rules also timed apart)
+- motion scenarios run through handle_hand on a simulated clock: the cursor
+  travel of a moving claw (move_cursor), click and scroll cooldowns
+  (perform_click/perform_scroll), and actions that must not happen; each is
+  a pass/fail check
+
+--save writes the results as JSON. --compare reads such a file and exits
+with an error when an accuracy or hit rate dropped by more than
+--tolerance, or a scenario check failed. The poses come from fixed seeds, so
+with the same --poses every difference comes from the code.
+
+Known gap: pinch, thumbs_up and thumbs_down reach only about 50% recall on
+the training range (the recall table shows why). pinch and thumbs_down
+mostly pass their own predicates (about 98% and 94%), but earlier gestures
+in the registry match the same poses and win: the spread fingers of a pinch
+make it an open or closed claw, and a thumbs-down is often also a closed
+fist. thumbs_up mostly fails its own predicates: its thumb offsets are fixed
+fractions of the frame height, which small hands (scale below 0.7) never
+reach and tilted ones often miss. The poses are right and the registry
+priority matches the live controller, so this is a gap in the current rules,
+not in the benchmark.
+
+Usage:
+    python benchmark_gestures.py [--poses 5000] [--save gestures.json]
+    python benchmark_gestures.py --compare gestures.json
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+import gesture_controller as gc
+import landmark_features as lf
+import synthetic_hands
+from actuation import RecordingBackend, SyncBackend
+from benchmark_features import to_mediapipe_like
+from gesture_registry import registry
+from hand_tracker import HandTracker
+from input_sources import FRAME_HEIGHT, FRAME_WIDTH
+from train_classifier import confusion, format_confusion, rule_predictions
+
+NONE_CLASS = 'none'
+CLASSES = list(synthetic_hands.GESTURES) + [NONE_CLASS]
+
+# Test sets: random_poses() arguments over the defaults
+TEST_SETS = [
+    ('canonical', dict(scale=(1.0, 1.0), rotation=(0.0, 0.0), mirror=0.0, jitter=0.0,
+                       noise=0.0)),
+    ('nominal', dict(scale=(0.9, 1.1), rotation=(-10.0, 10.0))),
+    ('training range', dict()),
+    ('small/large hands', dict(scale=(0.45, 1.8))),
+    ('rotated 20-35 deg', dict(rotation=(20.0, 35.0))),
+    ('noisy', dict(noise=0.008, jitter=0.025)),
+]
+
+# The original attribute-based detectors and the gesture each one is for
+DETECTORS = [
+    ('detect_closed_fist', 'closed_fist'),
+    ('detect_point_up', 'point_up'),
+    ('detect_point_down', 'point_down'),
+    ('detect_claw_open', 'claw_open'),
+    ('detect_open_palm', 'claw_open'),
+    ('detect_claw_closed', 'claw_closed'),
+    ('detect_pinch', 'pinch'),
+    ('detect_thumbs_up', 'thumbs_up'),
+    ('detect_thumbs_down', 'thumbs_down'),
+]
+
+# Batch sizes for the throughput table, and the pose set classified in one call
+BATCHES = (64, 1024)
+WHOLE_SET = 16384
+
+# Simulated clock start (seconds): frame timestamps begin here
+CLOCK_START = 100.0
+
+
+def labelled(count, seed, **variation):
+    """count poses and their class indices (NONE -> the 'none' class)."""
+    landmarks, labels = synthetic_hands.random_poses(count, seed=seed, **variation)
+    return landmarks, np.where(labels == synthetic_hands.NONE, len(CLASSES) - 1, labels)
+
+
+def detector_rates(landmarks, truth):
+    """
+    {name: (hit rate on its gesture, false positive rate on other poses)}
+    for the detect_* functions and the registry's per-gesture predicates.
+    """
+    positions = [gc.get_finger_positions(to_mediapipe_like(pose)) for pose in landmarks]
+    rates = {}
+    for name, gesture in DETECTORS:
+        detect = getattr(gc, name)
+        fired = np.array([bool(detect(p)) for p in positions])
+        own = truth == CLASSES.index(gesture)
+        rates[name] = (fired[own].mean(), fired[~own].mean())
+    matched = registry.score_batch(lf.compute_features(landmarks)) > 0
+    for index, name in enumerate(registry.names):
+        if name in CLASSES:
+            own = truth == CLASSES.index(name)
+            rates[f"registry {name}"] = (matched[own, index].mean(), matched[~own, index].mean())
+    return rates
+
+
+def recall_losses(landmarks, truth):
+    """
+    {gesture: (recall, share whose own predicates fail, {earlier gesture:
+    share it wins})} for the registry gestures among CLASSES.
+    """
+    features = lf.compute_features(landmarks)
+    matched = registry.score_batch(features) > 0
+    winners = registry.classify_batch(features)
+    losses = {}
+    for index, name in enumerate(registry.names):
+        if name not in CLASSES:
+            continue
+        own = truth == CLASSES.index(name)
+        won = winners[own]
+        shadowed = {registry.names[other]: float(np.mean(matched[own, index] & (won == other)))
+                    for other in range(index)}
+        losses[name] = (float(np.mean(won == index)), float(np.mean(~matched[own, index])),
+                        {other: share for other, share in shadowed.items() if share > 0})
+    return losses
+
+
+def single_hand_rate(poses):
+    """Poses per second, one hand per call as handle_hand scores it."""
+    features = lf.new_feature_array()
+    start = time.perf_counter()
+    for pose in poses:
+        registry.score(lf.compute_features(pose, out=features))
+    return len(poses) / (time.perf_counter() - start)
+
+
+def batched_rate(poses, batch, total):
+    """Poses per second of compute_features + classify_batch in batches of batch."""
+    features = lf.new_feature_array(batch)
+    batches = [poses[i:i + batch] for i in range(0, len(poses) - batch + 1, batch)]
+    done = 0
+    start = time.perf_counter()
+    while done < total:
+        for chunk in batches:
+            registry.classify_batch(lf.compute_features(chunk, out=features))
+        done += len(batches) * batch
+    return done / (time.perf_counter() - start)
+
+
+def whole_set_rates(poses, total):
+    """
+    Poses per second (features, rules, both) of one compute_features and one
+    classify_batch call over all poses; the best of enough repeats to
+    classify total poses.
+    """
+    features = lf.new_feature_array(len(poses))
+    best_features = best_rules = float('inf')
+    for _ in range(max(1, -(-total // len(poses)))):
+        start = time.perf_counter()
+        lf.compute_features(poses, out=features)
+        computed = time.perf_counter()
+        registry.classify_batch(features)
+        end = time.perf_counter()
+        best_features = min(best_features, computed - start)
+        best_rules = min(best_rules, end - computed)
+    return (len(poses) / best_features, len(poses) / best_rules,
+            len(poses) / (best_features + best_rules))
+
+
+def run_scenario(labels, **motion):
+    """
+    Run a synthetic_hands.trajectory through the tracker and handle_hand on
+    a simulated clock. Returns (recorded events, gesture per frame, clock
+    time per frame, wrist path, cursor position per frame).
+    """
+    poses, wrist, times = synthetic_hands.trajectory(labels, **motion)
+    times = times + CLOCK_START
+    recording = RecordingBackend()
+    gc.use_backend(SyncBackend(recording))
+    gc.tracker = HandTracker(max_hands=1)
+    gestures, cursor = [], []
+    for pose, t in zip(poses, times):
+        for hand in gc.tracker.update(pose[None], timestamp=t):
+            gc.handle_hand(hand, None, FRAME_WIDTH, FRAME_HEIGHT, t)
+        driver = gc.tracker.driver
+        gestures.append(driver.gesture if driver is not None else None)
+        cursor.append(recording.cursor)
+    return recording.events, gestures, times, wrist, np.array(cursor, dtype=float)
+
+
+def actions(events, action):
+    return [args for _, name, args in events if name == action]
+
+
+def cooldown_count(gestures, times, gesture, cooldown, on_start):
+    """Actions the cooldown should let through: at every frame (or start) of gesture."""
+    count, last = 0, float('-inf')
+    for i, (name, t) in enumerate(zip(gestures, times)):
+        if name != gesture or (on_start and i and gestures[i - 1] == gesture):
+            continue
+        if t - last > cooldown:
+            count, last = count + 1, t
+    return count
+
+
+def starts(gestures, gesture):
+    return sum(name == gesture and (i == 0 or gestures[i - 1] != gesture)
+               for i, name in enumerate(gestures))
+
+
+def scenario_checks():
+    """[(scenario, check, passed, detail)] of the motion scenarios."""
+    hold = synthetic_hands.hold
+    checks = []
+
+    def check(scenario, name, passed, detail):
+        checks.append((scenario, name, bool(passed), detail))
+
+    scenario = 'fist held 2 s'
+    events, gestures, times, _, _ = run_scenario(
+        hold((None, 0.5), ('closed_fist', 2.0), (None, 0.5)), path='still')
+    clicks = len(actions(events, 'click'))
+    check(scenario, 'one click', clicks == 1, f"{clicks} clicks")
+    check(scenario, 'no cursor movement', not actions(events, 'move'),
+          f"{len(actions(events, 'move'))} moves")
+
+    scenario = 'fist tapped every 0.4 s'
+    events, gestures, times, _, _ = run_scenario(
+        hold(*[('closed_fist', 0.2), (None, 0.2)] * 8), path='still')
+    clicks = len(actions(events, 'click'))
+    expected = cooldown_count(gestures, times, 'closed_fist', gc.CLICK_COOLDOWN, on_start=True)
+    taps = starts(gestures, 'closed_fist')
+    check(scenario, 'click cooldown', clicks == expected and expected < taps,
+          f"{clicks} clicks for {taps} recognized taps (cooldown allows {expected})")
+
+    for gesture, sign in (('point_up', 1), ('point_down', -1)):
+        scenario = f"{gesture} held 2 s"
+        events, gestures, times, _, _ = run_scenario(
+            hold((None, 0.3), (gesture, 2.0), (None, 0.3)), path='still')
+        scrolls = actions(events, 'scroll')
+        expected = cooldown_count(gestures, times, gesture, gc.SCROLL_COOLDOWN, on_start=False)
+        check(scenario, 'scroll cooldown', len(scrolls) == expected,
+              f"{len(scrolls)} scrolls (cooldown allows {expected}, "
+              f"{len(scrolls) / 2.0:.1f}/s)")
+        check(scenario, 'direction', all(amount * sign > 0 for amount, in scrolls),
+              f"amounts {sorted({amount for amount, in scrolls})}")
+
+    scenario = 'point_up moving'
+    events, _, _, _, _ = run_scenario(hold(('point_up', 1.5)), path='line')
+    check(scenario, 'no cursor movement', not actions(events, 'move'),
+          f"{len(actions(events, 'move'))} moves")
+    check(scenario, 'no clicks', not actions(events, 'click'), "")
+
+    # The cursor follows the index knuckle; over the whole path it should
+    # travel the knuckle's distance times the sensitivity (in screen pixels)
+    screen_width, screen_height = gc.SCREEN_WIDTH, gc.SCREEN_HEIGHT
+    gain = np.array([screen_width, screen_height]) * gc.CURSOR_SENSITIVITY
+
+    scenario = 'claw moving right'
+    labels = hold(('claw_open', 1.5))
+    events, gestures, _, _, cursor = run_scenario(labels, path='line', start=(0.45, 0.75),
+                                                  end=(0.6, 0.75), noise=0.0)
+    poses, _, _ = synthetic_hands.trajectory(labels, path='line', start=(0.45, 0.75),
+                                             end=(0.6, 0.75), noise=0.0)
+    knuckle = poses[:, lf.INDEX_MCP, :2]
+    expected = (knuckle[-1] - knuckle[gestures.index('claw_open')]) * gain
+    travelled = cursor[-1] - cursor[0]
+    ratio = travelled[0] / expected[0]
+    check(scenario, 'cursor travel', 0.85 < ratio < 1.1,
+          f"{travelled[0]:.0f} px of {expected[0]:.0f} px ({ratio:.0%})")
+    check(scenario, 'stays level', abs(travelled[1]) < 0.05 * abs(travelled[0]),
+          f"{travelled[1]:+.0f} px vertically")
+    check(scenario, 'no clicks or scrolls',
+          not actions(events, 'click') and not actions(events, 'scroll'), "")
+
+    scenario = 'claw circling'
+    radius = 0.05
+    events, _, _, _, cursor = run_scenario(hold(('claw_open', 3.0)), path='circle',
+                                           start=(0.5, 0.7), radius=radius, turns=2.0)
+    # The second turn, after the filter has settled
+    half = cursor[len(cursor) // 2:]
+    width = (half[:, 0].max() - half[:, 0].min()) / (2 * radius * gain[0])
+    height = (half[:, 1].max() - half[:, 1].min()) / (2 * radius * gain[1])
+    check(scenario, 'cursor circle size', 0.85 < width < 1.1 and 0.85 < height < 1.1,
+          f"width {width:.0%}, height {height:.0%} of the hand's circle")
+    return checks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--poses', type=int, default=5000, help="poses per test set")
+    parser.add_argument('--throughput', type=int, default=1_000_000,
+                        help="poses classified per batch size for the throughput table")
+    parser.add_argument('--save', metavar='PATH', help="write the results as JSON")
+    parser.add_argument('--compare', metavar='PATH', help="compare with results saved earlier")
+    parser.add_argument('--tolerance', type=float, default=0.01,
+                        help="largest accuracy drop --compare accepts (default: 0.01)")
+    args = parser.parse_args()
+    results = {'accuracy': {}, 'detectors': {}, 'checks': {}, 'throughput': {}}
+
+    print(f"rules accuracy ({args.poses} poses each, {len(CLASSES)} classes incl. none):")
+    for index, (name, variation) in enumerate(TEST_SETS):
+        landmarks, truth = labelled(args.poses, seed=200 + index, **variation)
+        accuracy = float(np.mean(rule_predictions(landmarks, CLASSES) == truth))
+        results['accuracy'][name] = accuracy
+        print(f"  {name:20} {accuracy:7.1%}")
+
+    landmarks, truth = labelled(args.poses, seed=300)
+    print("\nconfusion (training range; rows: true gesture, columns: recognized):")
+    print(format_confusion(confusion(truth, rule_predictions(landmarks, CLASSES), len(CLASSES)),
+                           CLASSES))
+
+    print("\nrecall lost (training range): own predicates fail, or an earlier gesture wins:")
+    for name, (recall, fails, shadowed) in recall_losses(landmarks, truth).items():
+        if recall < 1.0:
+            winners = ", ".join(f"{other} {share:.1%}" for other, share in
+                                sorted(shadowed.items(), key=lambda item: -item[1]))
+            print(f"  {name:12} recall {recall:6.1%}   own fails {fails:6.1%}   "
+                  f"lost to {winners or '-'}")
+
+    print("\ndetectors on their own gesture and on the others (training range):")
+    print(f"  {'':28} {'hits':>7} {'false':>7}")
+    for name, (hits, false) in detector_rates(landmarks, truth).items():
+        results['detectors'][name] = [float(hits), float(false)]
+        print(f"  {name:28} {hits:7.1%} {false:7.1%}")
+
+    pool, _ = synthetic_hands.random_poses(WHOLE_SET, seed=400)
+    single = single_hand_rate(pool)
+    results['throughput']['single'] = single
+    print("\nthroughput (features + rules):")
+    print(f"  one hand per call  {single / 1e3:8.1f} k poses/s ({1e6 / single:.1f} us/pose)")
+    for batch in BATCHES:
+        rate = batched_rate(pool, batch, args.throughput)
+        results['throughput'][f"batch {batch}"] = rate
+        print(f"  batches of {batch:<6}  {rate / 1e6:8.2f} M poses/s")
+    features, rules, rate = whole_set_rates(pool, args.throughput)
+    results['throughput']['whole set'] = rate
+    print(f"  {WHOLE_SET} in one call {rate / 1e6:6.2f} M poses/s "
+          f"(features {features / 1e6:.2f} M/s, rules {rules / 1e6:.2f} M/s)")
+    if rate < 1e6:
+        print(f"  below 1 M poses/s here: compute_features is {rate / features:.0%} of the time, "
+              f"nearly all of it the (N, 63) x (63, K) matmul")
+
+    print("\nscenarios (simulated clock):")
+    failed = 0
+    for scenario, name, passed, detail in scenario_checks():
+        results['checks'][f"{scenario}: {name}"] = passed
+        failed += not passed
+        print(f"  {'ok  ' if passed else 'FAIL'} {scenario}: {name}"
+              + (f" - {detail}" if detail else ""))
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=1)
+        print(f"\nwrote {args.save}")
+
+    problems = [f"{failed} scenario check(s) failed"] if failed else []
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\ncompared with {args.compare}:")
+        for name, before in baseline['accuracy'].items():
+            after = results['accuracy'].get(name)
+            if after is not None:
+                print(f"  {name:28} {before:7.1%} -> {after:7.1%}")
+                if after < before - args.tolerance:
+                    problems.append(f"accuracy on {name} dropped")
+        for name, (before, _) in baseline['detectors'].items():
+            after = results['detectors'].get(name, [before])[0]
+            if after < before - args.tolerance:
+                problems.append(f"{name} hit rate dropped ({before:.1%} -> {after:.1%})")
+        for name, passed in baseline['checks'].items():
+            if passed and not results['checks'].get(name, False):
+                problems.append(f"regressed: {name}")
+    if problems:
+        raise SystemExit("\n".join(problems))
+
+
+if __name__ == "__main__":
+    main()
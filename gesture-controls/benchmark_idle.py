@@ -0,0 +1,166 @@
+"""
+AeroTouch - Idle power saving benchmark
+Runs the serial frame loop with real hand inference against a paced source
+that behaves like a live camera (newest frame on read, FRAME_RATE fps) and
+compares always-on inference with the IdleScheduler (idle.py):
+
+- CPU use of the process over the run, and while idle / active
+- wake-ups, and the time from the start of motion to the capture of the
+  frame that woke the controller up (known exactly for the synthetic scene)
+- the scheduler's own wake latency estimate (last still frame to inferred)
+
+The synthetic scene is a noisy empty background with a blob passing through
+it every VISIT_INTERVAL seconds (no hand, so every wake-up times out again).
+A recorded video can be replayed instead with --video.
+
+Usage:
+    python benchmark_idle.py [--seconds 40] [--idle-after 5] [--idle-fps 4]
+    python benchmark_idle.py --video session.mp4
+"""
+
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+import gesture_controller as gc
+from actuation import RecordingBackend
+from idle import IDLE_AFTER, IDLE_FPS, IdleScheduler
+from input_sources import FRAME_HEIGHT, FRAME_WIDTH
+
+FRAME_RATE = 30.0
+
+# The synthetic visitor appears every VISIT_INTERVAL seconds for VISIT_LENGTH
+VISIT_INTERVAL = 12.0
+VISIT_LENGTH = 1.0
+
+
+class PacedSource:
+    """Delivers frame_at(t) like a camera: the newest frame, never the same one twice."""
+
+    def __init__(self, frame_at, seconds, fps=FRAME_RATE):
+        self.frame_at = frame_at
+        self.seconds = seconds
+        self.fps = fps
+        self.start = None
+        self._last = -1
+
+    def isOpened(self):
+        return self.start is None or time.perf_counter() - self.start < self.seconds
+
+    def read(self, image=None):
+        now = time.perf_counter()
+        if self.start is None:
+            self.start = now
+        index = int((now - self.start) * self.fps)
+        if index <= self._last:
+            index = self._last + 1
+            time.sleep(max(0.0, self.start + index / self.fps - now))
+        self._last = index
+        return True, self.frame_at(index / self.fps, image)
+
+    def release(self):
+        self.seconds = 0.0
+
+
+def synthetic_scene(seed=0):
+    """frame_at for the empty scene with a visitor every VISIT_INTERVAL seconds."""
+    rng = np.random.default_rng(seed)
+    background = rng.integers(60, 90, (FRAME_HEIGHT, FRAME_WIDTH, 3), dtype=np.uint8)
+    noisy = [cv2.add(background, rng.integers(0, 6, background.shape, dtype=np.uint8))
+             for _ in range(8)]
+
+    def frame_at(t, image=None):
+        frame = noisy[int(t * FRAME_RATE) % len(noisy)]
+        if image is None:
+            image = np.empty_like(frame)
+        np.copyto(image, frame)
+        phase = t % VISIT_INTERVAL - (VISIT_INTERVAL - VISIT_LENGTH)
+        if phase >= 0:
+            x = int(FRAME_WIDTH * phase / VISIT_LENGTH)
+            cv2.circle(image, (x, FRAME_HEIGHT // 2), 60, (200, 180, 160), -1)
+        return image
+
+    return frame_at
+
+
+def video_scene(path):
+    """frame_at for a recorded video played back in real time."""
+    cap = cv2.VideoCapture(path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or FRAME_RATE
+    state = {'index': -1, 'frame': None}
+
+    def frame_at(t, image=None):
+        target = int(t * fps)
+        while state['index'] < target:
+            success, frame = cap.read()
+            if not success:
+                break
+            state['index'] += 1
+            state['frame'] = frame
+        return state['frame']
+
+    return frame_at
+
+
+def run(frame_at, seconds, scheduler):
+    """Run the serial loop headless for `seconds`; return (source, CPU %)."""
+    gc.use_backend(RecordingBackend())
+    gc.tracker = gc.HandTracker(max_hands=1)
+    gc.scheduler = scheduler
+    source = PacedSource(frame_at, seconds)
+    with gc.mp_hands.Hands(model_complexity=0, min_detection_confidence=0.7,
+                           min_tracking_confidence=0.7, max_num_hands=1) as hands:
+        wall, cpu = time.perf_counter(), time.process_time()
+        gc.run_serial(source, hands, preview=False, scheduler=scheduler)
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    return source, 100.0 * cpu / wall
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--seconds', type=float, default=40.0)
+    parser.add_argument('--video', metavar='PATH', help="replay a recorded video instead")
+    parser.add_argument('--idle-after', type=float, default=IDLE_AFTER)
+    parser.add_argument('--idle-fps', type=float, default=IDLE_FPS)
+    args = parser.parse_args()
+
+    seconds = args.seconds
+    if args.video:
+        cap = cv2.VideoCapture(args.video)
+        seconds = cap.get(cv2.CAP_PROP_FRAME_COUNT) / (cap.get(cv2.CAP_PROP_FPS) or FRAME_RATE)
+        cap.release()
+        onsets = []
+    else:
+        onsets = np.arange(VISIT_INTERVAL - VISIT_LENGTH, seconds, VISIT_INTERVAL)
+
+    def scene():
+        return video_scene(args.video) if args.video else synthetic_scene()
+
+    print(f"always-on inference, {seconds:.0f} s:")
+    _, always_on = run(scene(), seconds, None)
+
+    print(f"\nidle after {args.idle_after:g} s at {args.idle_fps:g} fps:")
+    scheduler = IdleScheduler(args.idle_after, args.idle_fps)
+    source, gated = run(scene(), seconds, scheduler)
+
+    summary = scheduler.summary()
+    print(f"\n{'':22} {'always on':>10} {'idle mode':>10}")
+    print(f"{'CPU (% of one core)':22} {always_on:10.1f} {gated:10.1f}")
+    print(f"{'  while idle':22} {'':10} {summary['idle'][1]:10.1f}")
+    print(f"{'  while active':22} {'':10} {summary['active'][1]:10.1f}")
+    print(f"{'time idle':22} {'':10} {summary['idle'][0] / seconds:10.0%}")
+    print(f"wake-ups: {summary['wakeups']} ({scheduler.false_wakeups} without a hand), "
+          f"scheduler wake latency {summary['wake_ms'][0]:.0f}/{summary['wake_ms'][1]:.0f} ms "
+          f"mean/max")
+    if len(onsets):
+        wakes = np.array(scheduler.wake_times) - source.start
+        delays = [(wakes[wakes >= t].min() - t) * 1000 for t in onsets if (wakes >= t).any()]
+        if delays:
+            print(f"motion onset to wake-up frame: {np.mean(delays):.0f}/{np.max(delays):.0f} ms "
+                  f"mean/max ({len(delays)}/{len(onsets)} visits caught)")
+
+
+if __name__ == "__main__":
+    main()
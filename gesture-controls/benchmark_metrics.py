@@ -0,0 +1,126 @@
+"""
+AeroTouch - Instrumentation overhead benchmark
+Measures what the latency metrics (metrics.py) cost: the time of one
+recorded span, and the frame time of the serial loop with real hand
+inference on synthetic camera frames with metrics enabled and disabled
+(interleaved rounds, median of each). Prints the per-stage breakdown the
+instrumented runs recorded.
+
+Usage:
+    python benchmark_metrics.py [--frames 300] [--rounds 5]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+import gesture_controller as gc
+from actuation import AsyncBackend, RecordingBackend
+from benchmark_features import OPEN_HAND
+from benchmark_idle import synthetic_scene
+from input_sources import LandmarkTraceSource, save_trace
+from metrics import Histogram, metrics
+
+
+class SyntheticSource:
+    """Unpaced camera stand-in: `frames` synthetic frames, as fast as they are read."""
+
+    def __init__(self, frames, fps=30.0):
+        self.frame_at = synthetic_scene()
+        self.frames = frames
+        self.fps = fps
+        self._next = 0
+
+    def isOpened(self):
+        return self._next < self.frames
+
+    def read(self, image=None):
+        t = 11.0 + self._next / self.fps  # inside a visitor pass: moving content
+        self._next += 1
+        return True, self.frame_at(t, image)
+
+    def release(self):
+        self._next = self.frames
+
+
+def span_cost(count=200000):
+    """Nanoseconds per instrumented span (two perf_counter_ns calls and a record)."""
+    histogram = Histogram()
+    clock = time.perf_counter_ns
+    start = clock()
+    for _ in range(count):
+        begin = clock()
+        histogram.record(clock() - begin)
+    return (clock() - start) / count
+
+
+def frame_time(hands, frames, enabled):
+    """Mean milliseconds per frame of the serial loop (no preview)."""
+    metrics.enabled = enabled
+    gc.tracker = gc.HandTracker(max_hands=1)
+    stats = gc.run_serial(SyntheticSource(frames), hands, preview=False)
+    return 1000.0 / stats.summary()['fps']
+
+
+def gesture_frame_time(path, enabled):
+    """Mean microseconds per frame of gesture handling alone (trace replay, no inference)."""
+    metrics.enabled = enabled
+    gc.tracker = gc.HandTracker(max_hands=1)
+    stats = gc.run_trace(LandmarkTraceSource(path))
+    return stats.summary()['actuation'][0] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    per_span = span_cost()
+    print(f"one span: {per_span:.0f} ns")
+
+    gc.use_backend(AsyncBackend(RecordingBackend()))
+    metrics.histograms.clear()
+    on, off = [], []
+    with gc.mp_hands.Hands(model_complexity=0, min_detection_confidence=0.7,
+                           min_tracking_confidence=0.7, max_num_hands=1) as hands:
+        frame_time(hands, 30, True)  # warm up the model
+        for _ in range(args.rounds):
+            off.append(frame_time(hands, args.frames, False))
+            on.append(frame_time(hands, args.frames, True))
+    frames = metrics.counters.get('frames', 0)
+    spans = sum(h.count for h in metrics.histograms.values())
+    spans_per_frame = spans / max(frames, 1)
+    on_ms, off_ms = np.median(on), np.median(off)
+    print(f"\nframe loop with inference, {args.rounds} x {args.frames} frames:")
+    print(f"  metrics off: {off_ms:.2f} ms/frame")
+    print(f"  metrics on:  {on_ms:.2f} ms/frame ({(on_ms - off_ms) / off_ms:+.2%} measured)")
+    print(f"  {spans_per_frame:.1f} spans/frame x {per_span:.0f} ns = "
+          f"{spans_per_frame * per_span / 1e6 / on_ms:.3%} of frame time")
+
+    rng = np.random.default_rng(0)
+    poses = OPEN_HAND + rng.normal(0, 0.003, (2000,) + OPEN_HAND.shape)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'poses.npz')
+        save_trace(path, poses, np.ones(len(poses), dtype=bool), np.arange(len(poses)) / 30.0)
+        gesture_frame_time(path, True)  # warm up
+        gesture_off = np.median([gesture_frame_time(path, False) for _ in range(args.rounds)])
+        gesture_on = np.median([gesture_frame_time(path, True) for _ in range(args.rounds)])
+    print(f"\ngesture handling alone: {gesture_off:.1f} -> {gesture_on:.1f} us/frame "
+          f"({(gesture_on - gesture_off) / gesture_off:+.1%})")
+
+    gc.backend.close()
+
+    print("\nrecorded stages (ms):")
+    print(f"  {'stage':18} {'count':>6} {'p50':>7} {'p90':>7} {'p99':>7} {'max':>7}")
+    for name, histogram in sorted(metrics.histograms.items()):
+        p50, p90, p99 = (value / 1e6 for value in histogram.quantiles())
+        print(f"  {name:18} {histogram.count:6d} {p50:7.3f} {p90:7.3f} {p99:7.3f} "
+              f"{histogram.max_ns / 1e6:7.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+AeroTouch - Multi-camera throughput benchmark
+Runs hand inference on 1..N video sources at once, first all in one process
+(one Hands instance per source, served round robin, like a single-process
+controller would) and then with the CameraPool (multi_camera.py, one worker
+process per source), and reports the aggregate inference frame rate, the
+scaling over one source and the shared-memory handoff latency.
+
+Without --video the sources are synthetic recordings of the idle benchmark
+scene (written to a temporary directory); the machine's core count bounds
+the achievable scaling.
+
+Usage:
+    python benchmark_multi_camera.py [--sources 4] [--frames 150]
+    python benchmark_multi_camera.py --video cam0.mp4 --video cam1.mp4
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+import gesture_controller as gc
+from benchmark_idle import FRAME_RATE, synthetic_scene
+from frame_path import FrameBuffers
+from input_sources import FRAME_HEIGHT, FRAME_WIDTH, VideoFileSource
+from multi_camera import CameraPool
+from pipeline import detect_hands
+
+
+def write_videos(directory, count, frames):
+    """Synthetic scene recordings (different stretches of the scene); returns the paths."""
+    paths = []
+    for index in range(count):
+        path = os.path.join(directory, f'camera{index}.avi')
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), FRAME_RATE,
+                                 (FRAME_WIDTH, FRAME_HEIGHT))
+        frame_at = synthetic_scene(seed=index)
+        for i in range(frames):
+            writer.write(frame_at(10.0 + index + i / FRAME_RATE))
+        writer.release()
+        paths.append(path)
+    return paths
+
+
+def new_hands():
+    return gc.mp_hands.Hands(model_complexity=0, min_detection_confidence=0.7,
+                             min_tracking_confidence=0.7, max_num_hands=1)
+
+
+def single_process(paths):
+    """Frames per second of all sources read and inferred round robin in this process."""
+    sources = [VideoFileSource(path) for path in paths]
+    hands = [new_hands() for _ in paths]
+    buffers = [FrameBuffers() for _ in paths]
+    frames = 0
+    start = time.perf_counter()
+    while any(source.isOpened() for source in sources):
+        for source, model, frame_buffers in zip(sources, hands, buffers):
+            if not source.isOpened():
+                continue
+            success, frame = frame_buffers.read(source)
+            if success:
+                detect_hands(model, frame, frame_buffers)
+                frames += 1
+    elapsed = time.perf_counter() - start
+    for source, model in zip(sources, hands):
+        source.release()
+        model.close()
+    return frames / elapsed
+
+
+def process_pool(paths):
+    """(frames per second, handoff latencies in us) of the CameraPool on all sources."""
+    pool = CameraPool(paths).start()
+    handoff = []
+    first = last = None
+    frames = 0
+    try:
+        for result in pool.results():
+            # Count once every worker is running, so start-up is left out
+            if first is not None:
+                frames += 1 + pool.skipped[result.source] - skipped[result.source]
+                last = result.received
+            elif all(pool.received):
+                first = result.received
+            skipped = list(pool.skipped)
+            handoff.append((result.received - result.published) * 1e6)
+    finally:
+        pool.close()
+    return frames / (last - first), np.array(handoff)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sources', type=int, default=max(2, min(4, os.cpu_count() or 1)))
+    parser.add_argument('--frames', type=int, default=150, help="frames per synthetic source")
+    parser.add_argument('--video', action='append', metavar='PATH',
+                        help="use recorded videos as sources instead (repeat)")
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} cores")
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = args.video or write_videos(tmp, args.sources, args.frames)
+        print(f"\n{'sources':>7} {'1 process':>10} {'pool':>8} {'pool/1 proc':>12} "
+              f"{'scaling':>8} {'handoff p50/p99 (us)':>21}")
+        base = None
+        for count in range(1, len(paths) + 1):
+            serial_fps = single_process(paths[:count])
+            pool_fps, handoff = process_pool(paths[:count])
+            base = base or pool_fps
+            p50, p99 = np.percentile(handoff, [50, 99])
+            print(f"{count:7d} {serial_fps:8.1f}/s {pool_fps:6.1f}/s {pool_fps / serial_fps:11.2f}x "
+                  f"{pool_fps / base:7.2f}x {p50:10.0f}/{p99:.0f}")
+
+
+if __name__ == "__main__":
+    main()
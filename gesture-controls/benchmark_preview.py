@@ -0,0 +1,159 @@
+"""
+AeroTouch - Preview benchmark
+Compares the preview's per-frame cost in the frame loop before and after
+preview.py, with the gestures of synthetic hands (synthetic_hands.py) as
+detection results:
+
+- drawing only: MediaPipe's draw_landmarks plus the text labels, against
+  the single-polylines overlay on the full frame and on the decimated one
+- the frame loop (gesture handling, drawing, display) in each preview mode,
+  with the time spent rendering (in the frame loop in full mode, on the
+  render thread in decimated mode) and the process CPU time per frame,
+  which is what counts on a single-core kiosk
+
+Without --window nothing is shown (display is a no-op), so the numbers are
+the drawing and mirroring alone; with --window the frames go to a real
+preview window.
+
+Usage:
+    python benchmark_preview.py [--frames 600] [--hands 2] [--window]
+"""
+
+import argparse
+import time
+from types import SimpleNamespace
+
+import cv2
+import mediapipe as mp
+import numpy as np
+from mediapipe.framework.formats import landmark_pb2
+
+import gesture_controller as gc
+import synthetic_hands
+from actuation import RecordingBackend, SyncBackend
+from frame_path import FrameBuffers
+from hand_tracker import HandTracker
+from preview import (
+    DECIMATE_EVERY, DECIMATE_SCALE, Overlay, PreviewRenderer, draw_overlay, show_window,
+)
+
+
+def no_display(window, frame):
+    return True
+
+
+def landmark_list(pose):
+    """A (21, 3) array as MediaPipe's NormalizedLandmarkList (draw_landmarks needs the real one)."""
+    return landmark_pb2.NormalizedLandmarkList(landmark=[
+        landmark_pb2.NormalizedLandmark(x=float(x), y=float(y), z=float(z)) for x, y, z in pose])
+
+
+def make_results(poses):
+    """hands.process-like results for a frame showing these hands."""
+    return SimpleNamespace(
+        multi_hand_landmarks=[landmark_list(pose) for pose in poses],
+        multi_handedness=[SimpleNamespace(classification=[SimpleNamespace(label='Right')])
+                          for _ in poses])
+
+
+def legacy_draw(frame, results, labels):
+    """The drawing the frame loop did before: draw_landmarks per hand, then the labels."""
+    solutions = mp.solutions
+    height, width = frame.shape[:2]
+    for hand_landmarks, (text, (x, y)) in zip(results.multi_hand_landmarks, labels):
+        solutions.drawing_utils.draw_landmarks(
+            frame, hand_landmarks, solutions.hands.HAND_CONNECTIONS,
+            solutions.drawing_styles.get_default_hand_landmarks_style(),
+            solutions.drawing_styles.get_default_hand_connections_style())
+        cv2.putText(frame, text, (int(x * width), int(y * height)),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
+    cv2.putText(frame, "Gesture: MOVE CURSOR (Claw-Open) 100%", (10, 30),
+                cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+    cv2.putText(frame, "Press 'q' to quit", (10, height - 10),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+
+
+def run_loop(mode, frame, results, labels, display):
+    """(frame loop, rendering, process CPU) seconds per frame and the renderer of one mode."""
+    gc.use_backend(SyncBackend(RecordingBackend()))
+    gc.tracker = HandTracker(max(2, len(results[0].multi_hand_landmarks)))
+    gc.frame_buffers = FrameBuffers()
+    buffers = FrameBuffers()
+    renderer = gc.renderer = PreviewRenderer('full' if mode == 'before' else mode,
+                                             show=display)
+
+    def legacy(frame, result, captured):
+        # Gesture handling, then mirroring, drawing and display as before
+        gc.handle_results(frame, result, False, captured)
+        mirrored = buffers.mirrored(frame)
+        legacy_draw(mirrored, result, labels)
+        display(gc.PREVIEW_WINDOW, mirrored)
+
+    cpu = time.process_time()
+    start = time.perf_counter()
+    for result in results:
+        if mode == 'before':
+            legacy(frame, result, time.perf_counter())
+        else:
+            gc.handle_results(frame, result, mode != 'off', time.perf_counter())
+    loop = time.perf_counter() - start
+    renderer.close()
+    cpu = time.process_time() - cpu
+    frames = len(results)
+    return loop / frames, renderer.render_ns / 1e9 / frames, cpu / frames, renderer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--frames', type=int, default=600)
+    parser.add_argument('--hands', type=int, default=2)
+    parser.add_argument('--width', type=int, default=640)
+    parser.add_argument('--height', type=int, default=480)
+    parser.add_argument('--window', action='store_true', help="show the frames in a window")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 256, size=(args.height, args.width, 3), dtype=np.uint8)
+    poses, _ = synthetic_hands.random_poses(args.frames * args.hands, seed=0)
+    # Side by side, as two users would stand
+    poses = poses.reshape(args.frames, args.hands, *poses.shape[1:])
+    for hand in range(args.hands):
+        poses[:, hand, :, 0] += (hand - (args.hands - 1) / 2) * 0.35
+    results = [make_results(frame_poses) for frame_poses in poses]
+
+    print(f"{args.width}x{args.height}, {args.hands} hand(s), {args.frames} frames")
+    labels = [("#1", (0.5, 0.5))] * args.hands
+    overlays = [Overlay(frame_poses, labels, "MOVE CURSOR (Claw-Open) 100%", (0, 255, 0))
+                for frame_poses in poses]
+    small = cv2.resize(frame, None, fx=DECIMATE_SCALE, fy=DECIMATE_SCALE)
+    canvases = [frame.copy() for _ in range(8)]
+    small_canvases = [small.copy() for _ in range(8)]
+
+    draws = [
+        ('draw_landmarks + text', lambda i: legacy_draw(canvases[i % 8], results[i], labels)),
+        ('overlay', lambda i: draw_overlay(canvases[i % 8], overlays[i])),
+        (f'overlay at {DECIMATE_SCALE:g}x',
+         lambda i: draw_overlay(small_canvases[i % 8], overlays[i])),
+    ]
+    print("\ndrawing only, per drawn frame:")
+    for name, draw in draws:
+        draw(0)
+        start = time.perf_counter()
+        for i in range(args.frames):
+            draw(i)
+        print(f"  {name:24} {(time.perf_counter() - start) / args.frames * 1e6:8.1f} us")
+
+    display = show_window if args.window else no_display
+    print(f"\nper frame ({'window' if args.window else 'no display'}; decimated: 1 in "
+          f"{DECIMATE_EVERY} at {DECIMATE_SCALE:g}x):")
+    print(f"  {'':10} {'frame loop':>12} {'rendering':>12} {'process CPU':>12}")
+    for mode in ('before', 'full', 'decimated', 'off'):
+        loop, rendering, cpu, renderer = run_loop(mode, frame, results, labels, display)
+        note = f"  {renderer.rendered} rendered" if mode == 'decimated' else ""
+        print(f"  {mode:10} {loop * 1e6:9.1f} us {rendering * 1e6:9.1f} us {cpu * 1e6:9.1f} us{note}")
+    if args.window:
+        cv2.destroyAllWindows()
+
+
+if __name__ == "__main__":
+    main()
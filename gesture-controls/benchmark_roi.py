@@ -0,0 +1,195 @@
+"""
+AeroTouch - Region-of-interest benchmark
+Measures hands.process per frame on a video file for ways of shrinking the
+image hand inference sees, each with its own video-mode Hands instance (the
+controller's settings):
+
+- full frame: what the controller does
+- downscaled: the whole frame at half size, so MediaPipe's tracking is kept
+- stable crop: a padded square around the hands, kept fixed while they
+  stay inside its inner part; the graph is reset (palm detection runs
+  again) whenever the crop moves, the hands are lost, or every
+  FULL_FRAME_EVERY frames for a full-frame pass that finds new hands
+
+Reports hands_process p50/p90, the image preparation (color conversion,
+crop, resize) and how many frames had a hand. Without a video file it
+renders one (synthetic_hands.render): no hand, an open hand circling, no
+hand.
+
+Usage:
+    python benchmark_roi.py [video] [--hands 1]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+import synthetic_hands
+from frame_path import FrameBuffers
+from input_sources import FRAME_HEIGHT, FRAME_WIDTH, VideoFileSource
+
+# Stable crop: side relative to the hands' bounding box, smallest side
+# (pixels), inner fraction the hands may move in before it is moved, and the
+# full-frame pass interval (frames)
+CROP_PADDING = 3.0
+CROP_MIN_SIZE = 192
+CROP_INNER = 0.7
+FULL_FRAME_EVERY = 30
+
+# Downscaled: fraction of the frame size
+DOWNSCALE = 0.5
+
+
+def render_video(path, frame_rate=synthetic_hands.FRAME_RATE):
+    """Write a test video: 1 s without a hand, an open hand circling for 4 s, 1 s without."""
+    labels = synthetic_hands.hold(('claw_open', 4.0))
+    poses, _, _ = synthetic_hands.trajectory(labels, path='circle', start=(0.5, 0.78),
+                                             radius=0.06, scale=0.5, noise=0.0)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), frame_rate,
+                             (FRAME_WIDTH, FRAME_HEIGHT))
+    blank = synthetic_hands.render(poses[0])
+    blank[:] = synthetic_hands.BACKGROUND_COLOR
+    for _ in range(round(frame_rate)):
+        writer.write(blank)
+    for pose in poses:
+        writer.write(synthetic_hands.render(pose, (FRAME_HEIGHT, FRAME_WIDTH)))
+    for _ in range(round(frame_rate)):
+        writer.write(blank)
+    writer.release()
+
+
+def open_hands(max_hands):
+    return mp.solutions.hands.Hands(model_complexity=0, min_detection_confidence=0.7,
+                                    min_tracking_confidence=0.7, max_num_hands=max_hands)
+
+
+class FullFrame:
+    name = 'full frame'
+    resets = 0
+
+    def __init__(self):
+        self.buffers = FrameBuffers()
+
+    def prepare(self, frame):
+        return self.buffers.to_rgb(frame)
+
+    def observe(self, hands, results, frame):
+        pass
+
+
+class Downscaled(FullFrame):
+    name = f'downscaled {DOWNSCALE:g}x'
+
+    def __init__(self):
+        super().__init__()
+        self._small = None
+
+    def prepare(self, frame):
+        self._small = cv2.resize(frame, None, dst=self._small, fx=DOWNSCALE, fy=DOWNSCALE,
+                                 interpolation=cv2.INTER_AREA)
+        return self.buffers.to_rgb(self._small)
+
+
+class StableCrop(FullFrame):
+    name = 'stable crop'
+
+    def __init__(self):
+        super().__init__()
+        self.box = None  # (x0, y0, side) in pixels, or None for the full frame
+        self.frames = 0
+
+    def prepare(self, frame):
+        self.frames += 1
+        if self.box is None:
+            return self.buffers.to_rgb(frame)
+        x0, y0, side = self.box
+        return cv2.cvtColor(frame[y0:y0 + side, x0:x0 + side], cv2.COLOR_BGR2RGB)
+
+    def _move(self, hands, box):
+        # The graph tracks in the previous image's coordinates; start over
+        hands.reset()
+        self.resets += 1
+        self.box = box
+
+    def observe(self, hands, results, frame):
+        height, width = frame.shape[:2]
+        if not results.multi_hand_landmarks:
+            if self.box is not None:
+                self._move(hands, None)
+            return
+        points = np.array([(lm.x, lm.y) for hand in results.multi_hand_landmarks
+                           for lm in hand.landmark])
+        if self.box is not None:
+            x0, y0, side = self.box
+            points = points * side + (x0, y0)
+        else:
+            points = points * (width, height)
+        low, high = points.min(axis=0), points.max(axis=0)
+        if self.box is not None:
+            if self.frames % FULL_FRAME_EVERY == 0:
+                self._move(hands, None)  # look for hands outside the crop
+                return
+            x0, y0, side = self.box
+            inset = side * (1 - CROP_INNER) / 2
+            if (low >= (x0 + inset, y0 + inset)).all() and \
+                    (high <= (x0 + side - inset, y0 + side - inset)).all():
+                return
+        side = int(min(max((high - low).max() * CROP_PADDING, CROP_MIN_SIZE), width, height))
+        center = (low + high) / 2
+        x0 = int(min(max(center[0] - side / 2, 0), width - side))
+        y0 = int(min(max(center[1] - side / 2, 0), height - side))
+        self._move(hands, (x0, y0, side))
+
+
+def run(path, strategy, max_hands):
+    """(hands_process ms per frame, preparation ms per frame, frames with a hand)."""
+    source = VideoFileSource(path)
+    buffers = FrameBuffers()
+    process, prepare, found = [], [], 0
+    with open_hands(max_hands) as hands:
+        while source.isOpened():
+            success, frame = buffers.read(source)
+            if not success:
+                break
+            start = time.perf_counter_ns()
+            image = strategy.prepare(frame)
+            prepared = time.perf_counter_ns()
+            results = hands.process(image)
+            process.append((time.perf_counter_ns() - prepared) / 1e6)
+            prepare.append((prepared - start) / 1e6)
+            found += bool(results.multi_hand_landmarks)
+            strategy.observe(hands, results, frame)
+    source.release()
+    return np.array(process), np.array(prepare), found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('video', nargs='?', help="video file (default: a rendered one)")
+    parser.add_argument('--hands', type=int, default=1, help="max_num_hands")
+    args = parser.parse_args()
+
+    path = args.video
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(), 'hand.avi')
+        render_video(path)
+    try:
+        print(f"{path}, max_num_hands={args.hands}")
+        print(f"  {'':16} {'p50':>8} {'p90':>8} {'prepare':>8} {'hand':>9} {'resets':>7}")
+        for strategy in (FullFrame(), Downscaled(), StableCrop()):
+            process, prepare, found = run(path, strategy, args.hands)
+            print(f"  {strategy.name:16} {np.median(process):5.2f} ms {np.percentile(process, 90):5.2f} ms "
+                  f"{np.median(prepare):5.2f} ms {found:4d}/{len(process):<4d} {strategy.resets:7d}")
+    finally:
+        if args.video is None:
+            os.remove(path)
+            os.rmdir(os.path.dirname(path))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+AeroTouch - Startup benchmark
+Measures, each in a fresh interpreter (median of --runs):
+
+- import time of the gesture detectors, of gesture_controller (which loads
+  OpenCV and MediaPipe on first use) and of OpenCV and MediaPipe themselves
+- the first hand inference on a fresh model, with and without warm_up()
+- launch to the first frame (and first hand and gesture, given a video with
+  a hand in it) with the start-up steps run one after another and at the
+  same time (startup.py). Video files open instantly, so opening a camera
+  is simulated by --open-delay seconds.
+
+Usage:
+    python benchmark_startup.py [--runs 3] [--open-delay 0.5]
+    python benchmark_startup.py --video hand.mp4
+"""
+
+# Only the standard library at the top: the children time their own imports
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+IMPORTS = [
+    ('detectors', 'gesture_registry,hand_tracker,cursor_filter'),
+    ('gesture_controller', 'gesture_controller'),
+    ('cv2', 'cv2'),
+    ('mediapipe', 'mediapipe'),
+]
+
+MILESTONES = ['imports', 'output', 'camera', 'model', 'first frame', 'first hand',
+              'first gesture']
+
+
+def child_import(modules):
+    start = time.perf_counter()
+    for module in modules.split(','):
+        __import__(module)
+    return (time.perf_counter() - start) * 1000
+
+
+def child_inference(warm):
+    import gesture_controller as gc
+    from benchmark_idle import synthetic_scene
+    from startup import warm_up
+
+    frame = gc.cv2.cvtColor(synthetic_scene()(11.0), gc.cv2.COLOR_BGR2RGB)
+    hands = gc.load_hands(1) if warm else gc.mp_hands.Hands(
+        model_complexity=0, min_detection_confidence=0.7, min_tracking_confidence=0.7,
+        max_num_hands=1)
+    start = time.perf_counter()
+    hands.process(frame)
+    elapsed = time.perf_counter() - start
+    if not warm:
+        # What warm-up would have cost on top of it
+        start = time.perf_counter()
+        warm_up(gc.mp_hands.Hands(model_complexity=0, max_num_hands=1))
+        print(json.dumps({'first': elapsed * 1000,
+                          'warm_up': (time.perf_counter() - start) * 1000}))
+        return
+    print(json.dumps({'first': elapsed * 1000}))
+
+
+def child_startup(concurrent, video, open_delay):
+    import startup  # first, like gesture_controller, so the launch time is comparable
+    import gesture_controller as gc
+
+    class SlowOpeningVideo(gc.VideoFileSource):
+        """A video that takes as long to open as a camera."""
+
+        def __init__(self, path):
+            time.sleep(open_delay)
+            super().__init__(path)
+
+    gc.VideoFileSource = SlowOpeningVideo
+    args = gc.parse_args(['--video', video, '--headless'])
+    source, hands, backend, _ = gc.start_up(args, concurrent)
+    timer = gc.startup
+    gc.use_backend(backend)
+    gc.tracker = gc.HandTracker(max_hands=1)
+    with hands:
+        gc.run_serial(source, hands, preview=False)
+    backend.close()
+    print(json.dumps(timer.times))
+
+
+def run_child(*args):
+    """Run this script as a child with args; returns its last output line, parsed."""
+    output = subprocess.run([sys.executable, __file__, '--child', *map(str, args)],
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def write_video(path, frames=30):
+    import cv2
+    from benchmark_idle import FRAME_RATE, synthetic_scene
+    from input_sources import FRAME_HEIGHT, FRAME_WIDTH
+
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), FRAME_RATE,
+                             (FRAME_WIDTH, FRAME_HEIGHT))
+    frame_at = synthetic_scene()
+    for i in range(frames):
+        writer.write(frame_at(10.0 + i / FRAME_RATE))
+    writer.release()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--open-delay', type=float, default=0.5,
+                        help="simulated camera open time in seconds")
+    parser.add_argument('--video', metavar='PATH',
+                        help="video to start on (default: a short synthetic one without a hand)")
+    parser.add_argument('--child', nargs='+', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        kind, *rest = args.child
+        if kind == 'import':
+            print(json.dumps(child_import(rest[0])))
+        elif kind == 'inference':
+            child_inference(rest[0] == 'warm')
+        else:
+            child_startup(rest[0] == 'concurrent', rest[1], float(rest[2]))
+        return
+
+    print(f"imports, fresh interpreter (median of {args.runs}):")
+    for label, modules in IMPORTS:
+        times = [run_child('import', modules) for _ in range(args.runs)]
+        print(f"  {label:20} {statistics.median(times):6.0f} ms")
+
+    cold = [run_child('inference', 'cold') for _ in range(args.runs)]
+    warm = [run_child('inference', 'warm') for _ in range(args.runs)]
+    print(f"\nfirst hand inference: {statistics.median(c['first'] for c in cold):.0f} ms cold, "
+          f"{statistics.median(w['first'] for w in warm):.0f} ms after warm-up "
+          f"(warm-up at start-up: {statistics.median(c['warm_up'] for c in cold):.0f} ms)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        video = args.video
+        if video is None:
+            video = os.path.join(tmp, 'start.avi')
+            write_video(video)
+        results = {}
+        for mode in ('sequential', 'concurrent'):
+            runs = [run_child('startup', mode, video, args.open_delay) for _ in range(args.runs)]
+            results[mode] = {name: statistics.median(run[name] for run in runs)
+                             for name in MILESTONES if all(name in run for run in runs)}
+
+    print(f"\nlaunch to milestone in seconds (camera open simulated as {args.open_delay:g} s):")
+    print(f"  {'':14} {'sequential':>10} {'concurrent':>10}")
+    for name in MILESTONES:
+        if name in results['sequential'] and name in results['concurrent']:
+            print(f"  {name:14} {results['sequential'][name]:10.2f} "
+                  f"{results['concurrent'][name]:10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+AeroTouch - Swipe detection benchmark
+Feeds synthetic wrist paths (flicks and swipes in all four directions,
+resting and slowly drifting hands, with landmark noise) through
+SwipeDetector and reports detection rate, direction/kind accuracy and false
+detections, then the per-frame cost for growing ring buffer sizes (it
+should stay flat). Needs no camera or display.
+
+Usage:
+    python benchmark_swipe.py [--trials 200] [--noise 0.003]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from swipe import SwipeDetector
+
+FPS = 30.0
+DIRECTIONS = {'right': (1, 0), 'left': (-1, 0), 'down': (0, 1), 'up': (0, -1)}
+
+# (kind, speed range units/s, duration range s); None = no event expected
+MOTIONS = [
+    ('flick', (1.8, 3.0), (0.12, 0.2)),
+    ('swipe', (0.7, 1.2), (0.3, 0.5)),
+    (None, (0.0, 0.0), (1.0, 1.0)),    # resting hand
+    (None, (0.1, 0.3), (1.0, 1.0)),    # slow drift
+]
+
+
+def wrist_path(rng, speed, duration, direction, noise):
+    """Rest, move at speed for duration along direction, rest; returns (t, x, y)."""
+    rest = int(0.3 * FPS)
+    moving = max(1, int(duration * FPS))
+    steps = np.zeros(rest + moving + rest)
+    steps[rest:rest + moving] = speed / FPS
+    distance = np.cumsum(steps)
+    dx, dy = DIRECTIONS[direction]
+    x = 0.5 - dx * distance[-1] / 2 + dx * distance + rng.normal(0, noise, len(steps))
+    y = 0.5 - dy * distance[-1] / 2 + dy * distance + rng.normal(0, noise, len(steps))
+    t = np.arange(len(steps)) / FPS + rng.normal(0, 0.002, len(steps))
+    return np.sort(t), x, y
+
+
+def run_trials(trials, noise, seed=0):
+    rng = np.random.default_rng(seed)
+    results = {}
+    clock = 0.0
+    detector = SwipeDetector()
+    for kind, speed_range, duration_range in MOTIONS:
+        for direction in DIRECTIONS:
+            detected = correct = extra = 0
+            for _ in range(trials):
+                t, x, y = wrist_path(rng, rng.uniform(*speed_range), rng.uniform(*duration_range),
+                                     direction, noise)
+                detector.clear()
+                clock += 10.0  # well past the cooldown
+                events = [e for e in (detector.update(clock + ti, xi, yi)
+                                      for ti, xi, yi in zip(t, x, y)) if e is not None]
+                if kind is None:
+                    extra += len(events)
+                    continue
+                if events:
+                    detected += 1
+                    correct += events[0].kind == kind and events[0].direction == direction
+                    extra += len(events) - 1
+            results[kind or 'none', direction] = (detected, correct, extra)
+    return results
+
+
+def per_frame_cost(capacity, frames=20000):
+    """Microseconds per update with a window long enough to fill the buffer."""
+    detector = SwipeDetector(capacity=capacity, window=capacity / FPS)
+    rng = np.random.default_rng(capacity)
+    xy = 0.5 + rng.normal(0, 0.002, (frames, 2))
+    start = time.perf_counter()
+    for i in range(frames):
+        detector.update(i / FPS, xy[i, 0], xy[i, 1])
+    return (time.perf_counter() - start) / frames * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--trials', type=int, default=200)
+    parser.add_argument('--noise', type=float, default=0.003,
+                        help="landmark noise std, normalized (default: 0.003)")
+    args = parser.parse_args()
+
+    print(f"{args.trials} trials per motion and direction, noise {args.noise}")
+    print(f"{'motion':8} {'direction':9} {'detected':>9} {'correct':>8} {'extra':>6}")
+    for (kind, direction), (detected, correct, extra) in run_trials(args.trials, args.noise).items():
+        if kind == 'none':
+            print(f"{kind:8} {direction:9} {'-':>9} {'-':>8} {extra:6d}")
+        else:
+            print(f"{kind:8} {direction:9} {detected / args.trials:9.1%} "
+                  f"{correct / args.trials:8.1%} {extra:6d}")
+
+    print("per-frame cost by ring buffer size:")
+    for capacity in (8, 32, 128, 512):
+        print(f"  {capacity:4d} samples: {per_frame_cost(capacity):5.2f} us/frame")
+
+
+if __name__ == "__main__":
+    main()
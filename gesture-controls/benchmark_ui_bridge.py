@@ -0,0 +1,185 @@
+"""
+AeroTouch - Kiosk page bridge benchmark
+Measures the WebSocket bridge (ui_bridge.py) with local clients:
+
+- latency: a hand moving in a circle is replayed at FRAME_RATE through the
+  controller's gesture handling with the bridge as output; reports the time
+  from publishing a message to the page receiving it, and from the start of
+  gesture handling for the frame to the page receiving it
+- stall: two pages stop reading for STALL seconds while cursor positions
+  and clicks keep coming; the page that acknowledges cursor messages (like
+  UI/script.js) comes back to at most MAX_IN_FLIGHT + 1 stale positions, one
+  that does not gets the whole backlog. No click is lost on either.
+
+Usage:
+    python benchmark_ui_bridge.py [--seconds 5] [--stall 2]
+"""
+
+import argparse
+import asyncio
+import math
+import threading
+import time
+
+import numpy as np
+
+import gesture_controller as gc
+from actuation import SyncBackend
+from benchmark_features import OPEN_HAND
+from metrics import metrics
+from ui_bridge import MAX_IN_FLIGHT, BridgeBackend, UiBridge, open_client, read_message, send_ack
+
+FRAME_RATE = 60.0
+
+# Clicks published per second during the stall test
+CLICK_RATE = 2.0
+
+
+class TimedBridge(UiBridge):
+    """UiBridge that remembers when each message was published."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.published = {}  # seq -> (frame start ns, publish ns, message type)
+
+    def cursor(self, x, y):
+        seq = super().cursor(x, y)
+        self.published[seq] = (metrics.frame_ns, time.perf_counter_ns(), 'c')
+        return seq
+
+    def send(self, event):
+        seq = super().send(event)
+        self.published[seq] = (metrics.frame_ns, time.perf_counter_ns(), event['t'])
+        return seq
+
+
+def paced(seconds, fps=FRAME_RATE):
+    """Yield (index, t) at fps in real time for `seconds`."""
+    start = time.perf_counter()
+    for index in range(int(seconds * fps)):
+        delay = start + index / fps - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        yield index, index / fps
+
+
+def replay_gestures(bridge, seconds):
+    """Drive the controller's gesture handling with a circling open hand."""
+    gc.tracker = gc.HandTracker(max_hands=1)
+    gc.ui_bridge = bridge
+    gc.use_backend(SyncBackend(BridgeBackend(bridge)))
+    for _, t in paced(seconds):
+        pose = OPEN_HAND.copy()
+        pose[:, 0] += 0.15 * math.cos(t * 2.0)
+        pose[:, 1] += 0.1 * math.sin(t * 2.0)
+        start = time.perf_counter_ns()
+        metrics.frame_ns = start
+        for hand in gc.tracker.update([pose], timestamp=t):
+            gc.handle_hand(hand, None, gc.FRAME_WIDTH, gc.FRAME_HEIGHT, t)
+        gc.publish_gesture_events()
+
+
+def publish_stream(bridge, seconds):
+    """Publish cursor positions at FRAME_RATE and clicks at CLICK_RATE."""
+    every = int(FRAME_RATE / CLICK_RATE)
+    for index, t in paced(seconds):
+        metrics.frame_ns = time.perf_counter_ns()
+        bridge.cursor(0.5 + 0.3 * math.cos(t), 0.5 + 0.3 * math.sin(t))
+        if index % every == 0:
+            bridge.send({'t': 'click', 'x': 0.5, 'y': 0.5})
+
+
+async def consume(reader, writer, received, ack=True, stall_at=None, stall=0.0):
+    """
+    Read messages until the server closes, logging (receive ns, message).
+    Stops reading for `stall` seconds once stall_at (perf_counter_ns) has
+    passed; returns the time reading resumed.
+    """
+    resumed = None
+    while True:
+        message = await read_message(reader)
+        if message is None:
+            break
+        now = time.perf_counter_ns()
+        received.append((now, message))
+        if ack and message['t'] == 'c':
+            send_ack(writer, message['n'])
+        if stall_at is not None and now >= stall_at:
+            stall_at = None
+            await asyncio.sleep(stall)
+            resumed = time.perf_counter_ns()
+    writer.close()
+    return resumed
+
+
+async def run_with_clients(publish, seconds, clients):
+    """
+    Start a bridge, connect one page per consume() keyword dict in clients,
+    run publish(bridge, seconds) on a thread and collect what each page got.
+    """
+    bridge = TimedBridge(port=0)
+    connections = [await open_client(port=bridge.port) for _ in clients]
+    logs = [[] for _ in clients]
+    readers = [asyncio.create_task(consume(reader, writer, log, **options))
+               for (reader, writer), log, options in zip(connections, logs, clients)]
+    await asyncio.sleep(0.1)  # let the server register the pages
+    thread = threading.Thread(target=publish, args=(bridge, seconds))
+    thread.start()
+    await asyncio.get_running_loop().run_in_executor(None, thread.join)
+    await asyncio.sleep(0.1)  # deliver what is still pending
+    summary = bridge.format()
+    await asyncio.get_running_loop().run_in_executor(None, bridge.close)
+    resumed = await asyncio.gather(*readers)
+    return bridge, logs, resumed, summary
+
+
+def latency(seconds):
+    bridge, (log,), _, summary = asyncio.run(run_with_clients(replay_gestures, seconds, [{}]))
+    deliver, end_to_end, kinds = [], [], {}
+    for received_ns, message in log:
+        frame_ns, published_ns, _ = bridge.published[message['n']]
+        deliver.append((received_ns - published_ns) / 1000)
+        end_to_end.append((received_ns - frame_ns) / 1000)
+        kinds[message['t']] = kinds.get(message['t'], 0) + 1
+    print(f"latency, {seconds:g} s of cursor movement at {FRAME_RATE:g} fps:")
+    print(f"  received: {', '.join(f'{count} {kind}' for kind, count in sorted(kinds.items()))}")
+    for label, values in (('publish to page', deliver), ('gesture handling to page', end_to_end)):
+        p50, p99 = np.percentile(values, [50, 99])
+        print(f"  {label:25} p50 {p50:6.0f} us  p99 {p99:6.0f} us  max {max(values):6.0f} us")
+    print(f"  {summary}")
+
+
+def stall(seconds, stall_seconds):
+    stall_at = time.perf_counter_ns() + int((seconds - stall_seconds) / 2 * 1e9)
+    pages = [{'ack': True, 'stall_at': stall_at, 'stall': stall_seconds},
+             {'ack': False, 'stall_at': stall_at, 'stall': stall_seconds}]
+    bridge, logs, resumed, summary = asyncio.run(run_with_clients(publish_stream, seconds, pages))
+    print(f"\nstall, pages stop reading for {stall_seconds:g} s of a {seconds:g} s stream "
+          f"({FRAME_RATE:g} positions/s, {CLICK_RATE:g} clicks/s):")
+    print(f"  {'page':18} {'cursors':>8} {'clicks':>7} {'stale after resume':>19}")
+    for options, log, resumed_ns in zip(pages, logs, resumed):
+        cursors = [(t, m) for t, m in log if m['t'] == 'c']
+        clicks = sum(1 for _, m in log if m['t'] == 'click')
+        # Positions read after resuming that were published before it
+        stale = [bridge.published[m['n']][1] for t, m in cursors
+                 if t >= resumed_ns and bridge.published[m['n']][1] < resumed_ns]
+        label = 'acknowledging' if options['ack'] else 'not acknowledging'
+        print(f"  {label:18} {len(cursors):8d} {clicks:7d} {len(stale):19d}")
+    kinds = [kind for _, _, kind in bridge.published.values()]
+    print(f"  published: {kinds.count('c')} cursors, {kinds.count('click')} clicks; "
+          f"at most {MAX_IN_FLIGHT} unacknowledged cursors per page")
+    print(f"  {summary}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--stall', type=float, default=2.0)
+    args = parser.parse_args()
+
+    latency(args.seconds)
+    stall(args.seconds, args.stall)
+
+
+if __name__ == "__main__":
+    main()
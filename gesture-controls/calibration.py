@@ -0,0 +1,157 @@
+"""
+AeroTouch - Per-user calibration
+The registry thresholds and the cursor sensitivity are absolute distances
+in the camera image, right for one hand size at one distance. A kid far
+from the camera shows a hand half that size, an adult up close one half as
+big again. HandCalibration learns each tracked hand's size and habits while
+it is used and corrects for them:
+
+- the hand scale: a running average of the palm size (wrist to middle
+  finger knuckle), which every length feature is divided by before the
+  registry sees it, so the thresholds apply at the reference palm size
+- the resting spread: running mean and variance of the fingertip cluster
+  radius (in palm sizes) while the hand is open and straight, which scales
+  the cluster radius feature so narrow- and wide-spreading hands look
+  alike once the statistics are steady
+- the cursor gain: a smaller hand in the image moves less for the same arm
+  movement, so the cursor moves more per image unit
+
+Each frame costs a few scalar updates and one multiply of the feature
+vector. Every new track starts with fresh statistics, and a palm size far
+off the learned one for a while (another user stepping in without the
+track being lost) starts them over too.
+"""
+
+import math
+
+import numpy as np
+
+import landmark_features as lf
+
+# Palm size (normalized image units) the registry thresholds and
+# CURSOR_SENSITIVITY were tuned for (the open hand of benchmark_features,
+# synthetic_hands at scale 1)
+REFERENCE_PALM = 0.21
+
+# Fingertip cluster radius, in palm sizes, of an open spread hand at which
+# the thresholds work (the claw-open pose of synthetic_hands)
+REFERENCE_SPREAD = 0.69
+
+# Frames the palm size and resting spread are averaged over (the first
+# frames are averaged equally, so the estimates settle quickly)
+SCALE_WINDOW = 30
+SPREAD_WINDOW = 90
+
+# Resting frames before the spread correction applies, and the largest
+# relative spread (standard deviation / mean) it applies at
+MIN_SPREAD_FRAMES = 15
+MAX_SPREAD_VARIATION = 0.25
+
+# A hand counts as resting when all four fingers are extended and the
+# middle fingertip is this far from the wrist (palm sizes)
+RESTING_REACH = 1.7
+
+# Limits of the corrections (factors applied to features and cursor)
+MIN_SCALE, MAX_SCALE = 0.4, 3.0
+MIN_SPREAD_CORRECTION, MAX_SPREAD_CORRECTION = 0.75, 1.33
+
+# A palm size this many times larger or smaller than the learned one for
+# RESET_FRAMES frames in a row means another user; start over
+RESET_RATIO = 1.5
+RESET_FRAMES = 10
+
+# Features that are lengths (scaled with the hand); the rest are flags
+_LENGTHS = np.array([not name.endswith('_extended') for name in lf.FEATURE_NAMES],
+                    dtype=np.float32)
+_FLAGS = 1.0 - _LENGTHS
+_EXTENDED = np.array([lf.FEATURE_INDEX[f'{name}_extended'] for name in lf.TIP_NAMES[1:]])
+_CLUSTER_RADIUS = lf.FEATURE_INDEX['cluster_radius']
+_WRIST_MIDDLE = lf.FEATURE_INDEX['wrist_middle']
+
+
+def palm_size(landmarks):
+    """Distance from the wrist to the middle finger knuckle in the image plane."""
+    return math.hypot(float(landmarks[lf.MIDDLE_MCP, 0] - landmarks[lf.WRIST, 0]),
+                      float(landmarks[lf.MIDDLE_MCP, 1] - landmarks[lf.WRIST, 1]))
+
+
+class HandCalibration:
+    """Running hand scale and resting spread of one tracked hand."""
+
+    def __init__(self):
+        self.factors = np.ones(lf.NUM_FEATURES, dtype=np.float32)
+        self.resets = 0
+        self.reset()
+
+    def reset(self):
+        """Forget the current user."""
+        self.frames = 0
+        self.palm = REFERENCE_PALM
+        self.spread_frames = 0
+        self.spread = REFERENCE_SPREAD
+        self.spread_variance = 0.0
+        self._off_frames = 0
+        self.factors.fill(1.0)
+
+    @property
+    def scale(self):
+        """Reference palm size over the learned one (how much the features are stretched)."""
+        return min(MAX_SCALE, max(MIN_SCALE, REFERENCE_PALM / self.palm))
+
+    @property
+    def cursor_gain(self):
+        """Factor for the cursor sensitivity."""
+        return self.scale
+
+    @property
+    def spread_correction(self):
+        """Factor for the cluster radius on top of the scale (1 until the spread is steady)."""
+        if self.spread_frames < MIN_SPREAD_FRAMES:
+            return 1.0
+        if math.sqrt(self.spread_variance) > MAX_SPREAD_VARIATION * self.spread:
+            return 1.0
+        return min(MAX_SPREAD_CORRECTION, max(MIN_SPREAD_CORRECTION, REFERENCE_SPREAD / self.spread))
+
+    def update(self, landmarks, features):
+        """Learn from one frame of the hand: its landmarks and raw features."""
+        palm = palm_size(landmarks)
+        if palm <= 0.0:
+            return
+        if self.frames >= SCALE_WINDOW and not 1 / RESET_RATIO < palm / self.palm < RESET_RATIO:
+            self._off_frames += 1
+            if self._off_frames >= RESET_FRAMES:
+                self.resets += 1
+                self.reset()
+        else:
+            self._off_frames = 0
+
+        self.frames += 1
+        self.palm += (palm - self.palm) / min(self.frames, SCALE_WINDOW)
+
+        if features[_WRIST_MIDDLE] > RESTING_REACH * palm and features[_EXTENDED].min() > 0.5:
+            # Exponentially weighted mean and variance
+            spread = float(features[_CLUSTER_RADIUS]) / palm
+            self.spread_frames += 1
+            if self.spread_frames == 1:
+                self.spread = spread
+            else:
+                weight = 1.0 / min(self.spread_frames, SPREAD_WINDOW)
+                difference = spread - self.spread
+                self.spread += weight * difference
+                self.spread_variance = (1 - weight) * (self.spread_variance
+                                                       + weight * difference * difference)
+
+        scale = self.scale
+        np.multiply(_LENGTHS, scale, out=self.factors)
+        self.factors += _FLAGS
+        self.factors[_CLUSTER_RADIUS] = scale * self.spread_correction
+
+    def normalize(self, features, out=None):
+        """Features as if the hand were the reference size (in place with out=features)."""
+        return np.multiply(features, self.factors, out=out)
+
+    def format(self):
+        return (f"palm {self.palm:.3f} (scale {self.scale:.2f}), resting spread "
+                f"{self.spread:.2f} +/- {math.sqrt(self.spread_variance):.2f} over "
+                f"{self.spread_frames} frames (correction {self.spread_correction:.2f}), "
+                f"{self.resets} resets")
@@ -0,0 +1,176 @@
+"""
+AeroTouch - Cursor filters
+Smooths (and optionally predicts) the tracked hand position before it is
+turned into cursor movement.
+
+- none: raw landmark positions
+- one-euro: adaptive low-pass filter; strong smoothing at rest, little lag
+  when the hand moves fast (Casiez et al., "1 Euro Filter", CHI 2012)
+- kalman: constant-velocity Kalman filter that extrapolates the position
+  forward by the measured capture-to-actuation latency
+
+All state for one hand lives in a HandCursor object.
+"""
+
+import math
+
+# One Euro parameters (positions are normalized image coordinates)
+ONE_EURO_MIN_CUTOFF = 1.0  # Hz, smoothing at rest (lower = smoother)
+ONE_EURO_BETA = 10.0       # speed coefficient (higher = less lag when moving)
+ONE_EURO_D_CUTOFF = 1.0    # Hz, smoothing of the speed estimate
+
+# Kalman parameters
+KALMAN_MEASUREMENT_STD = 0.006   # landmark jitter, normalized units
+KALMAN_ACCELERATION_STD = 3.0    # expected hand acceleration, units/s^2
+
+# Never extrapolate further than this (seconds)
+MAX_PREDICTION = 0.1
+
+# Prediction is scaled down below this hand speed (units/s) so that a
+# resting hand's noisy velocity estimate does not shake the cursor
+PREDICTION_FULL_SPEED = 0.5
+
+# Frame interval assumed for the first update after a reset (seconds)
+DEFAULT_DT = 1 / 30
+
+FILTERS = ('none', 'one-euro', 'kalman')
+
+
+def _smoothing_factor(dt, cutoff):
+    tau = 1.0 / (2 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+
+class OneEuroAxis:
+    """One Euro filter for a single coordinate."""
+
+    __slots__ = ('min_cutoff', 'beta', 'd_cutoff', 'value', 'speed')
+
+    def __init__(self, min_cutoff=ONE_EURO_MIN_CUTOFF, beta=ONE_EURO_BETA,
+                 d_cutoff=ONE_EURO_D_CUTOFF):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.value = None
+        self.speed = 0.0
+
+    def update(self, x, dt):
+        if self.value is None:
+            self.value = x
+            self.speed = 0.0
+            return x
+        a_d = _smoothing_factor(dt, self.d_cutoff)
+        self.speed += a_d * ((x - self.value) / dt - self.speed)
+        cutoff = self.min_cutoff + self.beta * abs(self.speed)
+        self.value += _smoothing_factor(dt, cutoff) * (x - self.value)
+        return self.value
+
+
+class KalmanAxis:
+    """Constant-velocity Kalman filter for a single coordinate."""
+
+    __slots__ = ('r', 'q', 'x', 'v', 'p00', 'p01', 'p11')
+
+    def __init__(self, measurement_std=KALMAN_MEASUREMENT_STD,
+                 acceleration_std=KALMAN_ACCELERATION_STD):
+        self.r = measurement_std ** 2
+        self.q = acceleration_std ** 2
+        self.x = None
+        self.v = 0.0
+        self.p00 = self.p01 = self.p11 = 0.0
+
+    def update(self, z, dt):
+        if self.x is None:
+            self.x, self.v = z, 0.0
+            self.p00, self.p01, self.p11 = self.r, 0.0, 1.0
+            return z
+
+        # Predict (white-noise acceleration model)
+        q = self.q
+        x = self.x + self.v * dt
+        p00 = self.p00 + dt * (2 * self.p01 + dt * self.p11) + q * dt ** 4 / 4
+        p01 = self.p01 + dt * self.p11 + q * dt ** 3 / 2
+        p11 = self.p11 + q * dt ** 2
+
+        # Correct with the measured position
+        s = p00 + self.r
+        k0, k1 = p00 / s, p01 / s
+        residual = z - x
+        self.x = x + k0 * residual
+        self.v += k1 * residual
+        self.p00 = (1 - k0) * p00
+        self.p01 = (1 - k0) * p01
+        self.p11 = p11 - k1 * p01
+        return self.x
+
+
+class CursorFilter:
+    """Filters a 2D hand position; kalman also predicts ahead by the latency."""
+
+    __slots__ = ('kind', 'axes', 'last_time')
+
+    def __init__(self, kind='one-euro'):
+        if kind not in FILTERS:
+            raise ValueError(f"Unknown cursor filter '{kind}' (choose from {', '.join(FILTERS)})")
+        self.kind = kind
+        self.axes = None
+        self.last_time = None
+        self.reset()
+
+    def reset(self):
+        if self.kind == 'one-euro':
+            self.axes = (OneEuroAxis(), OneEuroAxis())
+        elif self.kind == 'kalman':
+            self.axes = (KalmanAxis(), KalmanAxis())
+        self.last_time = None
+
+    def update(self, t, x, y, latency=0.0):
+        """Feed the position measured at time t; return the position to use now."""
+        if self.kind == 'none':
+            return x, y
+
+        dt = DEFAULT_DT if self.last_time is None else t - self.last_time
+        if dt <= 0:
+            dt = DEFAULT_DT
+        self.last_time = t
+
+        ax, ay = self.axes
+        fx = ax.update(x, dt)
+        fy = ay.update(y, dt)
+        if self.kind == 'kalman':
+            lead = min(max(latency, 0.0), MAX_PREDICTION)
+            lead *= min(1.0, math.hypot(ax.v, ay.v) / PREDICTION_FULL_SPEED)
+            fx += ax.v * lead
+            fy += ay.v * lead
+        return fx, fy
+
+
+class HandCursor:
+    """Cursor tracking state of one hand (relative movement anchor + filter)."""
+
+    __slots__ = ('filter', 'active', 'prev_x', 'prev_y')
+
+    def __init__(self, kind='one-euro'):
+        self.filter = CursorFilter(kind)
+        self.active = False
+        self.prev_x = self.prev_y = 0.0
+
+    def reset(self):
+        """Forget the anchor, e.g. when the hand leaves the move gesture."""
+        self.active = False
+
+    def move(self, t, x, y, latency=0.0):
+        """
+        Feed the hand position; return the (dx, dy) to move by in normalized
+        units, or None on the first frame after a reset.
+        """
+        if not self.active:
+            self.filter.reset()
+        fx, fy = self.filter.update(t, x, y, latency)
+        if not self.active:
+            self.active = True
+            self.prev_x, self.prev_y = fx, fy
+            return None
+        dx, dy = fx - self.prev_x, fy - self.prev_y
+        self.prev_x, self.prev_y = fx, fy
+        return dx, dy
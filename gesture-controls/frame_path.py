@@ -0,0 +1,69 @@
+"""
+AeroTouch - Zero-copy frame path
+Reusable buffers for moving camera frames into hand inference and the
+preview without allocating new full-frame images on every iteration.
+
+Instead of flipping every camera frame for the mirror effect, hand inference
+runs on the unflipped frame and the landmarks are mirrored afterwards
+(x -> 1 - x, handedness swapped). The pixels are only flipped when a preview
+is actually rendered, and the preview is drawn on the original BGR data, so
+the RGB -> BGR conversion is gone entirely.
+"""
+
+from startup import lazy_import
+
+cv2 = lazy_import('cv2')  # loaded on first use
+
+# MediaPipe reports handedness for a mirrored (selfie) image
+_MIRRORED_HANDEDNESS = {'Left': 'Right', 'Right': 'Left'}
+
+
+def mirror_results(results):
+    """Mirror hand landmarks (and handedness) of unflipped-frame results in place."""
+    if results.multi_hand_landmarks:
+        for hand_landmarks in results.multi_hand_landmarks:
+            for lm in hand_landmarks.landmark:
+                lm.x = 1.0 - lm.x
+    if results.multi_handedness:
+        for handedness in results.multi_handedness:
+            for classification in handedness.classification:
+                classification.label = _MIRRORED_HANDEDNESS.get(
+                    classification.label, classification.label)
+    return results
+
+
+def _reuse(buffer, shape, dtype):
+    """Return buffer if it matches shape/dtype, else None so OpenCV allocates one."""
+    if buffer is not None and buffer.shape == shape and buffer.dtype == dtype:
+        return buffer
+    return None
+
+
+class FrameBuffers:
+    """Capture, RGB and preview buffers reused across frames of one thread."""
+
+    def __init__(self):
+        self.capture = None
+        self.rgb = None
+        self.preview = None
+
+    def read(self, cap):
+        """Read the next frame into the reusable capture buffer."""
+        success, frame = cap.read(self.capture)
+        if success:
+            self.capture = frame
+        return success, frame
+
+    def to_rgb(self, frame):
+        """Convert a BGR frame into the reusable RGB buffer (marked read-only)."""
+        rgb = _reuse(self.rgb, frame.shape, frame.dtype)
+        if rgb is not None:
+            rgb.flags.writeable = True
+        self.rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=rgb)
+        self.rgb.flags.writeable = False
+        return self.rgb
+
+    def mirrored(self, frame):
+        """Flip a BGR frame into the reusable preview buffer for display."""
+        self.preview = cv2.flip(frame, 1, dst=_reuse(self.preview, frame.shape, frame.dtype))
+        return self.preview
@@ -0,0 +1,297 @@
+"""
+AeroTouch - Learned gesture classifier
+An optional, NumPy-only alternative to the rule thresholds of
+gesture_registry: a small MLP (one hidden ReLU layer) or a nearest-centroid
+model over normalized landmarks, trained with train_classifier.py.
+
+Landmarks are made relative to the wrist and divided by the palm size
+(wrist to middle finger knuckle), so the model does not care how far the
+hand is from the camera or where it is in the frame, and left hands are
+mirrored into right hands. The orientation is kept: pointing up and
+pointing down differ only in it.
+
+Models are stored compactly, like the landmark traces: 8-byte magic, 4-byte
+header length, JSON header (classes, array names and shapes), then the
+arrays as float16, a few KB in all. The wrist offset and mirroring are
+folded into the model's first layer when it is loaded, so inference is two
+small matmuls and a few scalar operations per hand, batched or not.
+
+The classifier plugs into the gesture state machines through score(): the
+probability p of each gesture it was trained on becomes the score p - 0.5
+(so at most one of them is positive), and every other gesture (e.g. the
+open hand swipe precondition) keeps its rule score.
+"""
+
+import json
+import math
+
+import numpy as np
+
+import landmark_features as lf
+
+MAGIC = b'AEMODEL1'
+FORMAT_VERSION = 1
+
+# Class of hands doing none of the gestures
+NONE_CLASS = 'none'
+
+MODEL_KINDS = ('mlp', 'centroid')
+
+# Training defaults
+HIDDEN = 32
+EPOCHS = 40
+BATCH = 256
+LEARNING_RATE = 0.01
+# Augmentation: rotation (degrees) and noise (palm sizes) added to training copies
+AUGMENT_ROTATION = 10.0
+AUGMENT_NOISE = 0.03
+
+# Length of the input vector: x, y, z of every landmark but the wrist
+NUM_INPUTS = (lf.NUM_LANDMARKS - 1) * 3
+
+
+def _relative_map():
+    """(63, 60) matrix: flattened landmarks -> wrist-relative landmarks."""
+    matrix = np.zeros((lf.NUM_LANDMARKS * 3, NUM_INPUTS), dtype=np.float32)
+    for i in range(NUM_INPUTS):
+        matrix[3 + i, i] = 1.0
+        matrix[i % 3, i] = -1.0
+    return matrix
+
+
+_RELATIVE_MAP = _relative_map()
+# Input signs of a mirrored hand
+_MIRROR = np.tile(np.array([-1.0, 1.0, 1.0], dtype=np.float32), lf.NUM_LANDMARKS - 1)
+# Inputs normalize() needs: x, y of the index, middle and pinky knuckles
+_PALM_INPUTS = [3 * (landmark - 1) + axis for landmark in (lf.INDEX_MCP, lf.MIDDLE_MCP,
+                                                          lf.PINKY_MCP) for axis in (0, 1)]
+
+
+def normalize(landmarks):
+    """
+    (N, 60) float32 model inputs for a batch (N, 21, 3) of hands, or (60,)
+    for one hand: wrist-relative landmarks divided by the palm size, with
+    left hands mirrored.
+    """
+    landmarks = np.asarray(landmarks, dtype=np.float32)
+    relative = landmarks[..., 1:, :] - landmarks[..., :1, :]
+    index = relative[..., lf.INDEX_MCP - 1, :]
+    middle = relative[..., lf.MIDDLE_MCP - 1, :]
+    pinky = relative[..., lf.PINKY_MCP - 1, :]
+    palm = np.hypot(middle[..., 0], middle[..., 1])
+    # The knuckles turn the other way around the wrist in a mirrored hand,
+    # however the hand is rotated
+    turn = index[..., 0] * pinky[..., 1] - index[..., 1] * pinky[..., 0]
+    relative /= np.maximum(palm, 1e-6)[..., None, None]
+    relative[..., 0] *= np.where(turn < 0, -1.0, 1.0)[..., None].astype(np.float32)
+    return relative.reshape(landmarks.shape[:-2] + (NUM_INPUTS,))
+
+
+def _softmax(logits):
+    logits = logits - logits.max(axis=-1, keepdims=True)
+    np.exp(logits, out=logits)
+    logits /= logits.sum(axis=-1, keepdims=True)
+    return logits
+
+
+class GestureClassifier:
+    """
+    A trained model: kind ('mlp' or 'centroid'), class names (NONE_CLASS
+    for no gesture) and its arrays by name, scoring into the columns of the
+    gesture names it is used with (the registry's by default).
+    """
+
+    def __init__(self, kind, classes, arrays, names=None):
+        if kind not in MODEL_KINDS:
+            raise ValueError(f"Unknown classifier kind '{kind}'")
+        self.kind = kind
+        self.classes = list(classes)
+        self.arrays = {name: np.asarray(array, dtype=np.float32) for name, array in arrays.items()}
+        if names is None:
+            from gesture_registry import registry
+            names = registry.names
+        self.names = list(names)
+        # Columns of the scores the model replaces, and the classes that fill them
+        pairs = [(self.names.index(name), i) for i, name in enumerate(self.classes)
+                 if name in self.names]
+        self._columns = np.array([column for column, _ in pairs], dtype=np.intp)
+        self._classes = np.array([i for _, i in pairs], dtype=np.intp)
+        # One matmul from the raw landmarks to the model's first projection of
+        # the normalized hand (the MLP's first layer, the centroid model's
+        # input scaling), for the hand as it is and mirrored, plus the
+        # knuckles normalize() needs
+        if kind == 'mlp':
+            projection = self.arrays['w1']
+        else:
+            projection = np.diag(self.arrays['scale'])
+        self._size = projection.shape[1]
+        self._first = np.concatenate((_RELATIVE_MAP @ projection,
+                                      _RELATIVE_MAP @ (projection * _MIRROR[:, None]),
+                                      _RELATIVE_MAP[:, _PALM_INPUTS]), axis=1)
+
+    def _project(self, landmarks):
+        """First projection of normalize(landmarks), (N, size) or (size,)."""
+        landmarks = np.asarray(landmarks, dtype=np.float32)
+        lin = np.dot(landmarks.reshape(landmarks.shape[:-2] + (lf.NUM_LANDMARKS * 3,)),
+                     self._first)
+        size = self._size
+        if lin.ndim == 1:
+            # One hand: plain floats are cheaper than 0-d arrays
+            ix, iy, mx, my, px, py = lin[2 * size:].tolist()
+            projected = lin[size:2 * size] if ix * py - iy * px < 0 else lin[:size]
+            return projected * np.float32(1.0 / max(math.hypot(mx, my), 1e-6))
+        ix, iy, mx, my, px, py = np.moveaxis(lin[:, 2 * size:], -1, 0)
+        mirrored = (ix * py - iy * px < 0)[:, None]
+        projected = np.where(mirrored, lin[:, size:2 * size], lin[:, :size])
+        projected /= np.maximum(np.hypot(mx, my), 1e-6)[:, None]
+        return projected
+
+    def logits(self, landmarks):
+        a = self.arrays
+        x = self._project(landmarks)
+        if self.kind == 'mlp':
+            x += a['b1']
+            np.maximum(x, 0, out=x)
+            out = np.dot(x, a['w2'])
+            out += a['b2']
+            return out
+        # Squared distances to the centroids in scaled inputs, as -|x - c|^2 / 2 var
+        out = np.dot(x, a['centroids'].T)
+        out *= 2
+        out -= a['norms']
+        out -= np.einsum('...i,...i->...', x, x)[..., None]
+        out *= a['gain']
+        return out
+
+    def probabilities(self, landmarks):
+        """Class probabilities (N, classes) for a batch of hands, or (classes,) for one."""
+        return _softmax(self.logits(landmarks))
+
+    def predict(self, landmarks):
+        """Index of the most likely class per hand (an int for one hand)."""
+        return self.logits(landmarks).argmax(axis=-1)
+
+    def score(self, landmarks, rule_scores):
+        """
+        Gesture scores for one hand (or a batch) like GestureRegistry.score:
+        p - 0.5 for the model's gestures, rule_scores for the rest.
+        """
+        scores = np.array(rule_scores, dtype=np.float32)
+        scores[..., self._columns] = self.probabilities(landmarks)[..., self._classes] - 0.5
+        return scores
+
+    def save(self, path):
+        meta = {'version': FORMAT_VERSION, 'kind': self.kind, 'classes': self.classes,
+                'arrays': [[name, list(array.shape)] for name, array in self.arrays.items()]}
+        body = json.dumps(meta, sort_keys=True).encode('utf-8')
+        with open(path, 'wb') as f:
+            f.write(MAGIC + len(body).to_bytes(4, 'little') + body)
+            for array in self.arrays.values():
+                f.write(array.astype('<f2').tobytes())
+
+
+def load_classifier(path, names=None):
+    """Read a model written by GestureClassifier.save()."""
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError("Not an AeroTouch gesture model")
+        length = int.from_bytes(f.read(4), 'little')
+        meta = json.loads(f.read(length).decode('utf-8'))
+        if meta.get('version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported model version: {meta.get('version')}")
+        data = np.frombuffer(f.read(), dtype='<f2')
+    arrays, offset = {}, 0
+    for name, shape in meta['arrays']:
+        size = int(np.prod(shape))
+        arrays[name] = data[offset:offset + size].reshape(shape)
+        offset += size
+    return GestureClassifier(meta['kind'], meta['classes'], arrays, names)
+
+
+def augment(inputs, copies, rng, rotation=AUGMENT_ROTATION, noise=AUGMENT_NOISE):
+    """copies of normalized inputs (N, 60), each rotated in the image plane and noised."""
+    points = np.tile(inputs, (copies, 1)).reshape(-1, lf.NUM_LANDMARKS - 1, 3)
+    angles = np.radians(rng.uniform(-rotation, rotation, len(points)))
+    cos, sin = np.cos(angles)[:, None], np.sin(angles)[:, None]
+    x, y = points[..., 0].copy(), points[..., 1].copy()
+    points[..., 0] = cos * x - sin * y
+    points[..., 1] = sin * x + cos * y
+    points += rng.normal(0.0, noise, points.shape)
+    return points.reshape(-1, NUM_INPUTS).astype(np.float32)
+
+
+def train_centroid(landmarks, labels, classes, names=None):
+    """Nearest-centroid model: one centroid per class, inputs scaled to unit spread."""
+    x = normalize(landmarks)
+    labels = np.asarray(labels)
+    scale = 1.0 / np.maximum(x.std(axis=0), 1e-3)
+    x = x * scale
+    counts = np.bincount(labels, minlength=len(classes))
+    centroids = np.zeros((len(classes), NUM_INPUTS), dtype=np.float32)
+    for i in np.flatnonzero(counts):
+        centroids[i] = x[labels == i].mean(axis=0)
+    variance = np.mean(np.sum((x - centroids[labels]) ** 2, axis=1))
+    # Classes without examples are put out of reach (float16 still holds it)
+    norms = np.where(counts > 0, np.sum(centroids ** 2, axis=1), 6e4)
+    arrays = {'scale': scale, 'centroids': centroids, 'norms': norms,
+              'gain': np.array([0.5 / variance])}
+    return GestureClassifier('centroid', classes, arrays, names)
+
+
+def train_mlp(landmarks, labels, classes, hidden=HIDDEN, epochs=EPOCHS, copies=4, seed=0,
+              names=None, log=None):
+    """
+    Train an MLP with a hidden ReLU layer by minibatch Adam on the
+    cross-entropy, on copies augmented copies of the data; log(epoch, loss)
+    is called after each epoch when given.
+    """
+    rng = np.random.default_rng(seed)
+    x = augment(normalize(landmarks), copies, rng)
+    y = np.tile(np.asarray(labels), copies)
+    mean, std = x.mean(axis=0), np.maximum(x.std(axis=0), 1e-3)
+    x = (x - mean) / std
+    count = len(classes)
+
+    params = [rng.normal(0.0, np.sqrt(2.0 / NUM_INPUTS), (NUM_INPUTS, hidden)),
+              np.zeros(hidden), rng.normal(0.0, np.sqrt(1.0 / hidden), (hidden, count)),
+              np.zeros(count)]
+    params = [p.astype(np.float32) for p in params]
+    moments = [np.zeros_like(p) for p in params]
+    squares = [np.zeros_like(p) for p in params]
+    beta1, beta2, step = 0.9, 0.999, 0
+    for epoch in range(epochs):
+        order = rng.permutation(len(x))
+        total = 0.0
+        for start in range(0, len(x), BATCH):
+            rows = order[start:start + BATCH]
+            xb, yb = x[rows], y[rows]
+            w1, b1, w2, b2 = params
+            hidden_in = xb @ w1 + b1
+            hidden_out = np.maximum(hidden_in, 0)
+            probs = _softmax(hidden_out @ w2 + b2)
+            total += -np.log(probs[np.arange(len(rows)), yb] + 1e-9).sum()
+            # Backward pass of the mean cross-entropy
+            d_out = probs
+            d_out[np.arange(len(rows)), yb] -= 1
+            d_out /= len(rows)
+            d_hidden = (d_out @ w2.T) * (hidden_in > 0)
+            grads = [xb.T @ d_hidden, d_hidden.sum(axis=0), hidden_out.T @ d_out, d_out.sum(axis=0)]
+            step += 1
+            rate = LEARNING_RATE * np.sqrt(1 - beta2 ** step) / (1 - beta1 ** step)
+            for p, g, m, v in zip(params, grads, moments, squares):
+                m *= beta1
+                m += (1 - beta1) * g
+                v *= beta2
+                v += (1 - beta2) * g * g
+                p -= rate * m / (np.sqrt(v) + 1e-8)
+        if log is not None:
+            log(epoch, total / len(x))
+
+    # Fold the input standardization into the first layer
+    w1, b1, w2, b2 = params
+    w1 = w1 / std[:, None]
+    b1 = b1 - mean @ w1
+    return GestureClassifier('mlp', classes, {'w1': w1, 'b1': b1, 'w2': w2, 'b2': b2}, names)
+
+
+TRAINERS = {'mlp': train_mlp, 'centroid': train_centroid}
@@ -7,66 +7,156 @@ Gestures:
 - Closed Fist: Click
 - Point Up (index finger up): Scroll up
 - Point Down (index finger down): Scroll down
+- Flat open hand, flicked up/down: Page up/down
+- Flat open hand, swiped up/down: Scroll up/down a long way
+- Flat open hand, swiped or flicked left/right: Previous/next menu category
 """
 
-import cv2
-import mediapipe as mp
-import pyautogui
-import numpy as np
+import argparse
 import time
 
-# Disable PyAutoGUI fail-safe (optional, but be careful)
-pyautogui.FAILSAFE = True
-pyautogui.PAUSE = 0.01
+from startup import Startup, lazy_import, warm_up  # first: marks the launch time
+
+import numpy as np
+
+import landmark_features as lf
+from actuation import AsyncBackend, RecordingBackend, SyncBackend, make_backend
+from cursor_filter import FILTERS
+from frame_path import FrameBuffers
+from gesture_classifier import load_classifier
+from gesture_registry import registry
+from gesture_states import WINDOW as GESTURE_WINDOW
+from hand_tracker import CURSOR_POLICIES, MAX_HANDS, HandTracker
+from idle import IDLE_AFTER, IDLE_FPS, IdleScheduler
+from metrics import METRICS_PORT, MetricsLogger, metrics, serve_metrics
+from multi_camera import CameraPool, make_stations
+from input_sources import (
+    FRAME_HEIGHT, FRAME_WIDTH, CameraSource, LandmarkTraceSource, VideoFileSource,
+)
+from pipeline import REPORT_INTERVAL, StageStats, detect_hands, run_pipelined
+from preview import (
+    DECIMATE_EVERY, DECIMATE_SCALE, PREVIEW_MODES, PREVIEW_WINDOW, Overlay, PreviewRenderer,
+)
+from trace_recorder import TraceRecorder
+from ui_bridge import UI_PORT, BridgeBackend, UiBridge
+
+# OpenCV and MediaPipe load on first use, so the detectors import without them
+cv2 = lazy_import('cv2')
+mp = lazy_import('mediapipe')
+
+# MediaPipe solutions available as module attributes (mp_hands etc.)
+_MEDIAPIPE_SOLUTIONS = {
+    'mp_hands': 'hands',
+    'mp_drawing': 'drawing_utils',
+    'mp_drawing_styles': 'drawing_styles',
+}
+
 
-# Initialize MediaPipe Hands
-mp_hands = mp.solutions.hands
-mp_drawing = mp.solutions.drawing_utils
-mp_drawing_styles = mp.solutions.drawing_styles
+def __getattr__(name):
+    if name in _MEDIAPIPE_SOLUTIONS:
+        return getattr(mp.solutions, _MEDIAPIPE_SOLUTIONS[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# Screen dimensions
-SCREEN_WIDTH, SCREEN_HEIGHT = pyautogui.size()
 
-# Smoothing factor for cursor movement
-SMOOTHING = 3
-prev_hand_x, prev_hand_y = None, None
-is_palm_open = False  # Track if palm was open in previous frame
+# Mouse output backend and screen dimensions (set by use_backend())
+backend = None
+SCREEN_WIDTH, SCREEN_HEIGHT = 0, 0
+
+# Cursor smoothing/prediction filter (see cursor_filter.py)
+CURSOR_FILTER = 'one-euro'
 
 # Cursor movement sensitivity (higher = faster cursor movement)
 CURSOR_SENSITIVITY = 1.5
 
-# Gesture cooldowns to prevent repeated actions
-last_click_time = 0
-last_scroll_time = 0
+# Per-hand gesture cooldowns to prevent repeated actions (on the frame
+# timestamps, so replayed traces act as they did live; checking them never
+# blocks, actions inside a cooldown are just skipped)
 CLICK_COOLDOWN = 0.5  # seconds
 SCROLL_COOLDOWN = 0.2  # seconds
 
-# Gesture state tracking
-gesture_state = {
-    'is_clicking': False,
-    'is_scrolling_up': False,
-    'is_scrolling_down': False
+# Swipe/flick (see swipe.py) actions: (kind, direction) -> (backend method, argument)
+SWIPE_SCROLL = 10
+SWIPE_ACTIONS = {
+    ('flick', 'up'): ('press', 'pageup'),
+    ('flick', 'down'): ('press', 'pagedown'),
+    ('swipe', 'up'): ('scroll', SWIPE_SCROLL),
+    ('swipe', 'down'): ('scroll', -SWIPE_SCROLL),
+    ('flick', 'left'): ('press', 'left'),
+    ('swipe', 'left'): ('press', 'left'),
+    ('flick', 'right'): ('press', 'right'),
+    ('swipe', 'right'): ('press', 'right'),
+}
+
+# Swipes are only tracked while this gesture's predicates hold
+SWIPE_GESTURE = registry.names.index('open_hand')
+
+# Preview labels for the registry's gestures (only the first four have actions)
+GESTURE_LABELS = {
+    'closed_fist': "CLICK (Closed Fist)",
+    'point_up': "SCROLL UP (Point Up)",
+    'point_down': "SCROLL DOWN (Point Down)",
+    'claw_open': "MOVE CURSOR (Claw-Open)",
+    'claw_closed': "Claw-Closed",
+    'pinch': "Pinch",
+    'thumbs_up': "Thumbs Up",
+    'thumbs_down': "Thumbs Down",
+    'open_hand': "Open Hand",
 }
 
+# Landmark trace recorder (see trace_recorder.py), enabled with --record
+recorder = None
+# Added to frame timestamps to record them as wall-clock time (time.time())
+recorder_clock = 0.0
+
+# Reusable frame buffers for the frame loop and preview
+frame_buffers = FrameBuffers()
+
+# Preview drawing and display (see preview.py), mode set with --preview
+renderer = PreviewRenderer('full')
+
+# Reusable landmark and feature buffers (filled in place every frame)
+hand_arrays = np.empty((MAX_HANDS, lf.NUM_LANDMARKS, 3), dtype=np.float32)
+hand_features = lf.new_feature_array()
+
+# Per-user calibration of the gesture thresholds and cursor gain (see
+# calibration.py), enabled with --calibrate
+calibrate = False
+
+# Learned gesture classifier (see gesture_classifier.py), enabled with
+# --classifier; None = the registry's rules decide alone
+classifier = None
+
+# Per-hand state with stable IDs; its driver hand moves the cursor
+tracker = HandTracker(max_hands=1, cursor_filter=CURSOR_FILTER)
+
+# Idle power saving (None = always run inference at full rate)
+scheduler = None
+
+# WebSocket bridge to the kiosk page (None = OS mouse events only)
+ui_bridge = None
+
+# Start-up steps and milestones until the first gesture (see startup.py)
+startup = None
+
 
 def get_finger_positions(hand_landmarks):
     """Extract key finger landmark positions."""
     landmarks = hand_landmarks.landmark
     
     return {
-        'wrist': landmarks[mp_hands.HandLandmark.WRIST],
-        'thumb_tip': landmarks[mp_hands.HandLandmark.THUMB_TIP],
-        'thumb_ip': landmarks[mp_hands.HandLandmark.THUMB_IP],
-        'thumb_mcp': landmarks[mp_hands.HandLandmark.THUMB_MCP],
-        'index_tip': landmarks[mp_hands.HandLandmark.INDEX_FINGER_TIP],
-        'index_pip': landmarks[mp_hands.HandLandmark.INDEX_FINGER_PIP],
-        'index_mcp': landmarks[mp_hands.HandLandmark.INDEX_FINGER_MCP],
-        'middle_tip': landmarks[mp_hands.HandLandmark.MIDDLE_FINGER_TIP],
-        'middle_pip': landmarks[mp_hands.HandLandmark.MIDDLE_FINGER_PIP],
-        'ring_tip': landmarks[mp_hands.HandLandmark.RING_FINGER_TIP],
-        'ring_pip': landmarks[mp_hands.HandLandmark.RING_FINGER_PIP],
-        'pinky_tip': landmarks[mp_hands.HandLandmark.PINKY_TIP],
-        'pinky_pip': landmarks[mp_hands.HandLandmark.PINKY_PIP],
+        'wrist': landmarks[lf.WRIST],
+        'thumb_tip': landmarks[lf.THUMB_TIP],
+        'thumb_ip': landmarks[lf.THUMB_IP],
+        'thumb_mcp': landmarks[lf.THUMB_MCP],
+        'index_tip': landmarks[lf.INDEX_TIP],
+        'index_pip': landmarks[lf.INDEX_PIP],
+        'index_mcp': landmarks[lf.INDEX_MCP],
+        'middle_tip': landmarks[lf.MIDDLE_TIP],
+        'middle_pip': landmarks[lf.MIDDLE_PIP],
+        'ring_tip': landmarks[lf.RING_TIP],
+        'ring_pip': landmarks[lf.RING_PIP],
+        'pinky_tip': landmarks[lf.PINKY_TIP],
+        'pinky_pip': landmarks[lf.PINKY_PIP],
     }
 
 
@@ -298,93 +388,34 @@ def detect_point_down(positions):
     return index_tip_below_mcp and index_extended and middle_curled and ring_curled and pinky_curled
 
 
-def detect_open_hand_for_swipe(positions):
-    """
-    Detect if hand is open (for swipe gestures).
-    All fingers should be extended.
-    """
-    index_extended = is_finger_extended(positions['index_tip'], positions['index_pip'])
-    middle_extended = is_finger_extended(positions['middle_tip'], positions['middle_pip'])
-    ring_extended = is_finger_extended(positions['ring_tip'], positions['ring_pip'])
-    pinky_extended = is_finger_extended(positions['pinky_tip'], positions['pinky_pip'])
-    
-    return index_extended and middle_extended and ring_extended and pinky_extended
-
-
-def detect_swipe(positions):
+def move_cursor(hand, frame_width, frame_height, timestamp=None, latency=0.0):
     """
-    Detect swipe up or swipe down gesture based on hand movement.
-    Returns: 'up', 'down', or None
+    Move cursor based on the movement of a TrackedHand (relative movement).
+    timestamp is when the frame was captured and latency how long ago that
+    was (seconds); the cursor filter uses them to smooth and predict the
+    hand position.
     """
-    global swipe_history, last_swipe_time
-    
-    current_time = time.time()
-    
-    # Check if hand is open for swiping
-    if not detect_open_hand_for_swipe(positions):
-        swipe_history = []  # Reset history if hand is not open
-        return None
-    
-    # Use wrist position for swipe tracking (more stable)
-    wrist = positions['wrist']
-    current_y = wrist.y
-    current_time_stamp = current_time
-    
-    # Add current position to history
-    swipe_history.append((current_y, current_time_stamp))
-    
-    # Keep only recent history
-    if len(swipe_history) > SWIPE_HISTORY_LENGTH:
-        swipe_history.pop(0)
-    
-    # Need enough history to detect swipe
-    if len(swipe_history) < 5:
-        return None
-    
-    # Check cooldown
-    if current_time - last_swipe_time < SWIPE_COOLDOWN:
-        return None
-    
-    # Calculate vertical movement from oldest to newest position
-    start_y = swipe_history[0][0]
-    end_y = swipe_history[-1][0]
-    delta_y = end_y - start_y
-    
-    # Detect swipe direction
-    if delta_y < -SWIPE_THRESHOLD:  # Hand moved up (y decreases going up)
-        swipe_history = []  # Reset after detecting swipe
-        last_swipe_time = current_time
-        return 'up'
-    elif delta_y > SWIPE_THRESHOLD:  # Hand moved down (y increases going down)
-        swipe_history = []  # Reset after detecting swipe
-        last_swipe_time = current_time
-        return 'down'
-    
-    return None
-
-
-def move_cursor(positions, frame_width, frame_height):
-    """Move cursor based on hand movement (relative movement)."""
-    global prev_hand_x, prev_hand_y, is_palm_open
+    if timestamp is None:
+        timestamp = time.perf_counter()
     
     # Use index finger MCP (knuckle at base of index finger) for tracking
-    index_mcp = positions['index_mcp']
-    current_hand_x = index_mcp.x
-    current_hand_y = index_mcp.y
-    
-    # If palm just opened, store position and wait for next frame
-    if not is_palm_open:
-        prev_hand_x = current_hand_x
-        prev_hand_y = current_hand_y
-        is_palm_open = True
+    current_hand_x = float(hand.landmarks[lf.INDEX_MCP, 0])
+    current_hand_y = float(hand.landmarks[lf.INDEX_MCP, 1])
+    
+    # If palm just opened, the first position only anchors the movement
+    delta = hand.cursor.move(timestamp, current_hand_x, current_hand_y, latency)
+    if delta is None:
         return
     
-    # Calculate hand movement delta
-    delta_x = (current_hand_x - prev_hand_x) * SCREEN_WIDTH * CURSOR_SENSITIVITY
-    delta_y = (current_hand_y - prev_hand_y) * SCREEN_HEIGHT * CURSOR_SENSITIVITY
+    # Calculate hand movement delta (smaller hands in the image move less)
+    sensitivity = CURSOR_SENSITIVITY
+    if calibrate:
+        sensitivity *= hand.calibration.cursor_gain
+    delta_x = delta[0] * SCREEN_WIDTH * sensitivity
+    delta_y = delta[1] * SCREEN_HEIGHT * sensitivity
     
     # Get current cursor position
-    current_cursor_x, current_cursor_y = pyautogui.position()
+    current_cursor_x, current_cursor_y = backend.position()
     
     # Apply delta to cursor position
     new_x = current_cursor_x + delta_x
@@ -395,49 +426,470 @@ def move_cursor(positions, frame_width, frame_height):
     new_y = max(0, min(SCREEN_HEIGHT - 1, new_y))
     
     # Move cursor
-    pyautogui.moveTo(new_x, new_y)
-    
-    # Store current hand position for next frame
-    prev_hand_x = current_hand_x
-    prev_hand_y = current_hand_y
+    backend.move_to(new_x, new_y)
 
 
-def perform_click():
-    """Perform a mouse click."""
-    global last_click_time
-    
-    current_time = time.time()
-    if current_time - last_click_time > CLICK_COOLDOWN:
-        pyautogui.click()
-        last_click_time = current_time
+def perform_click(hand, timestamp):
+    """Perform a mouse click (subject to the hand's click cooldown at the frame's timestamp)."""
+    if timestamp - hand.last_click_time > CLICK_COOLDOWN:
+        backend.click()
+        hand.last_click_time = timestamp
         return True
     return False
 
 
-def perform_scroll(direction):
-    """Perform scroll action."""
-    global last_scroll_time
-    
-    current_time = time.time()
-    if current_time - last_scroll_time > SCROLL_COOLDOWN:
+def perform_scroll(hand, direction, timestamp):
+    """Perform scroll action (subject to the hand's scroll cooldown at the frame's timestamp)."""
+    if timestamp - hand.last_scroll_time > SCROLL_COOLDOWN:
         if direction == 'up':
-            pyautogui.scroll(3)  # Scroll up
+            backend.scroll(3)  # Scroll up
         else:
-            pyautogui.scroll(-3)  # Scroll down
-        last_scroll_time = current_time
+            backend.scroll(-3)  # Scroll down
+        hand.last_scroll_time = timestamp
         return True
     return False
 
 
-def draw_gesture_info(frame, gesture_name, color=(0, 255, 0)):
-    """Draw gesture information on frame."""
-    cv2.putText(frame, f"Gesture: {gesture_name}", (10, 30),
-                cv2.FONT_HERSHEY_SIMPLEX, 1, color, 2)
+def perform_swipe(event):
+    """Perform the action mapped to a SwipeEvent."""
+    action, argument = SWIPE_ACTIONS[event.kind, event.direction]
+    getattr(backend, action)(argument)
+
+
+def use_backend(new_backend):
+    """Send mouse output through new_backend (see actuation.py)."""
+    global backend, SCREEN_WIDTH, SCREEN_HEIGHT
+    
+    backend = new_backend
+    SCREEN_WIDTH, SCREEN_HEIGHT = backend.size()
+
+
+def publish_gesture_events():
+    """Send the cursor hand's gesture start/end events to the kiosk page."""
+    driver = tracker.driver
+    if ui_bridge is not None and driver is not None:
+        for event in driver.states.events:
+            ui_bridge.send({'t': 'gesture', 'kind': event.kind, 'g': event.gesture})
+
+
+def handle_hand(hand, frame, frame_width, frame_height, timestamp=None, latency=0.0):
+    """
+    Update the debounced gesture of one TrackedHand from its landmarks,
+    perform its action and return the stable gesture name (or None). A
+    click fires once when a fist starts; only the tracker's driver hand
+    moves the cursor. frame may be None when not previewing. timestamp is
+    when the frame was captured (seconds) and drives the debouncing, swipes,
+    cooldowns and cursor filter; latency is passed on to move_cursor.
+    """
+    if timestamp is None:
+        timestamp = time.perf_counter()
+    
+    # Score every gesture in one pass over the shared features, then let the
+    # hand's gesture history decide which gesture is actually held
+    features = lf.compute_features(hand.landmarks, out=hand_features)
+    if calibrate:
+        # Thresholds apply as if every hand were the reference size
+        hand.calibration.update(hand.landmarks, features)
+        hand.calibration.normalize(features, out=features)
+    scores = registry.score(features)
+    if classifier is not None:
+        scores = classifier.score(hand.landmarks, scores)
+    gesture = hand.states.update(scores, timestamp)
+    
+    # Follow the wrist of a flat open hand for swipes, unless it moves the cursor
+    if scores[SWIPE_GESTURE] > 0 and not (gesture == 'claw_open' and hand is tracker.driver):
+        event = hand.swipe.update(timestamp, float(hand.landmarks[lf.WRIST, 0]),
+                                  float(hand.landmarks[lf.WRIST, 1]))
+        if event is not None:
+            perform_swipe(event)
+    elif len(hand.swipe):
+        hand.swipe.clear()
+    
+    if gesture == 'closed_fist':
+        if hand.states.started('closed_fist') and perform_click(hand, timestamp) and frame is not None:
+            cv2.circle(frame, (frame_width // 2, frame_height // 2), 
+                      30, (0, 0, 255), -1)
+        hand.cursor.reset()
+    
+    elif gesture == 'point_up':
+        perform_scroll(hand, 'up', timestamp)
+        hand.cursor.reset()
+    
+    elif gesture == 'point_down':
+        perform_scroll(hand, 'down', timestamp)
+        hand.cursor.reset()
+    
+    elif gesture == 'claw_open' and hand is tracker.driver:
+        move_cursor(hand, frame_width, frame_height, timestamp, latency)
+    
+    else:
+        # No gesture with an action - reset state
+        hand.cursor.reset()
+    
+    return gesture
+
+
+def note_startup(tracked):
+    """Record the first frame, hand and gesture since launch; report at the first gesture."""
+    global startup
+    
+    startup.mark('first frame')
+    if tracked:
+        startup.mark('first hand')
+    if any(event.kind == 'start' for hand in tracked for event in hand.states.events):
+        startup.mark('first gesture')
+        print(startup.format())
+        startup = None
+
+
+def handle_results(frame, results, preview=True, captured=None):
+    """
+    Act on the hand detection results for one (unflipped BGR) frame and
+    have the renderer preview it (if preview and the frame is due).
+    captured is the time.perf_counter() at which the frame was captured.
+    Returns False when the user asked to quit.
+    Gesture handling, preview drawing and display times go to metrics.
+    """
+    start = time.perf_counter_ns()
+    metrics.frame_ns = int(captured * 1e9) if captured is not None else start
+    frame_height, frame_width, _ = frame.shape
+    preview = preview and renderer.due()
+    full = preview and renderer.mode == 'full'
+    draw_ns = 0
+    if full:
+        # Flip frame horizontally for mirror effect (only when displayed)
+        frame = frame_buffers.mirrored(frame)
+        draw_ns = time.perf_counter_ns() - start
+    
+    # Match the detections to tracked hands (tracks without one are reset)
+    detected = (results.multi_hand_landmarks or [])[:tracker.max_hands]
+    handedness = None
+    if results.multi_handedness:
+        handedness = [h.classification[0].label for h in results.multi_handedness]
+    for i, hand_landmarks in enumerate(detected):
+        lf.landmarks_to_array(hand_landmarks, out=hand_arrays[i])
+    tracked = tracker.update(hand_arrays[:len(detected)], handedness, captured)
+    if startup is not None:
+        note_startup(tracked)
+    
+    latency = time.perf_counter() - captured if captured is not None else 0.0
+    for hand in tracked:
+        handle_hand(hand, frame if full else None,
+                    frame_width, frame_height, captured, latency)
+        if recorder is not None:
+            recorder.add_hand(hand.landmarks)
+    
+    # The cursor-driving hand's gesture is the one shown, recorded and published
+    gesture = tracker.driver.gesture if tracker.driver is not None else None
+    if tracked and recorder is not None:
+        timestamp = captured if captured is not None else time.perf_counter()
+        recorder.commit(recorder_clock + timestamp, gesture)
+    publish_gesture_events()
+    handled = time.perf_counter_ns()
+    metrics.record('gestures', handled - start - draw_ns)
+    
+    if not preview:
+        return not renderer.quit
+    
+    # Hand skeletons, IDs and gesture info (landmarks copied, the render
+    # thread may draw them after the next frame has refilled hand_arrays)
+    gesture_detected = GESTURE_LABELS.get(gesture, "None")
+    color = (0, 255, 0) if gesture_detected != "None" else (128, 128, 128)
+    if gesture is not None:
+        gesture_detected += f" {tracker.driver.states.confidence():.0%}"
+    labels = ()
+    if tracker.max_hands > 1:
+        labels = [(f"#{hand.id}", (hand.center[0], hand.center[1])) for hand in tracked]
+    overlay = Overlay(hand_arrays[:len(detected)].copy(), labels, gesture_detected, color,
+                      scheduler is not None and scheduler.idle)
+    if full:
+        return renderer.render(frame, overlay, draw_ns)
+    return renderer.submit(frame, overlay)
+
+
+def run_serial(cap, hands, preview=True, scheduler=None):
+    """
+    Run capture, inference and actuation one after another on each frame.
+    With an IdleScheduler, frames are captured slower and not inferred while
+    idle.
+    """
+    stats = StageStats(['capture', 'inference', 'actuation', 'end_to_end'])
+    last_report = time.perf_counter()
+    
+    while cap.isOpened():
+        if scheduler is not None and scheduler.idle:
+            time.sleep(scheduler.frame_delay())
+        start = time.perf_counter_ns()
+        success, frame = frame_buffers.read(cap)
+        if not success:
+            if not cap.isOpened():
+                break  # End of a video file
+            print("Failed to read from camera")
+            continue
+        captured = time.perf_counter_ns()
+        stats.add('capture', captured - start)
+        
+        results = detect_hands(hands, frame, frame_buffers, scheduler, captured / 1e9)
+        inferred = time.perf_counter_ns()
+        stats.add('inference', inferred - captured)
+        
+        keep_running = handle_results(frame, results, preview, captured / 1e9)
+        done = time.perf_counter_ns()
+        stats.add('actuation', done - inferred)
+        stats.add('end_to_end', done - captured)
+        stats.frame_done()
+        
+        if not keep_running:
+            break
+        
+        if time.perf_counter() - last_report >= REPORT_INTERVAL:
+            print(stats.format('serial'))
+            if scheduler is not None:
+                print(scheduler.format())
+            last_report = time.perf_counter()
+    
+    print(stats.format('serial'))
+    if scheduler is not None:
+        print(scheduler.format())
+    return stats
+
+
+def use_station(station):
+    """Point gesture handling at a station's hand tracker and output."""
+    global tracker, ui_bridge
+    
+    tracker = station.tracker
+    ui_bridge = station.bridge
+    use_backend(station.backend)
+
+
+def run_stations(pool, stations):
+    """
+    Act on the results of a CameraPool until every worker has stopped. Each
+    result feeds its station (if its camera is the one the station uses)
+    and the station's gestures drive the station's own output. No preview.
+    """
+    stats = StageStats(['inference', 'actuation', 'end_to_end'])
+    station_of = {source: station for station in stations for source in station.sources}
+    last_report = time.perf_counter()
+    
+    for result in pool.results():
+        stats.add('inference', int(result.inference * 1e9))
+        metrics.record('handoff', int((result.received - result.published) * 1e9))
+        station = station_of[result.source]
+        if not station.accept(result):
+            continue
+        start = time.perf_counter_ns()
+        metrics.frame_ns = int(result.captured * 1e9)
+        use_station(station)
+        tracked = tracker.update(result.landmarks, result.handedness, result.captured)
+        latency = time.perf_counter() - result.captured
+        frame_width, frame_height = result.frame_size
+        for hand in tracked:
+            handle_hand(hand, None, frame_width, frame_height, result.captured, latency)
+        station.count_events(tracked)
+        publish_gesture_events()
+        end = time.perf_counter_ns()
+        metrics.record('gestures', end - start)
+        stats.add('actuation', end - start)
+        stats.add('end_to_end', end - metrics.frame_ns)
+        stats.frame_done()
+        
+        if time.perf_counter() - last_report >= REPORT_INTERVAL:
+            print(stats.format('stations'))
+            print(pool.format())
+            last_report = time.perf_counter()
+    
+    print(stats.format('stations'))
+    print(pool.format())
+    for station in stations:
+        print(station.format())
+    return stats
+
+
+def run_trace(source):
+    """Replay a landmark trace through gesture detection and actuation (no inference)."""
+    stats = StageStats(['actuation'])
+    
+    while source.isOpened():
+        success, hands_landmarks = source.read()
+        if not success:
+            break
+        start = time.perf_counter_ns()
+        metrics.frame_ns = start
+        tracked = tracker.update(hands_landmarks, timestamp=source.timestamp)
+        for hand in tracked:
+            handle_hand(hand, None, FRAME_WIDTH, FRAME_HEIGHT, source.timestamp)
+            if recorder is not None:
+                recorder.add_hand(hand.landmarks)
+        
+        if tracked and recorder is not None:
+            recorder.commit(recorder_clock + source.timestamp, tracker.driver.gesture)
+        publish_gesture_events()
+        stats.add('actuation', time.perf_counter_ns() - start)
+        stats.frame_done()
+    
+    print(stats.format('trace'))
+    return stats
+
+
+def parse_args(argv=None):
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="AeroTouch - Hand Gesture Controller")
+    parser.add_argument('--pipeline', action='store_true',
+                        help="run capture, inference and actuation as separate threads")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--camera', type=int, default=0,
+                        help="camera index to capture from (default: 0)")
+    source.add_argument('--video', metavar='PATH',
+                        help="read frames from a video file instead of the camera")
+    source.add_argument('--trace', metavar='PATH',
+                        help="replay a recorded landmark trace (.npz), skipping inference")
+    source.add_argument('--source', action='append', metavar='[STATION=]CAMERA|PATH',
+                        help="run inference for this camera index or video file in a worker "
+                             "process; repeat for more cameras. Sources with the same "
+                             "STATION name drive one kiosk (default: one station each)")
+    parser.add_argument('--headless', action='store_true',
+                        help="no preview window (unless --preview is given); record mouse "
+                             "events instead of sending them (except to the kiosk page with "
+                             "--mouse websocket)")
+    parser.add_argument('--preview', choices=PREVIEW_MODES,
+                        help="preview window: off, decimated (every Nth frame at reduced size, "
+                             "drawn on its own thread) or full (default: full, off with --headless)")
+    parser.add_argument('--preview-every', type=int, default=DECIMATE_EVERY, metavar='N',
+                        help=f"frames per decimated preview frame (default: {DECIMATE_EVERY})")
+    parser.add_argument('--preview-scale', type=float, default=DECIMATE_SCALE,
+                        help=f"size of the decimated preview relative to the camera frame "
+                             f"(default: {DECIMATE_SCALE:g})")
+    parser.add_argument('--record', metavar='PATH',
+                        help="append detected landmarks and gestures to a trace file")
+    parser.add_argument('--mouse', choices=['auto', 'xlib', 'uinput', 'pyautogui', 'websocket'],
+                        default='auto',
+                        help="system mouse backend (default: auto, X11 XTest if available), "
+                             "or websocket to drive the kiosk page directly")
+    parser.add_argument('--ui-port', type=int, default=UI_PORT,
+                        help=f"localhost port of the kiosk page WebSocket (default: {UI_PORT})")
+    parser.add_argument('--sync-output', action='store_true',
+                        help="send mouse events from the frame loop instead of a background thread")
+    parser.add_argument('--cursor-filter', choices=FILTERS, default=CURSOR_FILTER,
+                        help=f"cursor smoothing/prediction (default: {CURSOR_FILTER})")
+    parser.add_argument('--hands', type=int, default=1, choices=range(1, MAX_HANDS + 1),
+                        help=f"number of hands to track (1-{MAX_HANDS}, default: 1)")
+    parser.add_argument('--cursor-hand', choices=CURSOR_POLICIES, default='first',
+                        help="which tracked hand moves the cursor (default: first)")
+    parser.add_argument('--calibrate', action='store_true',
+                        help="adapt the gesture thresholds and cursor speed to each user's "
+                             "hand size and distance")
+    parser.add_argument('--classifier', metavar='PATH',
+                        help="recognize gestures with a model trained by train_classifier.py "
+                             "instead of the rule thresholds")
+    parser.add_argument('--gesture-window', type=int, default=GESTURE_WINDOW, metavar='FRAMES',
+                        help=f"frames of history a gesture decision uses; 1 acts on single "
+                             f"frames (default: {GESTURE_WINDOW})")
+    parser.add_argument('--idle-after', type=float, default=IDLE_AFTER, metavar='SECONDS',
+                        help=f"drop to a low frame rate and motion-gated inference after this "
+                             f"long without a hand; 0 disables (camera only, default: {IDLE_AFTER:g})")
+    parser.add_argument('--idle-fps', type=float, default=IDLE_FPS,
+                        help=f"frame rate while idle (default: {IDLE_FPS:g})")
+    parser.add_argument('--metrics-port', type=int, nargs='?', const=METRICS_PORT, metavar='PORT',
+                        help=f"serve per-stage latency metrics for Prometheus on "
+                             f"localhost (default port: {METRICS_PORT})")
+    parser.add_argument('--metrics-log', metavar='PATH',
+                        help=f"append a JSON line of per-stage latencies every "
+                             f"{REPORT_INTERVAL:g} s to PATH ('-' for stdout)")
+    parser.add_argument('--no-metrics', action='store_true',
+                        help="do not record per-stage latency histograms")
+    args = parser.parse_args(argv)
+    if args.preview is None:
+        args.preview = 'off' if args.headless else 'full'
+    if args.source and (args.record or args.pipeline):
+        parser.error("--source runs its own worker processes; it cannot be combined "
+                     "with --record or --pipeline")
+    return args
+
+
+def load_hands(max_hands):
+    """Load the MediaPipe hand model and warm it up on blank frames."""
+    hands = mp.solutions.hands.Hands(
+        model_complexity=0,
+        min_detection_confidence=0.7,
+        min_tracking_confidence=0.7,
+        max_num_hands=max_hands
+    )
+    return warm_up(hands, (FRAME_HEIGHT, FRAME_WIDTH))
 
 
-def main():
+def make_output(args, station=0):
+    """
+    Return (backend, UiBridge or None) for a station: the kiosk page bridge
+    with --mouse websocket (one port per station), otherwise the system
+    mouse for the first station and recorded events for the others.
+    """
+    bridge = None
+    if args.mouse == 'websocket':
+        bridge = UiBridge(port=args.ui_port + station if args.ui_port else 0)
+        print(f"Kiosk page bridge: ws://{bridge.host}:{bridge.port}")
+        output = BridgeBackend(bridge)
+    elif args.headless or station > 0:
+        output = RecordingBackend()
+    else:
+        output = make_backend(args.mouse)
+    # Publishing to the bridge never blocks, so it needs no output thread
+    if args.sync_output or bridge is not None:
+        return SyncBackend(output), bridge
+    return AsyncBackend(output), bridge
+
+
+def start_up(args, concurrent=True):
+    """
+    Open the camera (or video), load the hand model and connect the mouse
+    output at the same time (one after another if not concurrent), and
+    create the full-mode preview window meanwhile on this thread. Returns (source,
+    hands, backend, UiBridge or None); source and hands are None for
+    --trace. The steps are timed in the global startup.
+    """
+    global startup
+    
+    startup = Startup(concurrent=concurrent)
+    startup.mark('imports')
+    if not args.trace:
+        startup.submit('camera', lambda: VideoFileSource(args.video) if args.video
+                       else CameraSource(args.camera))
+        startup.submit('model', load_hands, args.hands)
+    startup.submit('output', make_output, args)
+    if not args.trace and args.preview == 'full':
+        cv2.namedWindow(PREVIEW_WINDOW)
+        startup.mark('window')
+    try:
+        station_backend, bridge = startup.result('output')
+        if args.trace:
+            return None, None, station_backend, bridge
+        return startup.result('camera'), startup.result('model'), station_backend, bridge
+    finally:
+        startup.close()
+
+
+def close_output(station_backend, bridge):
+    """Flush and close a backend from make_output and report on it."""
+    if bridge is not None:
+        print(bridge.format())
+    station_backend.close()
+    if isinstance(station_backend, AsyncBackend):
+        print(station_backend.format())
+    if isinstance(station_backend.backend, RecordingBackend):
+        print(f"Recorded mouse events: {station_backend.backend.counts()}")
+
+
+def main(argv=None):
     """Main function to run the gesture controller."""
-    global is_palm_open
+    global recorder, recorder_clock, tracker, scheduler, ui_bridge, startup, classifier, \
+        calibrate, renderer
+    
+    args = parse_args(argv)
+    calibrate = args.calibrate
+    renderer = PreviewRenderer(args.preview, args.preview_every, args.preview_scale)
+    if args.classifier:
+        classifier = load_classifier(args.classifier)
     
     print("=" * 50)
     print("AeroTouch - Hand Gesture Controller")
@@ -447,99 +899,86 @@ def main():
     print("  - Closed Fist: Click")
     print("  - Point Up (index finger up): Scroll up")
     print("  - Point Down (index finger down): Scroll down")
+    print("  - Open hand flick/swipe up/down: Page/scroll up/down")
+    print("  - Open hand swipe left/right: Previous/next category")
     print("\nPress 'q' to quit")
     print("=" * 50)
     
-    cap = cv2.VideoCapture(0)
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+    metrics.enabled = not args.no_metrics
+    server = serve_metrics(args.metrics_port) if args.metrics_port else None
+    if server is not None:
+        print(f"Metrics: http://{server.server_address[0]}:{server.server_port}/metrics")
+    logger = MetricsLogger(args.metrics_log, REPORT_INTERVAL) if args.metrics_log else None
+    
+    def make_tracker():
+        return HandTracker(args.hands, args.cursor_filter, args.cursor_hand,
+                           max(1, args.gesture_window))
+    
+    if args.source:
+        # One inference worker process per camera, stations act on the results
+        sources, stations = make_stations(args.source, make_tracker)
+        for index, station in enumerate(stations):
+            station.backend, station.bridge = make_output(args, index)
+        pool = CameraPool(sources, args.hands, args.idle_after, args.idle_fps).start()
+        try:
+            run_stations(pool, stations)
+        finally:
+            pool.close()
+            for station in stations:
+                close_output(station.backend, station.bridge)
+        if logger is not None:
+            logger.close()
+        if server is not None:
+            server.shutdown()
+        print("\nGesture controller stopped.")
+        return
     
-    with mp_hands.Hands(
-        model_complexity=0,
-        min_detection_confidence=0.7,
-        min_tracking_confidence=0.7,
-        max_num_hands=1
-    ) as hands:
+    source, hands, station_backend, ui_bridge = start_up(args)
+    use_backend(station_backend)
+    tracker = make_tracker()
+    
+    if args.record:
+        recorder = TraceRecorder(args.record, registry.names, max_hands=args.hands)
+        # Live frames carry time.perf_counter(), replayed ones the trace's own time
+        recorder_clock = time.time() - (0.0 if args.trace else time.perf_counter())
+    
+    if args.trace:
+        startup = None
+        source = LandmarkTraceSource(args.trace)
+        run_trace(source)
+    else:
+        print(startup.format())
         
-        while cap.isOpened():
-            success, frame = cap.read()
-            if not success:
-                print("Failed to read from camera")
-                continue
-            
-            # Flip frame horizontally for mirror effect
-            frame = cv2.flip(frame, 1)
-            frame_height, frame_width, _ = frame.shape
-            
-            # Convert BGR to RGB
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            rgb_frame.flags.writeable = False
-            
-            # Process hand detection
-            results = hands.process(rgb_frame)
-            
-            rgb_frame.flags.writeable = True
-            frame = cv2.cvtColor(rgb_frame, cv2.COLOR_RGB2BGR)
-            
-            gesture_detected = "None"
+        with hands:
             
-            if results.multi_hand_landmarks:
-                for hand_landmarks in results.multi_hand_landmarks:
-                    # Draw hand landmarks
-                    mp_drawing.draw_landmarks(
-                        frame,
-                        hand_landmarks,
-                        mp_hands.HAND_CONNECTIONS,
-                        mp_drawing_styles.get_default_hand_landmarks_style(),
-                        mp_drawing_styles.get_default_hand_connections_style()
-                    )
-                    
-                    # Get finger positions
-                    positions = get_finger_positions(hand_landmarks)
-                    
-                    # Detect gestures (in priority order)
-                    if detect_closed_fist(positions):
-                        gesture_detected = "CLICK (Closed Fist)"
-                        if perform_click():
-                            cv2.circle(frame, (frame_width // 2, frame_height // 2), 
-                                      30, (0, 0, 255), -1)
-                        is_palm_open = False
-                    
-                    elif detect_point_up(positions):
-                        gesture_detected = "SCROLL UP (Point Up)"
-                        perform_scroll('up')
-                        is_palm_open = False
-                    
-                    elif detect_point_down(positions):
-                        gesture_detected = "SCROLL DOWN (Point Down)"
-                        perform_scroll('down')
-                        is_palm_open = False
-                    
-                    elif detect_claw_open(positions):
-                        gesture_detected = "MOVE CURSOR (Claw-Open)"
-                        move_cursor(positions, frame_width, frame_height)
-                    else:
-                        # No recognized gesture - reset state
-                        is_palm_open = False
+            if args.idle_after > 0 and not args.video:
+                scheduler = IdleScheduler(args.idle_after, args.idle_fps)
+            preview = args.preview != 'off'
+            if args.pipeline:
+                run_pipelined(source, hands, lambda packet: handle_results(
+                    packet.frame, packet.results, preview,
+                    packet.captured_ns / 1e9), scheduler=scheduler)
             else:
-                # No hand detected - reset state
-                is_palm_open = False
-            
-            # Draw gesture info
-            color = (0, 255, 0) if gesture_detected != "None" else (128, 128, 128)
-            draw_gesture_info(frame, gesture_detected, color)
-            
-            # Draw instructions
-            cv2.putText(frame, "Press 'q' to quit", (10, frame_height - 10),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-            
-            cv2.imshow('AeroTouch - Gesture Controller', frame)
-            
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                break
-    
-    cap.release()
-    cv2.destroyAllWindows()
+                run_serial(source, hands, preview, scheduler)
+        
+        renderer.close()
+        if preview:
+            print(renderer.format())
+    
+    source.release()
+    if startup is not None:
+        print(startup.format())
+    close_output(station_backend, ui_bridge)
+    if logger is not None:
+        logger.close()
+    if server is not None:
+        server.shutdown()
+    if recorder is not None:
+        recorder.close()
+        print(f"Recorded {recorder.frames} frames to {args.record} "
+              f"({recorder.dropped_chunks} chunks dropped)")
+    if args.preview == 'full':
+        cv2.destroyAllWindows()
     print("\nGesture controller stopped.")
 
 
@@ -0,0 +1,167 @@
+"""
+AeroTouch - Declarative gesture registry
+Each gesture is a list of thresholded predicates over the shared feature
+vector from landmark_features. All predicates of all gestures are evaluated
+together in one vector pass per frame, and the first gesture (in priority
+order) whose predicates all hold wins.
+
+Adding a gesture only adds rows to the predicate table; the per-frame cost
+is a fixed number of NumPy calls regardless of how many gestures exist.
+There is no short-circuiting at the first matching gesture: the frame loop
+needs every gesture's margin (the debouncing in gesture_states, swipes and
+the learned classifier read them), and the full pass grows slowly with the
+table (about 6 us per frame for 9 gestures and 9 us for 72, see
+benchmark_features.py).
+"""
+
+import numpy as np
+
+from landmark_features import FEATURE_INDEX
+
+# Gestures in priority order: (name, [(feature, op, threshold), ...])
+GESTURES = [
+    ('closed_fist', [
+        ('index_dy', '>=', -0.02),
+        ('middle_dy', '>=', -0.02),
+        ('ring_dy', '>=', -0.02),
+        ('pinky_dy', '>=', -0.02),
+        ('cluster_radius', '<', 0.08),
+    ]),
+    ('point_up', [
+        ('index_extended', '>', 0.5),
+        ('index_dy_wrist', '<', 0.0),
+        ('middle_extended', '<', 0.5),
+        ('ring_extended', '<', 0.5),
+        ('pinky_extended', '<', 0.5),
+    ]),
+    ('point_down', [
+        ('index_dy_mcp', '>', 0.05),
+        ('index_length', '>', 0.12),
+        ('middle_dy_index', '<', -0.05),
+        ('ring_dy_index', '<', -0.05),
+        ('pinky_dy_index', '<', -0.05),
+    ]),
+    ('claw_open', [
+        ('cluster_radius', '>', 0.08),
+        ('wrist_index', '>', 0.15),
+        ('wrist_middle', '>', 0.15),
+    ]),
+    ('claw_closed', [
+        ('cluster_radius', '<', 0.06),
+        ('wrist_index', '>', 0.12),
+        ('wrist_middle', '>', 0.12),
+    ]),
+    ('pinch', [
+        ('dist_thumb_index', '<', 0.05),
+    ]),
+    ('thumbs_up', [
+        ('thumb_dy_mcp', '<', -0.1),
+        ('thumb_dy_wrist', '<', -0.15),
+        ('index_extended', '<', 0.5),
+        ('middle_extended', '<', 0.5),
+        ('ring_extended', '<', 0.5),
+        ('pinky_extended', '<', 0.5),
+    ]),
+    ('thumbs_down', [
+        ('thumb_dy_mcp', '>', 0.05),
+        ('thumb_dy_wrist', '>', 0.0),
+        ('index_extended', '<', 0.5),
+        ('middle_extended', '<', 0.5),
+        ('ring_extended', '<', 0.5),
+        ('pinky_extended', '<', 0.5),
+    ]),
+    # Precondition for swipes (all four fingers extended)
+    ('open_hand', [
+        ('index_extended', '>', 0.5),
+        ('middle_extended', '>', 0.5),
+        ('ring_extended', '>', 0.5),
+        ('pinky_extended', '>', 0.5),
+    ]),
+]
+
+
+class GestureRegistry:
+    """
+    Compiled predicate table for a list of gestures.
+
+    Every predicate is rewritten as sign * feature - bound > 0, so one frame
+    is scored with a gather, a multiply-subtract and a per-gesture minimum.
+    The per-gesture minimum margin doubles as a score: positive means every
+    predicate holds, and its size says how far inside the thresholds the
+    hand is.
+    """
+
+    def __init__(self, gestures=GESTURES):
+        self.names = [name for name, _ in gestures]
+        features, signs, bounds, starts = [], [], [], []
+        for name, predicates in gestures:
+            if not predicates:
+                raise ValueError(f"Gesture '{name}' has no predicates")
+            starts.append(len(features))
+            for feature, op, threshold in predicates:
+                sign, bound = self._compile(op, threshold)
+                features.append(FEATURE_INDEX[feature])
+                signs.append(sign)
+                bounds.append(bound)
+
+        self._features = np.array(features, dtype=np.intp)
+        self._signs = np.array(signs, dtype=np.float32)
+        self._bounds = np.array(bounds, dtype=np.float32)
+        self._starts = np.array(starts, dtype=np.intp)
+        self._margins = np.empty(len(features), dtype=np.float32)
+        self.scores = np.empty(len(self.names), dtype=np.float32)
+
+    @staticmethod
+    def _compile(op, threshold):
+        """Turn (op, threshold) into (sign, bound) with sign * x > bound."""
+        threshold = np.float32(threshold)
+        if op == '>':
+            return 1.0, threshold
+        if op == '>=':
+            return 1.0, np.nextafter(threshold, np.float32(-np.inf))
+        if op == '<':
+            return -1.0, -threshold
+        if op == '<=':
+            return -1.0, np.nextafter(-threshold, np.float32(-np.inf))
+        raise ValueError(f"Unknown predicate operator '{op}'")
+
+    def score(self, features):
+        """
+        Return the per-gesture minimum margins for one feature vector (every
+        gesture is scored, not just up to the first match).
+        """
+        margins = np.multiply(features[self._features], self._signs, out=self._margins)
+        margins -= self._bounds
+        return np.minimum.reduceat(margins, self._starts, out=self.scores)
+
+    def classify(self, features):
+        """Return the name of the highest-priority matching gesture, or None."""
+        matched = self.score(features) > 0
+        first = int(matched.argmax())
+        return self.names[first] if matched[first] else None
+
+    def _score_rows(self, features):
+        """(num_gestures, N) margins for (N, num_features) features."""
+        # Predicate-major, so every step (and the per-gesture minimum)
+        # works on whole rows instead of a few columns of every pose
+        margins = np.take(features.T, self._features, axis=0)
+        margins *= self._signs[:, None]
+        margins -= self._bounds[:, None]
+        return np.minimum.reduceat(margins, self._starts, axis=0)
+
+    def score_batch(self, features):
+        """Return (N, num_gestures) margins for a batch of feature vectors."""
+        features = np.asarray(features)
+        return self._score_rows(features.reshape(-1, features.shape[-1])).T.reshape(
+            features.shape[:-1] + (len(self.names),))
+
+    def classify_batch(self, features):
+        """Return the index of the winning gesture per row, or -1 for none."""
+        features = np.asarray(features)
+        matched = self._score_rows(features.reshape(-1, features.shape[-1])) > 0
+        first = matched.argmax(axis=0)
+        return np.where(matched.any(axis=0), first, -1).reshape(features.shape[:-1])
+
+
+# Shared registry for the default gesture set
+registry = GestureRegistry()
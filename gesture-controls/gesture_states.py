@@ -0,0 +1,136 @@
+"""
+AeroTouch - Temporal gesture recognition
+Turns the registry's per-frame gesture scores into stable gestures, so one
+noisy frame can neither fire a click nor drop the cursor anchor.
+
+Each hand keeps a ring buffer of its last `window` score vectors and a
+running count of frames in which each gesture matched, updated in place
+(constant work per frame, however long the window). A gesture is entered
+when it matched in at least ENTER_FRACTION of the window and kept until it
+falls below EXIT_FRACTION (hysteresis) or a higher-priority gesture is
+entered; a new gesture must also stay the candidate for its minimum dwell
+time. Changes of the stable gesture are reported as start/end events with a
+confidence (the matched fraction).
+
+States: idle (no gesture) -> moving / clicking / scrolling_up /
+scrolling_down, or the name of any other recognized gesture.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from gesture_registry import registry
+
+# Frames of score history per hand (1 = act on single frames)
+WINDOW = 5
+
+# Fraction of the window a gesture must match to be entered / to be kept
+ENTER_FRACTION = 0.6
+EXIT_FRACTION = 0.4
+
+# Seconds a new gesture must stay the candidate before it becomes stable
+MIN_DWELL = {'closed_fist': 0.05}
+DEFAULT_DWELL = 0.0
+
+# State names for the gestures that have actions
+STATE_NAMES = {
+    None: 'idle',
+    'claw_open': 'moving',
+    'closed_fist': 'clicking',
+    'point_up': 'scrolling_up',
+    'point_down': 'scrolling_down',
+}
+
+# kind is 'start' or 'end'; confidence is the matched fraction of the window
+GestureEvent = namedtuple('GestureEvent', 'kind gesture time confidence')
+
+
+class GestureStateMachine:
+    """Debounced gesture state of one hand."""
+
+    __slots__ = ('names', 'window', 'enter_count', 'exit_count', 'dwell',
+                 '_scores', '_counts', '_matched', '_next', 'current', 'candidate',
+                 'candidate_since', 'events')
+
+    def __init__(self, names=None, window=WINDOW):
+        self.names = registry.names if names is None else names
+        self.window = window
+        self.enter_count = max(1, int(np.ceil(ENTER_FRACTION * window)))
+        self.exit_count = max(1, int(np.ceil(EXIT_FRACTION * window)))
+        self.dwell = [MIN_DWELL.get(name, DEFAULT_DWELL) for name in self.names]
+        self._scores = np.full((window, len(self.names)), -1.0, dtype=np.float32)
+        self._counts = np.zeros(len(self.names), dtype=np.int32)
+        self._matched = np.empty(len(self.names), dtype=bool)
+        self._next = 0
+        self.current = None      # index of the stable gesture
+        self.candidate = None    # index of the gesture waiting out its dwell
+        self.candidate_since = 0.0
+        self.events = []         # events of the last update
+
+    @property
+    def gesture(self):
+        return None if self.current is None else self.names[self.current]
+
+    @property
+    def state(self):
+        gesture = self.gesture
+        return STATE_NAMES.get(gesture, gesture)
+
+    def confidence(self, index=None):
+        """Matched fraction of the window for a gesture (default: the stable one)."""
+        index = self.current if index is None else index
+        return 0.0 if index is None else self._counts[index] / self.window
+
+    def update(self, scores, timestamp):
+        """
+        Push one frame's registry scores (None when the hand was not seen)
+        and return the stable gesture name or None. Events emitted by this
+        frame are in self.events.
+        """
+        # Replace the oldest frame of the ring buffer and its match counts
+        slot = self._scores[self._next]
+        self._counts -= np.greater(slot, 0, out=self._matched)
+        if scores is None:
+            slot.fill(-1.0)
+        else:
+            slot[:] = scores
+            self._counts += np.greater(slot, 0, out=self._matched)
+        self._next = (self._next + 1) % self.window
+
+        # Propose the highest-priority gesture that matches often enough, but
+        # keep the stable gesture while it matches often enough to stay
+        # (hysteresis), unless the proposal comes before it in priority
+        entered = self._counts >= self.enter_count
+        first = int(entered.argmax())
+        proposal = first if entered[first] else None
+        if (self.current is not None and self._counts[self.current] >= self.exit_count
+                and (proposal is None or proposal > self.current)):
+            proposal = self.current
+
+        if proposal != self.candidate:
+            self.candidate = proposal
+            self.candidate_since = timestamp
+
+        self.events = []
+        if proposal != self.current:
+            dwell = 0.0 if proposal is None else self.dwell[proposal]
+            if timestamp - self.candidate_since >= dwell:
+                if self.current is not None:
+                    self.events.append(GestureEvent(
+                        'end', self.names[self.current], timestamp, self.confidence()))
+                self.current = proposal
+                if proposal is not None:
+                    self.events.append(GestureEvent(
+                        'start', self.names[proposal], timestamp, self.confidence()))
+        return self.gesture
+
+    def started(self, name):
+        """True if gesture `name` became stable in the last update."""
+        return any(e.kind == 'start' and e.gesture == name for e in self.events)
+
+    def reset(self):
+        self._scores.fill(-1.0)
+        self._counts[:] = 0
+        self.current = self.candidate = None
+        self.events = []
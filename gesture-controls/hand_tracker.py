@@ -0,0 +1,187 @@
+"""
+AeroTouch - Multi-hand tracking
+Gives every detected hand a stable ID across frames and keeps its state
+(landmarks, gesture and swipe history, cursor filter, calibration,
+cooldowns) in its own TrackedHand, so several hands or users can be
+followed without resets when MediaPipe reorders them.
+
+Detections are matched to tracks by distance between the detected hand
+center and the track's predicted center, with a penalty when handedness
+disagrees, so two hands crossing keep their IDs. A cursor policy decides
+which tracked hand moves the cursor.
+"""
+
+import time
+
+import numpy as np
+
+import landmark_features as lf
+from calibration import HandCalibration
+from cursor_filter import HandCursor
+from gesture_states import WINDOW, GestureStateMachine
+from swipe import SwipeDetector
+
+# Most hands tracked at once
+MAX_HANDS = 4
+
+# Largest center distance (normalized) for a detection to continue a track
+MAX_MATCH_DISTANCE = 0.25
+
+# Added to the match distance when the handedness labels disagree
+HANDEDNESS_PENALTY = 0.5
+
+# Frames a track survives without a matching detection
+MAX_MISSES = 3
+
+# Smoothing for the per-frame center velocity (0..1, higher follows faster)
+VELOCITY_SMOOTHING = 0.5
+
+# Which hand drives the cursor:
+# - first: the current driver keeps it until lost, then the oldest hand
+# - right / left: a hand with that handedness, else as 'first'
+CURSOR_POLICIES = ('first', 'right', 'left')
+
+
+class TrackedHand:
+    """State of one tracked hand."""
+
+    __slots__ = ('id', 'handedness', 'center', 'velocity', 'misses', 'frames',
+                 'landmarks', 'states', 'swipe', 'cursor', 'calibration', 'last_click_time',
+                 'last_scroll_time')
+
+    def __init__(self, hand_id, handedness, center, cursor_filter, gesture_window=WINDOW):
+        self.id = hand_id
+        self.handedness = handedness
+        self.center = center
+        self.velocity = (0.0, 0.0)
+        self.misses = 0
+        self.frames = 0
+        self.landmarks = lf.new_landmark_array()
+        self.states = GestureStateMachine(window=gesture_window)
+        self.swipe = SwipeDetector()
+        self.cursor = HandCursor(cursor_filter)
+        # A new track may be a new user: calibration starts over
+        self.calibration = HandCalibration()
+        self.last_click_time = float('-inf')
+        self.last_scroll_time = float('-inf')
+
+    @property
+    def gesture(self):
+        """Stable (debounced) gesture name, or None."""
+        return self.states.gesture
+
+    def predicted_center(self):
+        return (self.center[0] + self.velocity[0], self.center[1] + self.velocity[1])
+
+    def observe(self, landmarks, center, handedness):
+        """Take over a matched detection."""
+        a = VELOCITY_SMOOTHING
+        self.velocity = (
+            a * (center[0] - self.center[0]) + (1 - a) * self.velocity[0],
+            a * (center[1] - self.center[1]) + (1 - a) * self.velocity[1],
+        )
+        self.center = center
+        if handedness is not None:
+            self.handedness = handedness
+        np.copyto(self.landmarks, landmarks)
+        self.misses = 0
+        self.frames += 1
+
+
+class HandTracker:
+    """Matches each frame's detected hands to tracks with stable IDs."""
+
+    def __init__(self, max_hands=MAX_HANDS, cursor_filter='one-euro', cursor_policy='first',
+                 gesture_window=WINDOW):
+        if cursor_policy not in CURSOR_POLICIES:
+            raise ValueError(f"Unknown cursor policy '{cursor_policy}' "
+                             f"(choose from {', '.join(CURSOR_POLICIES)})")
+        self.max_hands = max_hands
+        self.cursor_filter = cursor_filter
+        self.cursor_policy = cursor_policy
+        self.gesture_window = gesture_window
+        self.hands = []   # live tracks, oldest first
+        self.driver = None
+        self._next_id = 0
+
+    def update(self, landmarks, handedness=None, timestamp=None):
+        """
+        Match this frame's detections to tracks.
+
+        landmarks is a sequence of (21, 3) arrays (at most max_hands are
+        used) and handedness an optional parallel sequence of 'Left'/'Right'
+        labels (None where unknown). timestamp (seconds) dates the frame for
+        the gesture history of tracks without a detection. Returns the
+        TrackedHand of each detection, in detection order.
+        """
+        if timestamp is None:
+            timestamp = time.perf_counter()
+        count = min(len(landmarks), self.max_hands)
+        if handedness is None:
+            handedness = [None] * count
+        centers = [(float(hand[:, 0].mean()), float(hand[:, 1].mean()))
+                   for hand in landmarks[:count]]
+
+        matched = [None] * count
+        unmatched = list(self.hands)
+        if self.hands and count:
+            # Greedy matching on the smallest costs first (at most 4 x 4 pairs)
+            predicted = np.array([hand.predicted_center() for hand in self.hands])
+            offsets = predicted[:, None, :] - np.array(centers)[None, :, :]
+            cost = np.hypot(offsets[..., 0], offsets[..., 1])
+            for t, hand in enumerate(self.hands):
+                for d in range(count):
+                    if (hand.handedness is not None and handedness[d] is not None
+                            and hand.handedness != handedness[d]):
+                        cost[t, d] += HANDEDNESS_PENALTY
+            for flat in np.argsort(cost, axis=None):
+                t, d = divmod(int(flat), count)
+                if cost[t, d] > MAX_MATCH_DISTANCE:
+                    break
+                hand = self.hands[t]
+                if matched[d] is None and hand in unmatched:
+                    matched[d] = hand
+                    unmatched.remove(hand)
+
+        # Tracks without a detection this frame; a short dropout does not
+        # end their gesture (or cursor anchor) by itself
+        for hand in unmatched:
+            hand.misses += 1
+            hand.states.update(None, timestamp)
+        self.hands = [hand for hand in self.hands if hand.misses <= MAX_MISSES]
+
+        for d in range(count):
+            hand = matched[d]
+            if hand is None:
+                hand = TrackedHand(self._next_id, handedness[d], centers[d],
+                                   self.cursor_filter, self.gesture_window)
+                self._next_id += 1
+                self.hands.append(hand)
+            hand.observe(landmarks[d], centers[d], handedness[d])
+            matched[d] = hand
+
+        self._choose_driver()
+        return matched
+
+    def _choose_driver(self):
+        """
+        Apply the cursor policy. The driver keeps control while it is
+        tracked (brief misses included); a new driver starts from a fresh
+        cursor anchor.
+        """
+        candidates = self.hands
+        if self.cursor_policy != 'first':
+            preferred = [hand for hand in candidates
+                         if hand.handedness == self.cursor_policy.capitalize()]
+            candidates = preferred or candidates
+        if self.driver in candidates:
+            driver = self.driver
+        else:
+            driver = candidates[0] if candidates else None
+        if driver is not self.driver and driver is not None:
+            driver.cursor.reset()
+        self.driver = driver
+
+    def format(self):
+        return " ".join(f"#{hand.id}:{hand.handedness or '?'}:{hand.gesture or '-'}"
+                        for hand in self.hands if hand.misses == 0)
@@ -0,0 +1,160 @@
+"""
+AeroTouch - Idle power saving
+When no hand has been seen for IDLE_AFTER seconds the controller goes idle:
+frames are captured at IDLE_FPS only and hand inference is skipped unless a
+cheap motion detector (difference of tiny grayscale frames) sees something
+change. The frame that shows motion is inferred right away and the
+controller is back at full rate from the next frame on; if no hand turns up
+within WAKE_GRACE seconds it goes back to idle.
+
+The scheduler keeps the process CPU time and wall time spent in each state
+and the wake-up latency (from the last still idle frame to the end of
+inference on the frame that woke it up), so the trade-off can be tuned.
+"""
+
+import time
+
+import numpy as np
+
+from startup import lazy_import
+
+cv2 = lazy_import('cv2')  # loaded on first use
+
+# Seconds without a hand before going idle, and the idle capture rate
+IDLE_AFTER = 5.0
+IDLE_FPS = 4.0
+
+# Seconds a wake-up without any hand stays at full rate
+WAKE_GRACE = 2.0
+
+# Motion detection image size (width, height), the gray level change that
+# counts as a changed pixel and the fraction of changed pixels that wakes up
+MOTION_SIZE = (64, 48)
+MOTION_DELTA = 16
+MOTION_FRACTION = 0.01
+
+
+class MotionDetector:
+    """Frame-difference motion detector on a downscaled grayscale copy."""
+
+    def __init__(self, size=MOTION_SIZE, delta=MOTION_DELTA, fraction=MOTION_FRACTION):
+        width, height = size
+        self.size = size
+        self.delta = delta
+        self.min_changed = max(1, int(fraction * width * height))
+        self._small = np.empty((height, width, 3), dtype=np.uint8)
+        self._gray = np.empty((height, width), dtype=np.uint8)
+        self._previous = np.empty((height, width), dtype=np.uint8)
+        self._diff = np.empty((height, width), dtype=np.uint8)
+        self._has_previous = False
+
+    def reset(self):
+        self._has_previous = False
+
+    def update(self, frame):
+        """Return True if a BGR frame differs enough from the previous one."""
+        cv2.resize(frame, self.size, dst=self._small, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        if not self._has_previous:
+            self._gray, self._previous = self._previous, self._gray
+            self._has_previous = True
+            return False
+
+        cv2.absdiff(self._gray, self._previous, dst=self._diff)
+        cv2.threshold(self._diff, self.delta, 255, cv2.THRESH_BINARY, dst=self._diff)
+        self._gray, self._previous = self._previous, self._gray
+        return cv2.countNonZero(self._diff) >= self.min_changed
+
+
+class IdleScheduler:
+    """Decides per frame whether to capture and run hand inference."""
+
+    def __init__(self, idle_after=IDLE_AFTER, idle_fps=IDLE_FPS, wake_grace=WAKE_GRACE):
+        self.idle_after = idle_after
+        self.idle_interval = 1.0 / idle_fps
+        self.wake_grace = min(wake_grace, idle_after)
+        self.motion = MotionDetector()
+        self.idle = False
+        self.last_hand = None       # time a hand was last seen (or the start)
+        self.last_frame = 0.0       # capture time of the last idle frame
+        self.wake_from = None       # capture time of the last still frame, while waking
+        self.hand_since_wake = False
+        self.wake_latencies = []    # seconds, one per wake-up
+        self.wake_times = []        # capture time of each frame that woke us up
+        self.false_wakeups = 0
+        self.skipped_frames = 0
+        self._wall = [0.0, 0.0]     # seconds spent active / idle
+        self._cpu = [0.0, 0.0]      # process CPU seconds active / idle
+        self._since = (time.perf_counter(), time.process_time())
+
+    def _set_idle(self, idle):
+        wall, cpu = time.perf_counter(), time.process_time()
+        self._wall[self.idle] += wall - self._since[0]
+        self._cpu[self.idle] += cpu - self._since[1]
+        self._since = (wall, cpu)
+        self.idle = idle
+
+    def frame_delay(self):
+        """Seconds to wait before capturing the next frame (0 while active)."""
+        if not self.idle:
+            return 0.0
+        return max(0.0, self.last_frame + self.idle_interval - time.perf_counter())
+
+    def should_infer(self, frame, captured):
+        """
+        Called for every captured BGR frame (captured: time.perf_counter()
+        seconds); returns False if hand inference can be skipped.
+        """
+        if not self.idle:
+            return True
+        if not self.motion.update(frame):
+            self.last_frame = captured
+            self.skipped_frames += 1
+            return False
+
+        # Wake up: infer this frame, full rate from the next one
+        self.wake_from = self.last_frame
+        self.wake_times.append(captured)
+        self.hand_since_wake = False
+        self.last_hand = captured - (self.idle_after - self.wake_grace)
+        self._set_idle(False)
+        return True
+
+    def observe(self, hand_found, now):
+        """Report whether inference found a hand (now: time.perf_counter() seconds)."""
+        if self.wake_from is not None:
+            self.wake_latencies.append(now - self.wake_from)
+            self.wake_from = None
+        if hand_found or self.last_hand is None:
+            self.last_hand = now
+            self.hand_since_wake = self.hand_since_wake or hand_found
+        elif not self.idle and now - self.last_hand >= self.idle_after:
+            if self.wake_times and not self.hand_since_wake:
+                self.false_wakeups += 1
+            self.hand_since_wake = True  # only count each wake-up once
+            self.motion.reset()
+            self.last_frame = now
+            self._set_idle(True)
+
+    def summary(self):
+        """Return {'active'/'idle': (wall seconds, CPU % of one core), ...}."""
+        wall, cpu = list(self._wall), list(self._cpu)
+        wall[self.idle] += time.perf_counter() - self._since[0]
+        cpu[self.idle] += time.process_time() - self._since[1]
+        summary = {}
+        for name, state in (('active', 0), ('idle', 1)):
+            summary[name] = (wall[state], 100.0 * cpu[state] / wall[state] if wall[state] else 0.0)
+        latencies = np.array(self.wake_latencies) * 1000
+        summary['wakeups'] = len(self.wake_times)
+        summary['wake_ms'] = ((latencies.mean(), latencies.max()) if len(latencies)
+                              else (0.0, 0.0))
+        return summary
+
+    def format(self):
+        summary = self.summary()
+        active, idle = summary['active'], summary['idle']
+        mean_ms, max_ms = summary['wake_ms']
+        return (f"idle: {idle[0]:.0f}s idle at {idle[1]:.1f}% CPU, {active[0]:.0f}s active at "
+                f"{active[1]:.1f}% CPU | {summary['wakeups']} wake-ups "
+                f"({self.false_wakeups} without a hand), wake latency "
+                f"{mean_ms:.0f}/{max_ms:.0f} ms | {self.skipped_frames} frames not inferred")
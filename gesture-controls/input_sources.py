@@ -0,0 +1,132 @@
+"""
+AeroTouch - Input sources
+Frame and landmark sources the controller can run against:
+
+- CameraSource: a live webcam (the default)
+- VideoFileSource: a recorded video, read as fast as it decodes
+- LandmarkTraceSource: recorded per-frame hand landmarks (.npz, or a file
+  written by trace_recorder), which skips video decoding and hand inference
+  entirely
+
+Camera and video sources share the cv2.VideoCapture interface used by the
+frame loop (isOpened/read/release). Trace sources return the landmarks of
+each frame instead of an image.
+"""
+
+import numpy as np
+
+from landmark_features import NUM_LANDMARKS
+from startup import lazy_import
+from trace_recorder import read_trace
+
+cv2 = lazy_import('cv2')  # loaded on first use
+
+FRAME_WIDTH = 640
+FRAME_HEIGHT = 480
+
+
+class CameraSource:
+    """Live webcam capture."""
+
+    def __init__(self, index=0, width=FRAME_WIDTH, height=FRAME_HEIGHT):
+        self.cap = cv2.VideoCapture(index)
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        # Keep only the newest frame queued, so a frame read after an idle
+        # pause shows the scene now rather than a few frames ago
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read(self, image=None):
+        return self.cap.read(image)
+
+    def release(self):
+        self.cap.release()
+
+
+class VideoFileSource:
+    """Recorded video file; closes itself when the last frame has been read."""
+
+    def __init__(self, path):
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise IOError(f"Cannot open video file: {path}")
+        self._exhausted = False
+
+    def isOpened(self):
+        return not self._exhausted and self.cap.isOpened()
+
+    def read(self, image=None):
+        success, frame = self.cap.read(image)
+        if not success:
+            self._exhausted = True
+        return success, frame
+
+    def release(self):
+        self.cap.release()
+
+
+def save_trace(path, landmarks, present, timestamps):
+    """
+    Save a landmark trace as a compressed .npz file.
+
+    landmarks:  (N, 21, 3) float32 normalized landmark coordinates
+    present:    (N,) bool, whether a hand was detected in the frame
+    timestamps: (N,) float64 seconds since the start of the session
+    """
+    np.savez_compressed(
+        path,
+        landmarks=np.asarray(landmarks, dtype=np.float32),
+        present=np.asarray(present, dtype=bool),
+        timestamps=np.asarray(timestamps, dtype=np.float64),
+    )
+
+
+def load_trace(path):
+    """
+    Load a trace saved by save_trace() or recorded by TraceRecorder (first
+    hand only); returns (landmarks, present, timestamps).
+    """
+    if not path.endswith('.npz'):
+        trace = read_trace(path)
+        landmarks = trace.column('landmarks')[:, 0].astype(np.float32)
+        present = trace.column('hand_counts') > 0
+        timestamps = trace.column('timestamps')
+        return landmarks, present, timestamps - timestamps[:1]
+
+    with np.load(path) as data:
+        landmarks = data['landmarks']
+        present = data['present']
+        timestamps = data['timestamps']
+    if landmarks.ndim != 3 or landmarks.shape[1:] != (NUM_LANDMARKS, 3):
+        raise ValueError(f"Invalid landmark trace {path}: landmarks shape {landmarks.shape}")
+    return landmarks, present, timestamps
+
+
+class LandmarkTraceSource:
+    """Replays a recorded landmark trace frame by frame."""
+
+    def __init__(self, path):
+        self.landmarks, self.present, self.timestamps = load_trace(path)
+        self._next = 0
+        self.timestamp = None  # trace time of the last frame read (seconds)
+
+    def __len__(self):
+        return len(self.landmarks)
+
+    def isOpened(self):
+        return self._next < len(self.landmarks)
+
+    def read(self):
+        """Return (success, hands) where hands is a list of (21, 3) arrays."""
+        if not self.isOpened():
+            return False, None
+        i = self._next
+        self._next += 1
+        self.timestamp = float(self.timestamps[i])
+        return True, [self.landmarks[i]] if self.present[i] else []
+
+    def release(self):
+        self._next = len(self.landmarks)
@@ -0,0 +1,194 @@
+"""
+AeroTouch - Vectorized landmark features
+Copies the 21 MediaPipe hand landmarks into one float32 array and derives
+every feature the gesture detectors need in a handful of vector operations:
+one matmul for all coordinate differences, then element-wise norms.
+
+All functions accept either a single hand, shape (21, 3), or a batch of
+hands, shape (N, 21, 3).
+"""
+
+from itertools import chain
+from operator import attrgetter
+
+import numpy as np
+
+# MediaPipe hand landmark indices (mp.solutions.hands.HandLandmark)
+WRIST = 0
+THUMB_CMC = 1
+THUMB_MCP = 2
+THUMB_IP = 3
+THUMB_TIP = 4
+INDEX_MCP = 5
+INDEX_PIP = 6
+INDEX_DIP = 7
+INDEX_TIP = 8
+MIDDLE_MCP = 9
+MIDDLE_PIP = 10
+MIDDLE_DIP = 11
+MIDDLE_TIP = 12
+RING_MCP = 13
+RING_PIP = 14
+RING_DIP = 15
+RING_TIP = 16
+PINKY_MCP = 17
+PINKY_PIP = 18
+PINKY_DIP = 19
+PINKY_TIP = 20
+
+NUM_LANDMARKS = 21
+
+TIPS = (THUMB_TIP, INDEX_TIP, MIDDLE_TIP, RING_TIP, PINKY_TIP)
+TIP_NAMES = ('thumb', 'index', 'middle', 'ring', 'pinky')
+
+# Vertical offsets: landmarks[a].y - landmarks[b].y (y grows downwards)
+_DY_FEATURES = [
+    ('index_dy', INDEX_TIP, INDEX_PIP),
+    ('middle_dy', MIDDLE_TIP, MIDDLE_PIP),
+    ('ring_dy', RING_TIP, RING_PIP),
+    ('pinky_dy', PINKY_TIP, PINKY_PIP),
+    ('thumb_dy_mcp', THUMB_TIP, THUMB_MCP),
+    ('thumb_dy_wrist', THUMB_TIP, WRIST),
+    ('index_dy_wrist', INDEX_TIP, WRIST),
+    ('index_dy_mcp', INDEX_TIP, INDEX_MCP),
+    ('middle_dy_index', MIDDLE_TIP, INDEX_TIP),
+    ('ring_dy_index', RING_TIP, INDEX_TIP),
+    ('pinky_dy_index', PINKY_TIP, INDEX_TIP),
+]
+
+# Horizontal gaps: abs(landmarks[a].x - landmarks[b].x)
+_DX_FEATURES = [
+    ('thumb_dx_index_mcp', THUMB_TIP, INDEX_MCP),
+]
+
+# Euclidean (x, y) distances between landmarks
+_DIST_FEATURES = [
+    (f'dist_{TIP_NAMES[i]}_{TIP_NAMES[j]}', TIPS[i], TIPS[j])
+    for i in range(len(TIPS)) for j in range(i + 1, len(TIPS))
+] + [
+    (f'wrist_{name}', WRIST, tip) for name, tip in zip(TIP_NAMES, TIPS)
+] + [
+    ('thumb_index_mcp', THUMB_TIP, INDEX_MCP),
+    ('index_length', INDEX_TIP, INDEX_MCP),
+]
+
+# Per-finger extension flags (tip above pip), 1.0 or 0.0
+_EXTENDED_FEATURES = ['index_extended', 'middle_extended', 'ring_extended', 'pinky_extended']
+
+FEATURE_NAMES = (
+    [name for name, _, _ in _DY_FEATURES]
+    + [name for name, _, _ in _DX_FEATURES]
+    + [name for name, _, _ in _DIST_FEATURES]
+    + ['cluster_radius']
+    + _EXTENDED_FEATURES
+)
+FEATURE_INDEX = {name: i for i, name in enumerate(FEATURE_NAMES)}
+NUM_FEATURES = len(FEATURE_NAMES)
+
+_DY_SLICE = slice(0, len(_DY_FEATURES))
+_DX_SLICE = slice(_DY_SLICE.stop, _DY_SLICE.stop + len(_DX_FEATURES))
+_DIST_SLICE = slice(_DX_SLICE.stop, _DX_SLICE.stop + len(_DIST_FEATURES))
+_CLUSTER_RADIUS = _DIST_SLICE.stop
+_EXTENDED_SLICE = slice(_CLUSTER_RADIUS + 1, NUM_FEATURES)
+# The first four dy features are the tip - pip offsets of index..pinky
+_FINGER_DY_SLICE = slice(0, 4)
+
+
+def _build_linear_map():
+    """
+    Every feature is a non-linear function of a few linear combinations of
+    the flattened landmarks (coordinate differences and fingertip offsets
+    from their centroid). Stack those combinations into one matrix so a
+    single matmul computes all of them.
+
+    The radial terms (horizontal gaps, distances, fingertip radii) are laid
+    out as one block of x rows followed by one block of y rows, so a single
+    hypot computes all of them; a horizontal gap is the hypot of its x
+    difference and an all-zero y row.
+    """
+    rows = []
+
+    def difference(a, b, axis):
+        row = np.zeros(NUM_LANDMARKS * 3, dtype=np.float32)
+        row[3 * a + axis] += 1.0
+        row[3 * b + axis] -= 1.0
+        rows.append(row)
+
+    for _, a, b in _DY_FEATURES:
+        difference(a, b, 1)
+    for axis in (0, 1):
+        for _, a, b in _DX_FEATURES:
+            if axis == 0:
+                difference(a, b, 0)
+            else:
+                rows.append(np.zeros(NUM_LANDMARKS * 3, dtype=np.float32))
+        for _, a, b in _DIST_FEATURES:
+            difference(a, b, axis)
+        for tip in TIPS:
+            row = np.zeros(NUM_LANDMARKS * 3, dtype=np.float32)
+            row[[3 * t + axis for t in TIPS]] -= 1.0 / len(TIPS)
+            row[3 * tip + axis] += 1.0
+            rows.append(row)
+    return np.stack(rows, axis=1)
+
+
+# (63, K) matrix: flattened landmarks -> linear combinations
+_LINEAR_MAP = _build_linear_map()
+
+# Column layout of the linear combinations: dy, then the x and y rows of
+# the radial terms (gaps and distances, which map onto the feature columns
+# _RADIAL_SLICE, then the fingertip radii)
+_NUM_RADIAL = len(_DX_FEATURES) + len(_DIST_FEATURES) + len(TIPS)
+_LIN_DY = _DY_SLICE
+_LIN_RADIAL_X = slice(_DY_SLICE.stop, _DY_SLICE.stop + _NUM_RADIAL)
+_LIN_RADIAL_Y = slice(_LIN_RADIAL_X.stop, _LIN_RADIAL_X.stop + _NUM_RADIAL)
+_RADIAL_SLICE = slice(_DX_SLICE.start, _DIST_SLICE.stop)
+_TIP_RADII = slice(_RADIAL_SLICE.stop - _RADIAL_SLICE.start, _NUM_RADIAL)
+
+_TIP_MEAN = np.full(len(TIPS), 1.0 / len(TIPS), dtype=np.float32)
+
+# Reads (x, y, z) of a landmark
+_XYZ = attrgetter('x', 'y', 'z')
+
+
+def new_landmark_array():
+    """Allocate a reusable (21, 3) float32 landmark buffer."""
+    return np.zeros((NUM_LANDMARKS, 3), dtype=np.float32)
+
+
+def new_feature_array(batch_size=None):
+    """Allocate a reusable feature buffer for one hand or a batch of hands."""
+    shape = (NUM_FEATURES,) if batch_size is None else (batch_size, NUM_FEATURES)
+    return np.zeros(shape, dtype=np.float32)
+
+
+def landmarks_to_array(hand_landmarks, out=None):
+    """Copy MediaPipe hand landmarks into a (21, 3) float32 array."""
+    if out is None:
+        out = new_landmark_array()
+    out.reshape(-1)[:] = np.fromiter(chain.from_iterable(map(_XYZ, hand_landmarks.landmark)),
+                                     dtype=np.float32, count=NUM_LANDMARKS * 3)
+    return out
+
+
+def compute_features(landmarks, out=None):
+    """
+    Compute the feature vector for one hand (21, 3) or a batch (N, 21, 3).
+    Writes into out when given and returns it.
+    """
+    landmarks = np.asarray(landmarks, dtype=np.float32)
+    flat = landmarks.reshape(landmarks.shape[:-2] + (NUM_LANDMARKS * 3,))
+    if out is None:
+        out = np.empty(landmarks.shape[:-2] + (NUM_FEATURES,), dtype=np.float32)
+
+    lin = np.dot(flat, _LINEAR_MAP)
+
+    out[..., _DY_SLICE] = lin[..., _LIN_DY]
+    radial = np.hypot(lin[..., _LIN_RADIAL_X], lin[..., _LIN_RADIAL_Y])
+    out[..., _RADIAL_SLICE] = radial[..., :_TIP_RADII.start]
+
+    # Average distance of the five fingertips from their centroid
+    out[..., _CLUSTER_RADIUS] = np.dot(radial[..., _TIP_RADII], _TIP_MEAN)
+
+    np.less(out[..., _FINGER_DY_SLICE], 0, out=out[..., _EXTENDED_SLICE])
+    return out
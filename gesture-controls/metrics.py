@@ -0,0 +1,270 @@
+"""
+AeroTouch - Latency metrics
+Per-stage latency histograms shared by every thread of the controller,
+exposed as Prometheus text on a localhost HTTP endpoint and as periodic
+JSON log lines.
+
+Durations are measured with time.perf_counter_ns() and counted in
+HDR-style histograms: microsecond values below 2 * SUB_BUCKETS get a bucket
+each, above that every power of two is split into SUB_BUCKETS buckets, so a
+bucket is never wider than ~3% of its values. The buckets are a fixed list
+covering 1 us to MAX_VALUE_US and recording is a few integer operations
+with no allocation. Each stage should be recorded from one thread at a
+time; readers work on copies.
+
+Stages recorded by the controller:
+- capture, inference, actuation, end_to_end: the frame loop stages
+  (see pipeline.StageStats)
+- convert, hands_process: color conversion/cropping and hands.process
+- gestures, draw, display: gesture handling, preview drawing, imshow/waitKey
+  (with a decimated preview: shrinking and handing off the frame, and
+  drawing plus display on the render thread)
+- output: sending mouse/keyboard events to the OS
+- capture_to_output: frame capture to its events reaching the OS
+- handoff: a camera worker's result to the coordinator (--source mode)
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+# Buckets per power of two (relative resolution 1 / SUB_BUCKETS)
+SUB_BITS = 5
+SUB_BUCKETS = 1 << SUB_BITS
+
+# Longest duration that is told apart from longer ones (~71 minutes)
+MAX_VALUE_US = (1 << 32) - 1
+
+# Quantiles reported in the JSON log and the Prometheus endpoint
+QUANTILES = (0.5, 0.9, 0.99)
+
+# Prometheus histogram bucket bounds (seconds)
+PROMETHEUS_BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.033, 0.05, 0.1, 0.2, 0.5, 1.0)
+
+METRICS_PORT = 9464
+METRICS_HOST = '127.0.0.1'
+
+
+def _index(value):
+    """Bucket index of a value in microseconds."""
+    if value < 2 * SUB_BUCKETS:
+        return value
+    shift = value.bit_length() - SUB_BITS - 1
+    return shift * SUB_BUCKETS + (value >> shift)
+
+
+def _bucket_edges():
+    """(lower, upper) microsecond bounds of every bucket as arrays."""
+    count = _index(MAX_VALUE_US) + 1
+    index = np.arange(count)
+    shift = np.maximum(index // SUB_BUCKETS - 1, 0)
+    lower = np.where(index < 2 * SUB_BUCKETS, index, (index - shift * SUB_BUCKETS) << shift)
+    return lower, lower + (1 << shift)
+
+
+BUCKET_LOWER_US, BUCKET_UPPER_US = _bucket_edges()
+BUCKETS = len(BUCKET_LOWER_US)
+
+
+class Histogram:
+    """Fixed-memory latency histogram (durations recorded in nanoseconds)."""
+
+    __slots__ = ('counts', 'count', 'total_ns', 'max_ns')
+
+    def __init__(self):
+        self.counts = [0] * BUCKETS
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record(self, duration_ns):
+        value = duration_ns // 1000
+        if value < 2 * SUB_BUCKETS:
+            index = max(value, 0)
+        elif value < MAX_VALUE_US:
+            shift = value.bit_length() - SUB_BITS - 1
+            index = shift * SUB_BUCKETS + (value >> shift)
+        else:
+            index = BUCKETS - 1
+        self.counts[index] += 1
+        self.count += 1
+        self.total_ns += duration_ns
+        if duration_ns > self.max_ns:
+            self.max_ns = duration_ns
+
+    def copy(self):
+        other = Histogram()
+        other.counts = list(self.counts)
+        other.count = self.count
+        other.total_ns = self.total_ns
+        other.max_ns = self.max_ns
+        return other
+
+    def since(self, earlier):
+        """Histogram of the values recorded after the copy `earlier` was taken."""
+        other = Histogram()
+        other.counts = [a - b for a, b in zip(self.counts, earlier.counts)]
+        other.count = self.count - earlier.count
+        other.total_ns = self.total_ns - earlier.total_ns
+        # The interval's max is only known to its bucket
+        used = np.flatnonzero(other.counts)
+        if len(used):
+            other.max_ns = min(int(BUCKET_UPPER_US[used[-1]]) * 1000, self.max_ns)
+        return other
+
+    def quantiles(self, quantiles=QUANTILES):
+        """Upper bucket bound (ns, capped at the max) at each quantile."""
+        if not self.count:
+            return [0] * len(quantiles)
+        cumulative = np.cumsum(self.counts)
+        ranks = np.ceil(np.asarray(quantiles) * self.count).clip(1, self.count)
+        upper = BUCKET_UPPER_US[np.searchsorted(cumulative, ranks)] * 1000
+        return [int(min(value, self.max_ns)) for value in upper]
+
+    def cumulative_counts(self, bounds_s):
+        """Number of values at or below each bound (seconds), bucket-accurate."""
+        cumulative = np.concatenate(([0], np.cumsum(self.counts)))
+        limits = np.searchsorted(BUCKET_UPPER_US, np.asarray(bounds_s) * 1e6, side='right')
+        return [int(c) for c in cumulative[limits]]
+
+    def mean_ns(self):
+        return self.total_ns / self.count if self.count else 0.0
+
+
+class Metrics:
+    """Named latency histograms and counters for the whole process."""
+
+    def __init__(self):
+        self.enabled = True
+        self.histograms = {}
+        self.counters = {}
+        self.frame_ns = 0  # perf_counter_ns() capture time of the frame being acted on
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def record(self, stage, duration_ns):
+        """Add a duration (nanoseconds) to a stage's histogram."""
+        if not self.enabled:
+            return
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(stage, Histogram())
+        histogram.record(duration_ns)
+
+    def count(self, name, amount=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def snapshot(self):
+        """Copies of every histogram and the counters, safe to read at leisure."""
+        with self._lock:
+            stages = list(self.histograms.items())
+        return {name: histogram.copy() for name, histogram in stages}, dict(self.counters)
+
+    def prometheus(self):
+        """Prometheus text exposition of all stages and counters."""
+        histograms, counters = self.snapshot()
+        lines = ['# HELP aerotouch_stage_seconds Duration of each frame loop stage.',
+                 '# TYPE aerotouch_stage_seconds histogram']
+        for name, histogram in sorted(histograms.items()):
+            counts = histogram.cumulative_counts(PROMETHEUS_BUCKETS)
+            for bound, count in zip(PROMETHEUS_BUCKETS, counts):
+                lines.append(f'aerotouch_stage_seconds_bucket{{stage="{name}",le="{bound:g}"}} {count}')
+            lines.append(f'aerotouch_stage_seconds_bucket{{stage="{name}",le="+Inf"}} {histogram.count}')
+            lines.append(f'aerotouch_stage_seconds_sum{{stage="{name}"}} {histogram.total_ns / 1e9:.9f}')
+            lines.append(f'aerotouch_stage_seconds_count{{stage="{name}"}} {histogram.count}')
+
+        lines += ['# HELP aerotouch_stage_quantile_seconds Stage duration quantiles since start.',
+                  '# TYPE aerotouch_stage_quantile_seconds gauge']
+        for name, histogram in sorted(histograms.items()):
+            for q, value in zip(QUANTILES + (1.0,), histogram.quantiles() + [histogram.max_ns]):
+                lines.append(f'aerotouch_stage_quantile_seconds{{stage="{name}",quantile="{q:g}"}} '
+                             f'{value / 1e9:.9f}')
+
+        for name, value in sorted(counters.items()):
+            lines.append(f'# TYPE aerotouch_{name}_total counter')
+            lines.append(f'aerotouch_{name}_total {value}')
+        lines.append('# TYPE aerotouch_start_time_seconds gauge')
+        lines.append(f'aerotouch_start_time_seconds {self.started:.3f}')
+        return '\n'.join(lines) + '\n'
+
+    def json_line(self, previous=None):
+        """
+        One JSON log line with count, mean, quantiles and max (ms) per stage,
+        over the interval since the snapshot `previous` if given. Returns
+        (line, snapshot) so the snapshot can be passed in next time.
+        """
+        snapshot = self.snapshot()
+        histograms, counters = snapshot
+        stages = {}
+        for name, histogram in sorted(histograms.items()):
+            if previous is not None and name in previous[0]:
+                histogram = histogram.since(previous[0][name])
+            if not histogram.count:
+                continue
+            stage = {'count': histogram.count, 'mean_ms': round(histogram.mean_ns() / 1e6, 3)}
+            for q, value in zip(QUANTILES, histogram.quantiles()):
+                stage[f'p{q * 100:g}_ms'] = round(value / 1e6, 3)
+            stage['max_ms'] = round(histogram.max_ns / 1e6, 3)
+            stages[name] = stage
+        line = json.dumps({'time': round(time.time(), 3), 'counters': counters, 'stages': stages})
+        return line, snapshot
+
+
+metrics = Metrics()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = metrics.prometheus().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # scrapes every few seconds would flood the console
+
+
+def serve_metrics(port=METRICS_PORT, host=METRICS_HOST):
+    """Serve /metrics in Prometheus text format on a daemon thread; returns the server."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='aerotouch-metrics', daemon=True).start()
+    return server
+
+
+class MetricsLogger:
+    """Writes metrics.json_line() to a file ('-' for stdout) every interval seconds."""
+
+    def __init__(self, path, interval):
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='aerotouch-metrics-log', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        previous = None
+        stream = None if self.path == '-' else open(self.path, 'a', buffering=1)
+        try:
+            while not self._stop.wait(self.interval):
+                line, previous = metrics.json_line(previous)
+                print(line, file=stream, flush=True)
+            line, previous = metrics.json_line(previous)
+            print(line, file=stream, flush=True)
+        finally:
+            if stream is not None:
+                stream.close()
+
+    def close(self):
+        self._stop.set()
+        self._thread.join(timeout=1.0)
@@ -0,0 +1,352 @@
+"""
+AeroTouch - Multi-camera process pool
+Runs hand inference for several cameras (or video files) at once, one
+worker process per source with its own MediaPipe Hands instance, so
+throughput is no longer capped by the GIL and a single core.
+
+Frames never leave their worker. Each worker writes the landmarks of its
+newest frame into a shared-memory ResultSlot and wakes the coordinator
+through a semaphore, so nothing is pickled per frame. Results the
+coordinator has not read yet are replaced by newer ones (counted as
+skipped), like the latest-frame buffers of the single-camera pipeline.
+
+The coordinator (the controller process) groups sources into stations. A
+station is one kiosk: it has its own HandTracker and output, and when several
+cameras watch it (e.g. wide angle plus close-up) the camera that currently
+sees a hand feeds it, staying with the one in use while it still does so
+the cursor does not jump between views.
+"""
+
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import landmark_features as lf
+from frame_path import FrameBuffers
+from idle import IDLE_FPS, IdleScheduler
+from input_sources import CameraSource, VideoFileSource
+from pipeline import detect_hands
+from startup import lazy_import, warm_up
+
+mp = lazy_import('mediapipe')  # loaded on first use, in the workers
+
+# Seconds the coordinator waits for a result before checking on the workers
+POLL_INTERVAL = 0.1
+
+# Seconds a reader waits for a write in progress (a worker that died mid-write
+# never finishes it)
+MID_WRITE_TIMEOUT = 0.05
+
+# Seconds workers get to stop on their own before they are terminated
+STOP_TIMEOUT = 2.0
+
+# Header fields of a result slot (float64 each)
+_SEQ, _HANDS, _CAPTURED, _PUBLISHED, _INFERENCE, _WIDTH, _HEIGHT = range(7)
+_HEADER_FIELDS = 8
+_HANDEDNESS_LABELS = ('Left', 'Right')
+
+
+def parse_source(spec):
+    """Split '[STATION=]CAMERA_OR_PATH' into (station or None, camera index or path)."""
+    station, _, source = spec.rpartition('=')
+    return station or None, int(source) if source.isdigit() else source
+
+
+def open_source(source):
+    """CameraSource for a camera index, VideoFileSource for a path."""
+    return CameraSource(source) if isinstance(source, int) else VideoFileSource(source)
+
+
+class SourceResult:
+    """Hand detection results of one frame of one source."""
+
+    __slots__ = ('source', 'seq', 'landmarks', 'handedness', 'captured', 'published',
+                 'received', 'inference', 'frame_size')
+
+    def __init__(self, source, seq, landmarks, handedness, captured, published, inference,
+                 frame_size):
+        self.source = source
+        self.seq = seq
+        self.landmarks = landmarks      # (hands, 21, 3) float32, mirrored
+        self.handedness = handedness    # 'Left'/'Right' per hand
+        self.captured = captured        # time.perf_counter() of the capture
+        self.published = published      # ... of the write to shared memory
+        self.received = time.perf_counter()
+        self.inference = inference      # seconds of detect_hands
+        self.frame_size = frame_size    # (width, height)
+
+
+class ResultSlot:
+    """
+    The newest hand detection results of one worker in shared memory. The
+    sequence number is odd while the worker writes, so a reader that sees it
+    odd or changed by the end of its copy reads again (a seqlock).
+    """
+
+    def __init__(self, max_hands, name=None):
+        size = 8 * (_HEADER_FIELDS + max_hands) + 4 * max_hands * lf.NUM_LANDMARKS * 3
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.max_hands = max_hands
+        buffer = self.shm.buf
+        self.header = np.ndarray(_HEADER_FIELDS, np.float64, buffer)
+        self.handedness = np.ndarray(max_hands, np.float64, buffer, 8 * _HEADER_FIELDS)
+        self.landmarks = np.ndarray((max_hands, lf.NUM_LANDMARKS, 3), np.float32, buffer,
+                                    8 * (_HEADER_FIELDS + max_hands))
+        if name is None:
+            self.header[:] = 0
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def frames(self):
+        """Frames written so far."""
+        return int(self.header[_SEQ]) // 2
+
+    @property
+    def mid_write(self):
+        """Whether a write is in progress (or was cut short)."""
+        return int(self.header[_SEQ]) % 2 == 1
+
+    def write(self, results, captured, inference, frame_size):
+        """Publish the (mirrored) MediaPipe results of a frame."""
+        header = self.header
+        seq = header[_SEQ]
+        header[_SEQ] = seq + 1
+        detected = (results.multi_hand_landmarks or [])[:self.max_hands]
+        for i, hand_landmarks in enumerate(detected):
+            lf.landmarks_to_array(hand_landmarks, out=self.landmarks[i])
+        self.handedness[:] = -1
+        for i, handedness in enumerate((results.multi_handedness or [])[:len(detected)]):
+            self.handedness[i] = _HANDEDNESS_LABELS.index(handedness.classification[0].label)
+        header[_HANDS] = len(detected)
+        header[_CAPTURED] = captured
+        header[_INFERENCE] = inference
+        header[_WIDTH], header[_HEIGHT] = frame_size
+        header[_PUBLISHED] = time.perf_counter()
+        header[_SEQ] = seq + 2
+
+    def read(self, source, last_seq, timeout=MID_WRITE_TIMEOUT):
+        """
+        Return a SourceResult if one newer than last_seq was published, else
+        None (also when a write is still in progress after timeout seconds).
+        """
+        header = self.header
+        deadline = None
+        while True:
+            seq = int(header[_SEQ])
+            if seq <= last_seq:
+                return None
+            if seq % 2:
+                # Mid-write; the worker is done in microseconds unless it died
+                now = time.perf_counter()
+                if deadline is None:
+                    deadline = now + timeout
+                elif now > deadline:
+                    return None
+                time.sleep(0)
+                continue
+            count = int(header[_HANDS])
+            landmarks = self.landmarks[:count].copy()
+            handedness = [_HANDEDNESS_LABELS[int(h)] if h >= 0 else None
+                          for h in self.handedness[:count]]
+            fields = header.copy()
+            if int(header[_SEQ]) == seq:
+                return SourceResult(source, seq, landmarks, handedness, fields[_CAPTURED],
+                                    fields[_PUBLISHED], fields[_INFERENCE],
+                                    (int(fields[_WIDTH]), int(fields[_HEIGHT])))
+
+    def close(self, unlink=False):
+        # Drop the views before the mapping goes away
+        self.header = self.handedness = self.landmarks = None
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+def _run_worker(source, slot_name, max_hands, idle_after, idle_fps, notify, stop):
+    """Worker process: capture and infer one source until it ends or stop is set."""
+    slot = ResultSlot(max_hands, slot_name)
+    cap = open_source(source)
+    scheduler = None
+    if idle_after > 0 and isinstance(source, int):
+        scheduler = IdleScheduler(idle_after, idle_fps)
+    buffers = FrameBuffers()
+    try:
+        with mp.solutions.hands.Hands(model_complexity=0, min_detection_confidence=0.7,
+                                      min_tracking_confidence=0.7,
+                                      max_num_hands=max_hands) as hands:
+            warm_up(hands)
+            while not stop.is_set() and cap.isOpened():
+                if scheduler is not None and scheduler.idle:
+                    stop.wait(scheduler.frame_delay())
+                success, frame = buffers.read(cap)
+                if not success:
+                    if not cap.isOpened():
+                        break  # End of a video file
+                    print(f"Failed to read from camera {source}")
+                    continue
+                captured = time.perf_counter()
+                results = detect_hands(hands, frame, buffers, scheduler, captured)
+                slot.write(results, captured, time.perf_counter() - captured,
+                           (frame.shape[1], frame.shape[0]))
+                notify.release()
+    finally:
+        cap.release()
+        slot.close()
+        notify.release()
+
+
+class CameraPool:
+    """One hand inference worker process per source, read through shared memory."""
+
+    def __init__(self, sources, max_hands=1, idle_after=0.0, idle_fps=IDLE_FPS):
+        # Spawned workers do not inherit the controller's threads and windows
+        context = multiprocessing.get_context('spawn')
+        self.sources = list(sources)
+        self.slots = [ResultSlot(max_hands) for _ in self.sources]
+        self.notify = context.Semaphore(0)
+        self.stop = context.Event()
+        self.processes = [
+            context.Process(target=_run_worker, name=f'aerotouch-camera-{i}', daemon=True,
+                            args=(source, slot.name, max_hands, idle_after, idle_fps,
+                                  self.notify, self.stop))
+            for i, (source, slot) in enumerate(zip(self.sources, self.slots))]
+        self.last_seq = [0] * len(self.sources)
+        self.received = [0] * len(self.sources)
+        self.skipped = [0] * len(self.sources)
+        self.inference = [0.0] * len(self.sources)
+        self.handoff = [0.0] * len(self.sources)
+        self.failed = {}  # source index -> exit code of a worker that died
+        self._closed = False
+
+    def start(self):
+        for process in self.processes:
+            process.start()
+        return self
+
+    def results(self):
+        """Yield every SourceResult as the workers publish them, until all have stopped."""
+        while True:
+            self.notify.acquire(timeout=POLL_INTERVAL)
+            found = False
+            for index, slot in enumerate(self.slots):
+                if index in self.failed:
+                    continue
+                result = slot.read(index, self.last_seq[index])
+                if result is None:
+                    self._check_worker(index)
+                    continue
+                found = True
+                self.skipped[index] += (result.seq - self.last_seq[index]) // 2 - 1
+                self.last_seq[index] = result.seq
+                self.received[index] += 1
+                self.inference[index] += result.inference
+                self.handoff[index] += result.received - result.published
+                yield result
+            if not found and not any(process.is_alive() for process in self.processes):
+                return
+
+    def _check_worker(self, index):
+        """Report and skip a source whose worker died mid-write or with an error."""
+        process = self.processes[index]
+        if process.is_alive() or not (self.slots[index].mid_write or process.exitcode):
+            return
+        self.failed[index] = process.exitcode
+        print(f"Camera worker for source {index} ({self.sources[index]}) died "
+              f"(exit code {process.exitcode}); skipping it")
+
+    def close(self):
+        """Stop the workers and release the shared memory."""
+        if self._closed:
+            return
+        self._closed = True
+        self.stop.set()
+        deadline = time.perf_counter() + STOP_TIMEOUT
+        for process in self.processes:
+            if process.pid is not None:
+                process.join(max(0.0, deadline - time.perf_counter()))
+                if process.is_alive():
+                    process.terminate()
+                    process.join()
+        for slot in self.slots:
+            slot.close(unlink=True)
+
+    def format(self):
+        lines = []
+        for index, source in enumerate(self.sources):
+            received = max(self.received[index], 1)
+            line = (f"  source {index} ({source}): {self.received[index]} frames, "
+                    f"{self.skipped[index]} skipped, inference "
+                    f"{self.inference[index] / received * 1000:.1f} ms, handoff "
+                    f"{self.handoff[index] / received * 1e6:.0f} us")
+            if index in self.failed:
+                line += f", worker died (exit code {self.failed[index]})"
+            lines.append(line)
+        return "camera pool:\n" + "\n".join(lines)
+
+
+class Station:
+    """
+    One kiosk watched by one or more sources: a HandTracker fed by whichever
+    of its cameras sees a hand, and the output its gestures drive.
+    """
+
+    def __init__(self, name, sources, make_tracker, backend=None, bridge=None):
+        self.name = name
+        self.sources = list(sources)
+        self.make_tracker = make_tracker
+        self.tracker = make_tracker()
+        self.backend = backend
+        self.bridge = bridge
+        self.active = None   # source currently feeding the tracker
+        self.seen = {}       # source -> whether its newest frame had a hand
+        self.switches = 0
+        self.frames = 0
+        self.gestures = {}   # gesture -> times started
+
+    def accept(self, result):
+        """Whether result's source feeds the tracker (switching to it if the active one lost the hand)."""
+        found = len(result.landmarks) > 0
+        self.seen[result.source] = found
+        if result.source != self.active:
+            if self.active is not None and (not found or self.seen.get(self.active)):
+                return False
+            if self.active is not None:
+                # Another view: its coordinates do not continue the old tracks
+                self.switches += 1
+                self.tracker = self.make_tracker()
+            self.active = result.source
+        self.frames += 1
+        return True
+
+    def count_events(self, tracked):
+        for hand in tracked:
+            for event in hand.states.events:
+                if event.kind == 'start':
+                    self.gestures[event.gesture] = self.gestures.get(event.gesture, 0) + 1
+
+    def format(self):
+        started = ", ".join(f"{name} {count}" for name, count in sorted(self.gestures.items()))
+        return (f"station {self.name} (sources {', '.join(map(str, self.sources))}): "
+                f"{self.frames} frames handled, {self.switches} camera switches, "
+                f"gestures started: {started or 'none'}")
+
+
+def make_stations(specs, make_tracker):
+    """
+    Group '[STATION=]CAMERA_OR_PATH' specs into stations; returns (sources,
+    stations). Sources without a station name get a station of their own.
+    """
+    sources, members = [], {}
+    for index, spec in enumerate(specs):
+        name, source = parse_source(spec)
+        sources.append(source)
+        members.setdefault(name or str(index), []).append(index)
+    return sources, [Station(name, indices, make_tracker) for name, indices in members.items()]
@@ -0,0 +1,308 @@
+"""
+AeroTouch - Staged frame pipeline
+Runs capture, hand inference and actuation/rendering as separate stages so a
+slow stage no longer holds up the others.
+
+Stages:
+- Capture thread: grabs frames into a latest-frame-wins buffer
+- Inference thread: preprocesses the newest frame and runs hands.process
+- Actuation/render (caller's thread): performs gestures and shows the preview
+
+Stages are connected by bounded buffers that drop stale items instead of
+backing up, and every stage reports its own timing. With an IdleScheduler
+(idle.py) the capture stage slows down and inference is skipped while no
+hand is around.
+"""
+
+import threading
+import time
+from collections import deque
+from types import SimpleNamespace
+
+from frame_path import FrameBuffers, mirror_results
+from metrics import metrics
+
+# Number of inference results allowed to wait for the actuation stage
+RESULT_QUEUE_SIZE = 1
+
+# Seconds between periodic timing reports
+REPORT_INTERVAL = 5.0
+
+# Result returned for frames where detection was skipped
+NO_HANDS = SimpleNamespace(multi_hand_landmarks=None, multi_handedness=None)
+
+
+class LatestFrameBuffer:
+    """Single-slot buffer where a new item always replaces the pending one."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._item = None
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if self._item is not None:
+                self.dropped += 1
+            self._item = item
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Return the newest item, or None on timeout or after close()."""
+        with self._cond:
+            if self._item is None and not self._closed:
+                self._cond.wait(timeout)
+            item, self._item = self._item, None
+            return item
+
+    @property
+    def closed(self):
+        """True once close() was called and the pending item was consumed."""
+        with self._cond:
+            return self._closed and self._item is None
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class DropOldestQueue:
+    """Bounded FIFO that discards its oldest item when full."""
+
+    def __init__(self, maxsize):
+        self._cond = threading.Condition()
+        self._items = deque()
+        self._maxsize = maxsize
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if len(self._items) >= self._maxsize:
+                self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Return the oldest item, or None on timeout or after close()."""
+        with self._cond:
+            if not self._items and not self._closed:
+                self._cond.wait(timeout)
+            return self._items.popleft() if self._items else None
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class StageStats:
+    """
+    Accumulates per-stage durations (in nanoseconds) and frame counts, and
+    feeds them to the process-wide latency histograms (metrics.py).
+    """
+
+    def __init__(self, stages):
+        self.stages = list(stages)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._total = {name: 0 for name in self.stages}
+            self._max = {name: 0 for name in self.stages}
+            self._count = {name: 0 for name in self.stages}
+            self._started = time.perf_counter()
+            self._last_frame = self._started
+            self.frames = 0
+
+    def add(self, stage, duration_ns):
+        metrics.record(stage, duration_ns)
+        with self._lock:
+            self._total[stage] += duration_ns
+            self._count[stage] += 1
+            if duration_ns > self._max[stage]:
+                self._max[stage] = duration_ns
+
+    def frame_done(self):
+        metrics.count('frames')
+        with self._lock:
+            self.frames += 1
+            self._last_frame = time.perf_counter()
+
+    def summary(self):
+        """Return {'fps': ..., stage: (mean_ms, max_ms, count), ...}."""
+        with self._lock:
+            elapsed = self._last_frame - self._started
+            summary = {'fps': self.frames / elapsed if elapsed > 0 else 0.0}
+            for name in self.stages:
+                count = self._count[name]
+                mean_ms = self._total[name] / count / 1e6 if count else 0.0
+                summary[name] = (mean_ms, self._max[name] / 1e6, count)
+            return summary
+
+    def format(self, label):
+        summary = self.summary()
+        parts = [f"{label}: {summary['fps']:.1f} fps"]
+        for name in self.stages:
+            mean_ms, max_ms, count = summary[name]
+            parts.append(f"{name} {mean_ms:.2f}/{max_ms:.2f} ms (n={count})")
+        return " | ".join(parts)
+
+
+def detect_hands(hands, frame, buffers, scheduler=None, captured=None):
+    """
+    Run hand inference on a BGR frame (or not at all while an IdleScheduler
+    sees no reason to) and return the results with mirrored landmarks.
+    captured is the frame's time.perf_counter() capture time.
+    """
+    if scheduler is not None and not scheduler.should_infer(frame, captured):
+        return NO_HANDS
+
+    # Convert BGR to RGB and process hand detection
+    start = time.perf_counter_ns()
+    rgb_frame = buffers.to_rgb(frame)
+    converted = time.perf_counter_ns()
+    results = hands.process(rgb_frame)
+    metrics.record('convert', converted - start)
+    metrics.record('hands_process', time.perf_counter_ns() - converted)
+    # Mirror the landmarks instead of flipping every frame
+    mirror_results(results)
+
+    if scheduler is not None:
+        scheduler.observe(bool(results.multi_hand_landmarks), time.perf_counter())
+    return results
+
+
+class FramePacket:
+    """A frame moving through the pipeline with its timestamps."""
+
+    __slots__ = ('frame', 'results', 'captured_ns', 'inferred_ns')
+
+    def __init__(self, frame, captured_ns):
+        self.frame = frame
+        self.results = None
+        self.captured_ns = captured_ns
+        self.inferred_ns = 0
+
+
+class CaptureThread(threading.Thread):
+    """Reads frames from the camera as fast as it delivers them (slower while idle)."""
+
+    def __init__(self, cap, out_buffer, stats, stop_event, scheduler=None):
+        super().__init__(name='aerotouch-capture', daemon=True)
+        self.cap = cap
+        self.out_buffer = out_buffer
+        self.stats = stats
+        self.stop_event = stop_event
+        self.scheduler = scheduler
+
+    def run(self):
+        while not self.stop_event.is_set() and self.cap.isOpened():
+            if self.scheduler is not None and self.scheduler.idle:
+                self.stop_event.wait(self.scheduler.frame_delay())
+            start = time.perf_counter_ns()
+            success, frame = self.cap.read()
+            if not success:
+                if not self.cap.isOpened():
+                    break  # End of a video file
+                print("Failed to read from camera")
+                continue
+            end = time.perf_counter_ns()
+            self.stats.add('capture', end - start)
+            self.out_buffer.put(FramePacket(frame, end))
+        self.out_buffer.close()
+
+
+class InferenceThread(threading.Thread):
+    """Converts and runs hand detection on the newest frame."""
+
+    def __init__(self, hands, in_buffer, out_queue, stats, stop_event, scheduler=None):
+        super().__init__(name='aerotouch-inference', daemon=True)
+        self.hands = hands
+        self.scheduler = scheduler
+        self.buffers = FrameBuffers()
+        self.in_buffer = in_buffer
+        self.out_queue = out_queue
+        self.stats = stats
+        self.stop_event = stop_event
+
+    def run(self):
+        while not self.stop_event.is_set():
+            packet = self.in_buffer.get(timeout=0.1)
+            if packet is None:
+                if self.in_buffer.closed:
+                    break
+                continue
+            start = time.perf_counter_ns()
+
+            packet.results = detect_hands(self.hands, packet.frame, self.buffers, self.scheduler,
+                                          packet.captured_ns / 1e9)
+
+            packet.inferred_ns = time.perf_counter_ns()
+            self.stats.add('inference', packet.inferred_ns - start)
+            self.out_queue.put(packet)
+        self.out_queue.close()
+
+
+def run_pipelined(cap, hands, handle_packet, report_interval=REPORT_INTERVAL,
+                  scheduler=None):
+    """
+    Run the staged pipeline until handle_packet returns False.
+
+    handle_packet(packet) runs on the calling thread (so imshow and input
+    injection stay on the main thread) and performs actuation and rendering
+    for one inferred frame. scheduler is an optional IdleScheduler for the
+    capture and inference stages.
+    """
+    stats = StageStats(['capture', 'inference', 'actuation', 'end_to_end'])
+    stop_event = threading.Event()
+    frame_buffer = LatestFrameBuffer()
+    result_queue = DropOldestQueue(RESULT_QUEUE_SIZE)
+
+    capture = CaptureThread(cap, frame_buffer, stats, stop_event, scheduler)
+    inference = InferenceThread(hands, frame_buffer, result_queue, stats, stop_event,
+                                scheduler)
+    capture.start()
+    inference.start()
+
+    last_report = time.perf_counter()
+    try:
+        while True:
+            packet = result_queue.get(timeout=0.1)
+            if packet is None:
+                # Stop once the source ran dry and every result was handled
+                if not inference.is_alive():
+                    break
+                continue
+            start = time.perf_counter_ns()
+            keep_running = handle_packet(packet)
+            end = time.perf_counter_ns()
+            stats.add('actuation', end - start)
+            stats.add('end_to_end', end - packet.captured_ns)
+            stats.frame_done()
+
+            if not keep_running:
+                break
+
+            if report_interval and time.perf_counter() - last_report >= report_interval:
+                print(stats.format('pipeline'))
+                print(f"  dropped: {frame_buffer.dropped} frames, "
+                      f"{result_queue.dropped} results")
+                if scheduler is not None:
+                    print(scheduler.format())
+                last_report = time.perf_counter()
+    finally:
+        stop_event.set()
+        frame_buffer.close()
+        result_queue.close()
+        capture.join(timeout=1.0)
+        inference.join(timeout=1.0)
+
+    print(stats.format('pipeline'))
+    if scheduler is not None:
+        print(scheduler.format())
+    return stats
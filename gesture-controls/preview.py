@@ -0,0 +1,260 @@
+"""
+AeroTouch - Preview rendering
+The operator preview: the mirrored camera frame with the tracked hands'
+skeletons and the current gesture on top. Modes (--preview):
+
+- full: every frame is drawn and shown from the frame loop
+- decimated: every Nth frame is shrunk and handed to a render thread that
+  mirrors, draws and shows it; the frame loop only pays for the resize, and
+  frames are skipped while the thread is still busy with an earlier one
+- off: nothing is drawn or shown
+
+The overlay draws the skeletons of all hands with a single cv2.polylines
+call (every connection a two-point polyline) and stamps the joints into the
+image with one NumPy assignment, instead of MediaPipe's draw_landmarks (a
+cv2.line per connection and two cv2.circle per landmark, per hand). Lines
+and text are one pixel thick: OpenCV draws thicker ones with a round brush,
+several times slower.
+
+In decimated mode every HighGUI call (window, imshow, waitKey) is made on
+the render thread. OpenCV's Qt and GTK backends allow that on Linux; macOS
+only allows windows on the main thread, so use full mode there.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+import landmark_features as lf
+from frame_path import FrameBuffers, _reuse
+from metrics import metrics
+from pipeline import LatestFrameBuffer
+from startup import lazy_import
+
+cv2 = lazy_import('cv2')  # loaded on first use
+
+PREVIEW_MODES = ('off', 'decimated', 'full')
+
+# Decimated mode: render every DECIMATE_EVERY-th frame at DECIMATE_SCALE
+DECIMATE_EVERY = 3
+DECIMATE_SCALE = 0.5
+
+# Title of the preview window
+PREVIEW_WINDOW = 'AeroTouch - Gesture Controller'
+
+# Seconds the render thread waits for a frame before letting the window
+# handle its events anyway
+RENDER_POLL = 0.1
+
+# Frame width the text sizes and positions are meant for (scaled to others)
+TEXT_WIDTH = 640
+
+# Skeleton and joint colors (BGR), and joint radius (pixels) at TEXT_WIDTH
+CONNECTION_COLOR = (224, 224, 224)
+JOINT_COLOR = (48, 48, 255)
+JOINT_RADIUS = 2
+
+# MediaPipe's 21 hand connections, as chains of landmarks
+_CHAINS = [
+    [lf.WRIST, 1, 2, 3, lf.THUMB_TIP],
+    [lf.WRIST, lf.INDEX_MCP, 6, 7, lf.INDEX_TIP],
+    [lf.MIDDLE_MCP, 10, 11, lf.MIDDLE_TIP],
+    [lf.RING_MCP, 14, 15, lf.RING_TIP],
+    [lf.WRIST, lf.PINKY_MCP, 18, 19, lf.PINKY_TIP],
+    [lf.INDEX_MCP, lf.MIDDLE_MCP, lf.RING_MCP, lf.PINKY_MCP],
+]
+CONNECTIONS = np.array([(a, b) for chain in _CHAINS for a, b in zip(chain, chain[1:])],
+                       dtype=np.intp)
+
+
+def _joint_offsets(radius):
+    """(x, y) pixel offsets of the points of a joint's square."""
+    steps = np.arange(-radius, radius + 1)
+    return np.tile(steps, len(steps)), np.repeat(steps, len(steps))
+
+
+def draw_hands(frame, landmarks, radius=JOINT_RADIUS):
+    """
+    Draw the skeletons of hands (N, 21, >=2 normalized coordinates) on a
+    C-contiguous BGR frame.
+    """
+    if not len(landmarks):
+        return frame
+    height, width = frame.shape[:2]
+    points = np.rint(landmarks[..., :2] * (width, height)).astype(np.int32)
+    cv2.polylines(frame, points[:, CONNECTIONS].reshape(-1, 2, 2), False, CONNECTION_COLOR)
+
+    # Joints: squares around the landmarks inside the frame, cut off at its
+    # edges (each coordinate clipped on its own, so nothing wraps to the
+    # next row or piles up in a corner)
+    joints = points.reshape(-1, 2)
+    joints = joints[(joints >= 0).all(axis=1) & (joints[:, 0] < width) & (joints[:, 1] < height)]
+    dx, dy = _joint_offsets(radius)
+    xs = np.clip(joints[:, :1] + dx, 0, width - 1)
+    ys = np.clip(joints[:, 1:] + dy, 0, height - 1)
+    frame[ys, xs] = JOINT_COLOR
+    return frame
+
+
+class Overlay:
+    """What the preview shows on top of one frame."""
+
+    __slots__ = ('landmarks', 'labels', 'gesture', 'color', 'idle')
+
+    def __init__(self, landmarks, labels=(), gesture="None", color=(128, 128, 128), idle=False):
+        self.landmarks = landmarks  # (N, 21, 3) in mirrored image coordinates
+        self.labels = labels        # (text, (x, y) normalized) per hand
+        self.gesture = gesture
+        self.color = color
+        self.idle = idle
+
+
+def draw_overlay(frame, overlay):
+    """Draw an Overlay on a (mirrored) BGR frame of any size."""
+    height, width = frame.shape[:2]
+    size = width / TEXT_WIDTH
+    draw_hands(frame, overlay.landmarks, max(1, round(JOINT_RADIUS * size)))
+    for text, (x, y) in overlay.labels:
+        cv2.putText(frame, text, (int(x * width), int(y * height)),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7 * size, (255, 255, 0), 1)
+    cv2.putText(frame, f"Gesture: {overlay.gesture}", (round(10 * size), round(30 * size)),
+                cv2.FONT_HERSHEY_SIMPLEX, size, overlay.color, 1)
+    if overlay.idle:
+        cv2.putText(frame, "Idle", (width - round(70 * size), round(30 * size)),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7 * size, (128, 128, 128), 1)
+    cv2.putText(frame, "Press 'q' to quit", (round(10 * size), height - round(10 * size)),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.5 * size, (255, 255, 255), 1)
+    return frame
+
+
+def show_window(window, frame):
+    """Show a frame in a HighGUI window; returns False when 'q' was pressed."""
+    cv2.imshow(window, frame)
+    return not (cv2.waitKey(1) & 0xFF == ord('q'))
+
+
+class PreviewRenderer:
+    """
+    Draws and shows the preview in one of PREVIEW_MODES. Call due() once
+    per frame; if it returns True, pass the frame to render() (full) or
+    submit() (decimated). show(window, frame) displays a frame and returns
+    False on quit; replace it to render without a window.
+    """
+
+    def __init__(self, mode='full', every=DECIMATE_EVERY, scale=DECIMATE_SCALE,
+                 window=PREVIEW_WINDOW, show=show_window):
+        if mode not in PREVIEW_MODES:
+            raise ValueError(f"Unknown preview mode {mode!r} (choose from {', '.join(PREVIEW_MODES)})")
+        self.mode = mode
+        self.every = max(1, every)
+        self.scale = scale
+        self.window = window
+        self.show = show
+        self.frames = 0
+        self.rendered = 0
+        self.skipped = 0  # due frames dropped while the render thread was busy
+        self.render_ns = 0
+        self._quit = threading.Event()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._small = None
+        self._slot = None
+        self._thread = None
+
+    @property
+    def quit(self):
+        """True once the user asked to quit from the preview window."""
+        return self._quit.is_set()
+
+    def due(self):
+        """Whether the current frame is to be previewed (advances the frame count)."""
+        if self.mode == 'off':
+            return False
+        self.frames += 1
+        if self.mode == 'full':
+            return True
+        if (self.frames - 1) % self.every:
+            return False
+        if not self._idle.is_set():
+            self.skipped += 1
+            return False
+        return True
+
+    def render(self, frame, overlay, draw_ns=0):
+        """
+        Draw an overlay on a mirrored frame and show it here (full mode).
+        draw_ns is time already spent on the frame (mirroring, markers) that
+        counts as drawing. Returns False once the user asked to quit.
+        """
+        start = time.perf_counter_ns()
+        draw_overlay(frame, overlay)
+        drawn = time.perf_counter_ns()
+        metrics.record('draw', drawn - start + draw_ns)
+        if not self.show(self.window, frame):
+            self._quit.set()
+        end = time.perf_counter_ns()
+        metrics.record('display', end - drawn)
+        self.rendered += 1
+        self.render_ns += end - start + draw_ns
+        return not self.quit
+
+    def submit(self, frame, overlay):
+        """
+        Hand a shrunk copy of an unflipped frame and its overlay to the
+        render thread (decimated mode). Returns False once the user asked
+        to quit.
+        """
+        start = time.perf_counter_ns()
+        height, width = frame.shape[:2]
+        size = (max(1, round(width * self.scale)), max(1, round(height * self.scale)))
+        shape = (size[1], size[0]) + frame.shape[2:]
+        self._small = cv2.resize(frame, size, dst=_reuse(self._small, shape, frame.dtype),
+                                 interpolation=cv2.INTER_NEAREST)
+        if self._thread is None:
+            self._slot = LatestFrameBuffer()
+            self._thread = threading.Thread(target=self._run, name='aerotouch-preview',
+                                            daemon=True)
+            self._thread.start()
+        self._idle.clear()
+        self._slot.put((self._small, overlay))
+        metrics.record('draw', time.perf_counter_ns() - start)
+        return not self.quit
+
+    def _run(self):
+        buffers = FrameBuffers()
+        window = self.show is show_window
+        while not self._slot.closed:
+            item = self._slot.get(RENDER_POLL)
+            if item is None:
+                # Keep the window responsive between frames
+                if window and self.rendered and cv2.waitKey(1) & 0xFF == ord('q'):
+                    self._quit.set()
+                continue
+            small, overlay = item
+            start = time.perf_counter_ns()
+            frame = buffers.mirrored(small)
+            self._idle.set()  # the small frame may be overwritten from here on
+            draw_overlay(frame, overlay)
+            if not self.show(self.window, frame):
+                self._quit.set()
+            elapsed = time.perf_counter_ns() - start
+            metrics.record('display', elapsed)
+            self.rendered += 1
+            self.render_ns += elapsed
+        if window and self.rendered:
+            cv2.destroyWindow(self.window)
+
+    def close(self):
+        """Stop the render thread (if any) and wait for it."""
+        if self._thread is not None:
+            self._slot.close()
+            self._thread.join()
+            self._thread = None
+
+    def format(self):
+        mean = self.render_ns / self.rendered / 1e6 if self.rendered else 0.0
+        text = f"preview {self.mode}: {self.rendered}/{self.frames} frames rendered"
+        if self.mode == 'decimated':
+            text += f" (1 in {self.every} at {self.scale:g}x, {self.skipped} skipped busy)"
+        return text + f", {mean:.2f} ms each"
@@ -0,0 +1,108 @@
+"""
+AeroTouch - Headless replay benchmark
+Replays a recorded session as fast as possible, with no preview window and
+mouse events recorded instead of sent, and reports frames/sec for the full
+pipeline and for the classification stage alone. Needs no camera or display.
+
+Usage:
+    python replay_benchmark.py session.mp4 [--save-trace session.npz]
+    python replay_benchmark.py session.npz
+    python replay_benchmark.py kiosk.aetrace
+"""
+
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+import gesture_controller as gc
+import landmark_features as lf
+from actuation import RecordingBackend
+from frame_path import FrameBuffers, mirror_results
+from gesture_registry import registry
+from input_sources import LandmarkTraceSource, VideoFileSource, load_trace, save_trace
+from trace_recorder import is_trace
+
+
+def open_hands():
+    """Hands instance with the same settings as the live controller."""
+    return gc.mp_hands.Hands(
+        model_complexity=0,
+        min_detection_confidence=0.7,
+        min_tracking_confidence=0.7,
+        max_num_hands=1
+    )
+
+
+def extract_trace(path):
+    """Run hand inference over a video file; returns (landmarks, present, timestamps)."""
+    source = VideoFileSource(path)
+    buffers = FrameBuffers()
+    landmarks, present, timestamps = [], [], []
+    with open_hands() as hands:
+        while source.isOpened():
+            success, frame = buffers.read(source)
+            if not success:
+                break
+            results = mirror_results(hands.process(buffers.to_rgb(frame)))
+            timestamps.append(source.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0)
+            if results.multi_hand_landmarks:
+                landmarks.append(lf.landmarks_to_array(results.multi_hand_landmarks[0]))
+                present.append(True)
+            else:
+                landmarks.append(lf.new_landmark_array())
+                present.append(False)
+    source.release()
+    return np.array(landmarks, dtype=np.float32), np.array(present), np.array(timestamps)
+
+
+def benchmark_classification(landmarks, present):
+    """Return (per-frame fps, batched fps) for features + registry classification."""
+    hands_landmarks = landmarks[present]
+    if len(hands_landmarks) == 0:
+        return 0.0, 0.0
+
+    features = lf.new_feature_array()
+    start = time.perf_counter()
+    for hand in hands_landmarks:
+        registry.classify(lf.compute_features(hand, out=features))
+    per_frame = len(hands_landmarks) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    registry.classify_batch(lf.compute_features(hands_landmarks))
+    batched = len(hands_landmarks) / (time.perf_counter() - start)
+    return per_frame, batched
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('session', help="video file, or landmark trace (.npz from --save-trace "
+                                        "or a file recorded with --record)")
+    parser.add_argument('--save-trace', metavar='PATH',
+                        help="save the landmarks extracted from a video as a trace")
+    args = parser.parse_args()
+
+    gc.use_backend(RecordingBackend())
+
+    if args.session.endswith('.npz') or is_trace(args.session):
+        full = gc.run_trace(LandmarkTraceSource(args.session))
+        landmarks, present, _ = load_trace(args.session)
+    else:
+        with open_hands() as hands:
+            full = gc.run_serial(VideoFileSource(args.session), hands, preview=False)
+        landmarks, present, timestamps = extract_trace(args.session)
+        if args.save_trace:
+            save_trace(args.save_trace, landmarks, present, timestamps)
+            print(f"Saved trace: {args.save_trace}")
+
+    per_frame, batched = benchmark_classification(landmarks, present)
+    print(f"frames:                 {len(landmarks)} ({int(present.sum())} with a hand)")
+    print(f"full pipeline:          {full.summary()['fps']:10.1f} fps")
+    print(f"classification:         {per_frame:10.1f} fps")
+    print(f"classification (batch): {batched:10.1f} fps")
+    print(f"mouse events:           {gc.backend.counts()}")
+
+
+if __name__ == "__main__":
+    main()
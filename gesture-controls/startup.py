@@ -0,0 +1,109 @@
+"""
+AeroTouch - Startup
+Gets the controller from launch to the first gesture quickly:
+
+- lazy_import(): OpenCV and MediaPipe are only loaded when first used, so
+  the gesture detectors, trace tools and benchmarks import without them
+  (and without a display)
+- Startup: runs the slow start-up steps (opening the camera, loading and
+  warming up the hand model, connecting the mouse output) on threads at
+  the same time, and records when each of them and the first frame, hand
+  and gesture arrived (time-to-first-gesture)
+- warm_up(): runs the hand model on blank frames, so the first camera frame
+  does not pay for its initialization
+"""
+
+import importlib
+import sys
+import threading
+import time
+import types
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# time.perf_counter() when the controller started loading (imported first for
+# that, so this module only uses the standard library at import time)
+LAUNCHED = time.perf_counter()
+
+# Blank frames run through the hand model before the camera's
+WARM_UP_FRAMES = 2
+
+_copy_lock = threading.Lock()
+
+
+class _LazyModule(types.ModuleType):
+    """Stands in for a module until an attribute is used, then becomes a copy of it."""
+
+    def __getattr__(self, name):
+        # The import system makes concurrent imports wait for each other
+        module = importlib.import_module(self.__name__)
+        with _copy_lock:
+            if not self.__dict__.get('_lazy_loaded'):
+                # Later lookups find the module's attributes directly
+                self.__dict__.update(module.__dict__)
+                self.__dict__['_lazy_loaded'] = True
+        return getattr(module, name)
+
+
+def lazy_import(name):
+    """The module called name, imported when one of its attributes is first used."""
+    module = sys.modules.get(name)
+    return module if module is not None else _LazyModule(name)
+
+
+def warm_up(hands, size=(480, 640), frames=WARM_UP_FRAMES):
+    """Run a MediaPipe Hands instance on blank RGB frames of size (height, width)."""
+    import numpy as np
+
+    blank = np.zeros(size + (3,), dtype=np.uint8)
+    blank.flags.writeable = False
+    for _ in range(frames):
+        hands.process(blank)
+    return hands
+
+
+class Startup:
+    """
+    Runs start-up steps concurrently (or one after another when submitted,
+    for comparison) and records milestones in seconds since started (by
+    default when this module was first imported).
+    """
+
+    def __init__(self, started=LAUNCHED, concurrent=True):
+        self.started = started
+        self.times = {}
+        self._futures = {}
+        self._executor = None
+        if concurrent:
+            self._executor = ThreadPoolExecutor(thread_name_prefix='aerotouch-startup')
+
+    def mark(self, milestone):
+        """Record the first time a milestone was reached."""
+        if milestone not in self.times:
+            self.times[milestone] = time.perf_counter() - self.started
+
+    def submit(self, name, function, *args):
+        """Start function(*args) on a thread; its end is recorded as milestone name."""
+        def step():
+            result = function(*args)
+            self.mark(name)
+            return result
+        if self._executor is not None:
+            self._futures[name] = self._executor.submit(step)
+            return
+        future = self._futures[name] = Future()
+        try:
+            future.set_result(step())
+        except Exception as error:
+            future.set_exception(error)
+
+    def result(self, name):
+        """Wait for a submitted step and return its result (or raise its exception)."""
+        return self._futures.pop(name).result()
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+    def format(self):
+        steps = sorted(self.times.items(), key=lambda item: item[1])
+        return "startup: " + ", ".join(f"{name} {seconds:.2f} s" for name, seconds in steps)
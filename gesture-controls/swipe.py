@@ -0,0 +1,194 @@
+"""
+AeroTouch - Swipe and flick detection
+Follows the wrist of an open hand in a preallocated ring buffer of
+timestamped positions and fits its velocity by least squares, over the last
+FLICK_WINDOW seconds for a quick snap of the hand (a flick) and over the
+last SWIPE_WINDOW seconds for a slower, longer sweep (a swipe), in any of
+four directions (image coordinates, already mirrored, so 'right' is the
+user's right).
+
+The least-squares sums of both windows are updated in place as samples enter
+and leave them, so each frame costs the same however many samples the
+windows hold; they are recomputed exactly from the buffer once per buffer
+length to keep rounding errors from building up.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+# Ring buffer capacity (samples) and the time spans fitted for swipes and
+# flicks (seconds); a flick is too short to show up in the swipe window
+SWIPE_CAPACITY = 16
+SWIPE_WINDOW = 0.3
+FLICK_WINDOW = 0.12
+
+# Samples needed before a fit is trusted
+MIN_SAMPLES = 3
+
+# Flick: fitted speed (units/s) and displacement over the window (normalized)
+FLICK_SPEED = 1.5
+FLICK_DISTANCE = 0.06
+
+# Swipe: slower than a flick but over a longer distance
+SWIPE_SPEED = 0.6
+SWIPE_DISTANCE = 0.15
+
+# The main axis must move this many times more than the other one
+DIRECTION_RATIO = 2.0
+
+# Seconds after a swipe/flick before the next one can fire
+SWIPE_COOLDOWN = 0.6
+
+# kind is 'swipe' or 'flick'; direction is 'left', 'right', 'up' or 'down'
+SwipeEvent = namedtuple('SwipeEvent', 'kind direction time speed distance')
+
+
+class _LineFit:
+    """Running least-squares sums of x(t) and y(t) over a window of the buffer."""
+
+    __slots__ = ('head', 'size', 'n', 'st', 'stt', 'sx', 'sy', 'stx', 'sty')
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.head = self.size = 0
+        self.n = self.st = self.stt = 0.0
+        self.sx = self.sy = self.stx = self.sty = 0.0
+
+    def add(self, t, x, y, sign):
+        self.n += sign
+        self.st += sign * t
+        self.stt += sign * t * t
+        self.sx += sign * x
+        self.sy += sign * y
+        self.stx += sign * t * x
+        self.sty += sign * t * y
+
+    def rebuild(self, samples):
+        """Recompute the sums exactly from the (size, 3) samples of the window."""
+        t, x, y = samples.T
+        self.n = float(len(samples))
+        self.st, self.stt = t.sum(), (t * t).sum()
+        self.sx, self.sy = x.sum(), y.sum()
+        self.stx, self.sty = (t * x).sum(), (t * y).sum()
+
+    def velocity(self):
+        """(vx, vy) of the fitted line, or None if too few samples."""
+        if self.size < MIN_SAMPLES:
+            return None
+        n = self.n
+        mean_t = self.st / n
+        var_t = self.stt / n - mean_t * mean_t
+        if var_t <= 0:
+            return None
+        return ((self.stx / n - mean_t * self.sx / n) / var_t,
+                (self.sty / n - mean_t * self.sy / n) / var_t)
+
+
+class SwipeDetector:
+    """Swipe/flick detector for the wrist positions of one hand."""
+
+    __slots__ = ('capacity', 'window', 'flick_window', '_samples', '_newest',
+                 '_pushes', '_origin', '_swipe', '_flick', 'last_event_time')
+
+    def __init__(self, capacity=SWIPE_CAPACITY, window=SWIPE_WINDOW, flick_window=FLICK_WINDOW):
+        self.capacity = capacity
+        self.window = window
+        self.flick_window = min(flick_window, window)
+        self._samples = np.zeros((capacity, 3))  # t (relative to _origin), x, y
+        self._swipe = _LineFit()
+        self._flick = _LineFit()
+        self.last_event_time = float('-inf')
+        self.clear()
+
+    def __len__(self):
+        return self._swipe.size
+
+    def clear(self):
+        self._newest = -1
+        self._pushes = 0
+        self._origin = None
+        self._swipe.clear()
+        self._flick.clear()
+
+    def _trim(self, fit, t, window):
+        """Drop samples older than window (and the oldest one if the buffer is full)."""
+        if fit.size == self.capacity:
+            self._pop(fit)
+        while fit.size and t - self._samples[fit.head, 0] > window:
+            self._pop(fit)
+
+    def _pop(self, fit):
+        t, x, y = self._samples[fit.head]
+        fit.add(t, x, y, -1.0)
+        fit.head = (fit.head + 1) % self.capacity
+        fit.size -= 1
+
+    def _rebase(self):
+        """Shift times to the oldest sample and recompute the sums exactly."""
+        index = (self._swipe.head + np.arange(self._swipe.size)) % self.capacity
+        shift = self._samples[index[0], 0]
+        self._samples[index, 0] -= shift
+        self._origin += shift
+        self._swipe.rebuild(self._samples[index])
+        self._flick.rebuild(self._samples[index[-self._flick.size:]])
+
+    def push(self, timestamp, x, y):
+        """Add a wrist position (normalized coords) seen at timestamp (seconds)."""
+        if self._origin is None:
+            self._origin = timestamp
+        t = timestamp - self._origin
+
+        self._trim(self._swipe, t, self.window)
+        self._trim(self._flick, t, self.flick_window)
+
+        self._newest = (self._newest + 1) % self.capacity
+        self._samples[self._newest] = (t, x, y)
+        for fit in (self._swipe, self._flick):
+            fit.size += 1
+            fit.add(t, x, y, 1.0)
+
+        self._pushes += 1
+        if self._pushes % self.capacity == 0:
+            self._rebase()
+
+    def _span(self, fit):
+        return self._samples[self._newest, 0] - self._samples[fit.head, 0]
+
+    def fit(self, flick=False):
+        """Return (vx, vy, span) of the swipe (or flick) window, or None if too few samples."""
+        window = self._flick if flick else self._swipe
+        velocity = window.velocity()
+        return None if velocity is None else velocity + (self._span(window),)
+
+    def update(self, timestamp, x, y):
+        """Push a wrist position; return a SwipeEvent when one completes, else None."""
+        self.push(timestamp, x, y)
+        if timestamp - self.last_event_time < SWIPE_COOLDOWN:
+            return None
+
+        for kind, flick, min_speed, min_distance in (
+                ('flick', True, FLICK_SPEED, FLICK_DISTANCE),
+                ('swipe', False, SWIPE_SPEED, SWIPE_DISTANCE)):
+            fitted = self.fit(flick)
+            if fitted is None:
+                continue
+            vx, vy, span = fitted
+            horizontal = abs(vx) >= abs(vy)
+            major, minor = (vx, vy) if horizontal else (vy, vx)
+            speed, distance = abs(major), abs(major) * span
+            if (abs(major) >= DIRECTION_RATIO * abs(minor)
+                    and speed >= min_speed and distance >= min_distance):
+                break
+        else:
+            return None
+
+        if horizontal:
+            direction = 'right' if major > 0 else 'left'
+        else:
+            direction = 'down' if major > 0 else 'up'
+        self.last_event_time = timestamp
+        self.clear()
+        return SwipeEvent(kind, direction, timestamp, speed, distance)
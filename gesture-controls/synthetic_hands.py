@@ -0,0 +1,297 @@
+"""
+AeroTouch - Synthetic hand poses
+Generates 21-landmark hands in MediaPipe's normalized image coordinates
+(mirrored view, x right, y down, z negative towards the camera) for every
+gesture, with known labels, for training and benchmarking without a camera.
+
+Each pose is built in a hand frame (wrist at the origin, fingers up, sized
+like the open hand of benchmark_features) from fingertip targets per
+gesture: every finger is a three-segment chain from its knuckle to its
+target, bowed towards the camera when it has to bend. The hand is then
+scaled (camera distance / hand size), rotated in the image plane, optionally
+mirrored (left hand), moved into the frame and given landmark noise.
+Trajectories string poses together over time: per-frame gesture labels
+(hold() builds them from held gestures) with the wrist moving along a path,
+at FRAME_RATE. render() draws a pose as a flat, skin-coloured hand that
+MediaPipe's hand model detects (open hands at moderate sizes), for
+benchmarks that need video frames with a hand in them.
+
+At scale 1 without rotation or noise, the rule-based registry recognizes
+every gesture here; the variations are what it has to cope with.
+"""
+
+import numpy as np
+
+import landmark_features as lf
+from startup import lazy_import
+
+cv2 = lazy_import('cv2')  # only render() needs it
+
+# Gestures poses can be generated for (registry names; open_hand is only a
+# swipe precondition and overlaps claw_open)
+GESTURES = ('closed_fist', 'point_up', 'point_down', 'claw_open', 'claw_closed', 'pinch',
+            'thumbs_up', 'thumbs_down')
+
+# Label of poses without a gesture (a relaxed, half-curled hand)
+NONE = -1
+
+# Degrees between neighbouring fingers of a spread hand
+SPREAD = 8.0
+
+# Hand frame: knuckle (MCP) positions relative to the wrist and finger
+# directions (degrees from straight up, positive towards +x)
+_MCP = {'index': (-0.05, -0.20), 'middle': (0.0, -0.21), 'ring': (0.05, -0.20),
+        'pinky': (0.10, -0.17)}
+_DIRECTION = {'index': -5.0, 'middle': 0.0, 'ring': 6.0, 'pinky': 14.0}
+_SEGMENTS = {'index': (0.10, 0.06, 0.05), 'middle': (0.11, 0.06, 0.06),
+             'ring': (0.10, 0.05, 0.05), 'pinky': (0.07, 0.04, 0.04)}
+_FINGER_LANDMARKS = {'index': (lf.INDEX_MCP, lf.INDEX_PIP, lf.INDEX_DIP, lf.INDEX_TIP),
+                     'middle': (lf.MIDDLE_MCP, lf.MIDDLE_PIP, lf.MIDDLE_DIP, lf.MIDDLE_TIP),
+                     'ring': (lf.RING_MCP, lf.RING_PIP, lf.RING_DIP, lf.RING_TIP),
+                     'pinky': (lf.PINKY_MCP, lf.PINKY_PIP, lf.PINKY_DIP, lf.PINKY_TIP)}
+_FINGERS = tuple(_MCP)
+_THUMB_CMC = (-0.06, -0.04)
+_THUMB_SEGMENTS = (0.08, 0.07, 0.06)
+_THUMB_LANDMARKS = (lf.THUMB_CMC, lf.THUMB_MCP, lf.THUMB_IP, lf.THUMB_TIP)
+
+# Frames per second of trajectories, and the wrist paths they can follow
+FRAME_RATE = 30.0
+PATHS = ('still', 'line', 'circle')
+
+# render(): background, skin and fingernail colors (BGR)
+BACKGROUND_COLOR = (90, 110, 120)
+SKIN_COLOR = (120, 160, 215)
+NAIL_COLOR = (150, 180, 230)
+
+# Where the hand frame's wrist lands by default, and the pose's rotation center
+DEFAULT_WRIST = (0.5, 0.8)
+_CENTER = np.array([0.02, -0.18, 0.0])
+
+
+def _direction(degrees):
+    radians = np.radians(degrees)
+    return np.array([np.sin(radians), -np.cos(radians), 0.0])
+
+
+def _extended(finger, reach=0.97, spread=0.0):
+    """Fingertip target of a (nearly) straight finger, fanned out by spread degrees."""
+    fan = {'index': -1.0, 'middle': 0.0, 'ring': 1.0, 'pinky': 2.0}[finger]
+    start = np.array(_MCP[finger] + (0.0,))
+    return start + _direction(_DIRECTION[finger] + fan * spread) * sum(_SEGMENTS[finger]) * reach
+
+
+def _curled(finger, depth=0.075):
+    """Fingertip target of a finger curled into the palm, depth below its knuckle."""
+    x, y = _MCP[finger]
+    return np.array([x + 0.005, y + depth, -0.05])
+
+
+def _chain(start, end, lengths, bow=(0.0, 0.0, -1.0)):
+    """
+    Joint positions (len(lengths) + 1, 3) of a chain from start to end whose
+    segments have roughly the given lengths, bowed along `bow` by as much as
+    the spare length needs.
+    """
+    start, end = np.asarray(start, dtype=float), np.asarray(end, dtype=float)
+    total = float(sum(lengths))
+    chord = np.linalg.norm(end - start)
+    bow = np.asarray(bow, dtype=float)
+    # A quadratic Bezier with its control point lifted by h is about
+    # sqrt(chord^2 + (4/3 h)^2) long; solve for the h matching total
+    height = 0.75 * np.sqrt(max(total * total - chord * chord, 0.0))
+    control = (start + end) / 2 + bow * height
+    fractions = np.concatenate(([0.0], np.cumsum(lengths) / total))
+    t = fractions[:, None]
+    return (1 - t) ** 2 * start + 2 * (1 - t) * t * control + t ** 2 * end
+
+
+def _targets(gesture, spread=SPREAD):
+    """(fingertip targets by finger, thumb tip target) in the hand frame."""
+    fist = {finger: _curled(finger) for finger in _FINGERS}
+    thumb_across = np.array([0.0, -0.13, -0.07])
+    if gesture == 'claw_open':
+        return {f: _extended(f, spread=spread) for f in _FINGERS}, np.array([-0.15, -0.17, -0.01])
+    if gesture == 'closed_fist':
+        return fist, thumb_across
+    if gesture in ('point_up', 'point_down'):
+        return dict(fist, index=_extended('index')), thumb_across
+    if gesture == 'claw_closed':
+        point = np.array([0.02, -0.30, -0.08])
+        offsets = {'index': (-0.012, 0.0), 'middle': (0.0, -0.01), 'ring': (0.012, 0.0),
+                   'pinky': (0.02, 0.012)}
+        tips = {f: point + np.array(offsets[f] + (0.0,)) for f in _FINGERS}
+        return tips, point + np.array([-0.02, 0.015, 0.0])
+    if gesture == 'pinch':
+        point = np.array([-0.06, -0.31, -0.04])
+        half = {f: _MCP[f] for f in ('middle', 'ring', 'pinky')}
+        tips = {f: np.array([x + 0.01, y - 0.05, -0.09]) for f, (x, y) in half.items()}
+        return dict(tips, index=point + np.array([0.005, 0.0, 0.0])), point - np.array([0.005, -0.01, 0.0])
+    if gesture == 'thumbs_up':
+        deep = {finger: _curled(finger, 0.09) for finger in _FINGERS}
+        return deep, np.array([-0.15, -0.22, -0.02])
+    if gesture == 'thumbs_down':
+        return fist, np.array([-0.10, 0.08, -0.02])
+    if gesture is None:
+        relaxed = {f: 0.45 * _extended(f, reach=0.8) + 0.55 * _curled(f) for f in _FINGERS}
+        return relaxed, np.array([-0.10, -0.16, -0.04])
+    raise ValueError(f"No synthetic pose for gesture '{gesture}'")
+
+
+def hand_frame_pose(gesture, jitter=0.0, rng=None, spread=SPREAD):
+    """(21, 3) landmarks of a gesture in the hand frame (wrist at the origin, scale 1)."""
+    tips, thumb_tip = _targets(gesture, spread)
+    pose = np.zeros((lf.NUM_LANDMARKS, 3))
+    for finger in _FINGERS:
+        start = np.array(_MCP[finger] + (0.0,))
+        end = tips[finger]
+        if jitter:
+            end = end + rng.normal(0.0, jitter, 3)
+        pose[list(_FINGER_LANDMARKS[finger])] = _chain(start, end, _SEGMENTS[finger])
+    start = np.array(_THUMB_CMC + (0.0,))
+    if jitter:
+        thumb_tip = thumb_tip + rng.normal(0.0, jitter, 3)
+    # The thumb bows out, away from the palm
+    pose[list(_THUMB_LANDMARKS)] = _chain(start, thumb_tip, _THUMB_SEGMENTS, bow=(-0.7, 0.0, -0.7))
+    if gesture == 'point_down':
+        # Pointing up, upside down
+        pose[:, :2] = 2 * _CENTER[:2] - pose[:, :2]
+    return pose
+
+
+def place(pose, scale=1.0, rotation=0.0, wrist=DEFAULT_WRIST, mirror=False):
+    """
+    Move a hand-frame pose (or a batch (N, 21, 3) of them) into the image:
+    mirror it (left hand), scale it, rotate it by `rotation` degrees around
+    the middle of the hand and put the wrist at `wrist` (before rotation).
+    Scalars or arrays of length N are accepted for every parameter.
+    """
+    pose = np.array(pose, dtype=np.float64, ndmin=3)
+    count = len(pose)
+    scale = np.broadcast_to(np.asarray(scale, dtype=float), (count,))
+    radians = np.radians(np.broadcast_to(np.asarray(rotation, dtype=float), (count,)))
+    wrist = np.broadcast_to(np.asarray(wrist, dtype=float), (count, 2))
+    mirror = np.broadcast_to(np.asarray(mirror, dtype=bool), (count,))
+
+    centered = pose - _CENTER
+    centered[..., 0] *= np.where(mirror, -1.0, 1.0)[:, None]
+    centered *= scale[:, None, None]
+    cos, sin = np.cos(radians)[:, None], np.sin(radians)[:, None]
+    x, y = centered[..., 0].copy(), centered[..., 1].copy()
+    centered[..., 0] = cos * x - sin * y
+    centered[..., 1] = sin * x + cos * y
+    offset = np.concatenate((wrist + _CENTER[:2] * scale[:, None], np.zeros((count, 1))), axis=1)
+    return (centered + offset[:, None, :]).astype(np.float32)
+
+
+def gesture_pose(gesture, **placement):
+    """One noise-free pose of a gesture (None for a relaxed hand), placed in the image."""
+    return place(hand_frame_pose(gesture), **placement)[0]
+
+
+def random_poses(count, gestures=GESTURES, none_fraction=0.1, scale=(0.7, 1.3),
+                 rotation=(-20.0, 20.0), mirror=0.5, jitter=0.01, noise=0.003,
+                 spread=(SPREAD, SPREAD), labels=None, seed=0):
+    """
+    count random poses (N, 21, 3) and their labels (index into gestures,
+    NONE for relaxed hands; random unless given). scale, rotation (degrees)
+    and finger spread (degrees) are uniform ranges; mirror is the fraction
+    of left hands, jitter the fingertip target noise (hand frame units) and
+    noise the landmark noise (image units). The hand is placed so it stays
+    inside the image.
+    """
+    rng = np.random.default_rng(seed)
+    if labels is None:
+        labels = rng.integers(len(gestures), size=count)
+        labels[rng.random(count) < none_fraction] = NONE
+    spreads = rng.uniform(*spread, count)
+    poses = np.stack([hand_frame_pose(gestures[label] if label != NONE else None, jitter, rng,
+                                      spreads[i])
+                      for i, label in enumerate(labels)])
+    scales = rng.uniform(*scale, count)
+    rotations = rng.uniform(*rotation, count)
+    # The hand spans about 0.45 x scale; keep it in view
+    margin = 0.25 * scales[:, None]
+    wrist = rng.uniform(0.0, 1.0, (count, 2)) * (1 - 2 * margin) + margin
+    wrist[:, 1] += 0.2 * scales
+    placed = place(poses, scales, rotations, wrist, rng.random(count) < mirror)
+    placed += rng.normal(0.0, noise, placed.shape).astype(np.float32)
+    return placed, labels
+
+
+def hold(*steps, frame_rate=FRAME_RATE, gestures=GESTURES):
+    """
+    Per-frame labels for (gesture, seconds) steps, e.g.
+    hold(('closed_fist', 0.5), (None, 0.3)); None is a relaxed hand.
+    """
+    return np.concatenate([np.full(round(seconds * frame_rate),
+                                   gestures.index(gesture) if gesture is not None else NONE)
+                           for gesture, seconds in steps])
+
+
+def trajectory(labels, path='line', start=(0.35, 0.75), end=(0.65, 0.75), radius=0.1,
+               turns=1.0, scale=1.0, rotation=0.0, mirror=False, jitter=0.0, noise=0.002,
+               frame_rate=FRAME_RATE, gestures=GESTURES, seed=0):
+    """
+    A hand moving over len(labels) frames, showing labels[i] (index into
+    gestures, NONE for a relaxed hand) in frame i. The wrist follows path:
+    'still' stays at start, 'line' goes from start to end at constant speed
+    and 'circle' goes turns times around a circle of radius about start.
+    scale, rotation and mirror are as in place(); jitter (fingertip target
+    noise) and noise (landmark noise) are drawn anew every frame. Returns
+    (poses (N, 21, 3), wrist (N, 2), timestamps (N,) seconds).
+    """
+    if path not in PATHS:
+        raise ValueError(f"Unknown path '{path}' (choose from {', '.join(PATHS)})")
+    rng = np.random.default_rng(seed)
+    labels = np.asarray(labels)
+    count = len(labels)
+    fraction = np.arange(count) / max(count - 1, 1)
+    start = np.asarray(start, dtype=float)
+    if path == 'still':
+        wrist = np.repeat(start[None], count, axis=0)
+    elif path == 'line':
+        wrist = start + fraction[:, None] * (np.asarray(end, dtype=float) - start)
+    else:
+        angle = 2 * np.pi * turns * fraction
+        wrist = start + radius * np.stack((np.cos(angle), np.sin(angle)), axis=1)
+
+    def shape(label):
+        return hand_frame_pose(gestures[label] if label != NONE else None, jitter, rng)
+
+    if jitter:
+        poses = np.stack([shape(label) for label in labels])
+    else:
+        # Every frame of a gesture has the same shape; build each once
+        shapes = {label: shape(label) for label in np.unique(labels)}
+        poses = np.stack([shapes[label] for label in labels])
+    placed = place(poses, scale, rotation, wrist, mirror)
+    placed += rng.normal(0.0, noise, placed.shape).astype(np.float32)
+    return placed, wrist, np.arange(count) / frame_rate
+
+
+def render(pose, size=(480, 640), background=BACKGROUND_COLOR):
+    """
+    A BGR frame of size (height, width) showing a (21, 3) pose as a flat
+    hand: a palm polygon, finger segments as thick lines and rounded joints,
+    all sized from the wrist to middle knuckle distance.
+    """
+    height, width = size
+    frame = np.empty((height, width, 3), dtype=np.uint8)
+    frame[:] = background
+    points = np.rint(pose[:, :2] * (width, height)).astype(np.int32)
+    unit = np.linalg.norm(points[lf.MIDDLE_MCP] - points[lf.WRIST])
+    palm = points[[lf.WRIST, lf.THUMB_CMC, lf.THUMB_MCP, lf.INDEX_MCP, lf.MIDDLE_MCP,
+                   lf.RING_MCP, lf.PINKY_MCP]]
+    cv2.fillConvexPoly(frame, cv2.convexHull(palm), SKIN_COLOR, cv2.LINE_AA)
+    chains = [(lf.WRIST, lf.THUMB_CMC, lf.THUMB_MCP, lf.THUMB_IP, lf.THUMB_TIP)] + [
+        landmarks for landmarks in _FINGER_LANDMARKS.values()]
+    for chain in chains:
+        for a, b in zip(chain, chain[1:]):
+            cv2.line(frame, tuple(points[a]), tuple(points[b]), SKIN_COLOR,
+                     max(2, int(unit * 0.28)), cv2.LINE_AA)
+    for point in points:
+        cv2.circle(frame, tuple(point), max(1, int(unit * 0.14)), SKIN_COLOR, -1, cv2.LINE_AA)
+    for tip in lf.TIPS:
+        cv2.circle(frame, tuple(points[tip]), max(1, int(unit * 0.08)), NAIL_COLOR, -1,
+                   cv2.LINE_AA)
+    return cv2.GaussianBlur(frame, (3, 3), 0)
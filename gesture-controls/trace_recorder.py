@@ -0,0 +1,249 @@
+"""
+AeroTouch - Landmark trace recorder
+Streams what the hand tracker saw (landmarks, timestamps and detected
+gestures, no video) into an append-only columnar file.
+
+File layout:
+- 8-byte magic, 4-byte header length, JSON header (padded to 64 bytes)
+- Fixed-size chunks of CHUNK_FRAMES frames. Each chunk stores its columns
+  back to back: frame count, timestamps (float64), hand counts (uint8),
+  gesture ids (uint8) and landmarks (float16, frames x hands x 21 x 3)
+
+Every chunk has the same byte size, so the whole file memory-maps as one
+NumPy structured array and each column is a zero-copy view. Only frames with
+at least one hand are stored, which keeps a day of kiosk traffic to a few MB.
+
+Recording never blocks the frame loop: full chunks go to a background
+flusher through a bounded queue, and chunks are dropped (and counted) if the
+disk falls behind. If a write fails, every later chunk is dropped and the
+exception is re-raised from the next commit() or close().
+"""
+
+import json
+import os
+import queue
+import threading
+
+import numpy as np
+
+from landmark_features import NUM_LANDMARKS
+
+MAGIC = b'AETRACE1'
+HEADER_ALIGN = 64
+FORMAT_VERSION = 1
+
+# Frames per chunk and full chunks allowed to wait for the flusher
+CHUNK_FRAMES = 1024
+QUEUE_CHUNKS = 8
+
+# Gesture id stored when no gesture was detected
+NO_GESTURE = 255
+
+
+def chunk_dtype(chunk_frames=CHUNK_FRAMES, max_hands=1):
+    """Structured dtype of one on-disk chunk."""
+    return np.dtype([
+        ('count', '<u4'),
+        ('timestamps', '<f8', (chunk_frames,)),
+        ('hand_counts', 'u1', (chunk_frames,)),
+        ('gestures', 'u1', (chunk_frames,)),
+        ('landmarks', '<f2', (chunk_frames, max_hands, NUM_LANDMARKS, 3)),
+    ], align=True)
+
+
+def _encode_header(meta):
+    body = json.dumps(meta, sort_keys=True).encode('utf-8')
+    size = len(MAGIC) + 4 + len(body)
+    body += b' ' * (-size % HEADER_ALIGN)
+    return MAGIC + len(body).to_bytes(4, 'little') + body
+
+
+def _read_header(f):
+    """Return (meta, data offset) for an open trace file."""
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Not an AeroTouch landmark trace")
+    length = int.from_bytes(f.read(4), 'little')
+    meta = json.loads(f.read(length).decode('utf-8'))
+    if meta.get('version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported trace version: {meta.get('version')}")
+    return meta, len(MAGIC) + 4 + length
+
+
+class TraceRecorder:
+    """
+    Appends frames to a landmark trace file from the frame loop.
+
+    Per frame, call add_hand() for each detected hand, then commit().
+    Frames without hands are skipped.
+    """
+
+    def __init__(self, path, gesture_names, max_hands=1,
+                 chunk_frames=CHUNK_FRAMES, queue_chunks=QUEUE_CHUNKS):
+        self.path = path
+        self.gesture_ids = {name: i for i, name in enumerate(gesture_names)}
+        self.max_hands = max_hands
+        self.chunk_frames = chunk_frames
+        self.dtype = chunk_dtype(chunk_frames, max_hands)
+        meta = {
+            'version': FORMAT_VERSION,
+            'chunk_frames': chunk_frames,
+            'max_hands': max_hands,
+            'gestures': list(gesture_names),
+        }
+
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, 'rb') as f:
+                existing, offset = _read_header(f)
+            if existing != meta:
+                raise ValueError(f"Trace {path} was recorded with different settings")
+            # Drop a partially written trailing chunk, if any
+            size = os.path.getsize(path)
+            size -= (size - offset) % self.dtype.itemsize
+            self._file = open(path, 'r+b')
+            self._file.truncate(size)
+            self._file.seek(size)
+        else:
+            self._file = open(path, 'wb')
+            self._file.write(_encode_header(meta))
+
+        self._queue = queue.Queue(maxsize=queue_chunks)
+        self._lock = threading.Lock()
+        self._failed = False  # a write failed; chunks are no longer queued
+        self._error = None    # exception from the flusher, not yet re-raised
+        self._chunk = self._new_chunk()
+        self._hands = 0
+        self.frames = 0
+        self.dropped_chunks = 0
+
+        self._flusher = threading.Thread(target=self._flush_loop,
+                                         name='aerotouch-trace-flusher', daemon=True)
+        self._flusher.start()
+
+    def _new_chunk(self):
+        return np.zeros(1, dtype=self.dtype)[0]
+
+    def add_hand(self, landmarks):
+        """Add one hand's (21, 3) landmark array to the current frame."""
+        if self._hands < self.max_hands:
+            row = self._chunk['count']
+            self._chunk['landmarks'][row, self._hands] = landmarks
+            self._hands += 1
+
+    def _raise_error(self):
+        """Re-raise (once) an exception the flusher hit."""
+        with self._lock:
+            error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def commit(self, timestamp, gesture=None):
+        """Finish the current frame; frames with no hands are not stored."""
+        self._raise_error()
+        if not self._hands:
+            return
+        chunk = self._chunk
+        row = chunk['count']
+        chunk['timestamps'][row] = timestamp
+        chunk['hand_counts'][row] = self._hands
+        chunk['gestures'][row] = self.gesture_ids.get(gesture, NO_GESTURE)
+        chunk['count'] = row + 1
+        self._hands = 0
+        self.frames += 1
+
+        if row + 1 == self.chunk_frames:
+            self._submit()
+
+    def _drop(self):
+        with self._lock:
+            self.dropped_chunks += 1
+
+    def _submit(self):
+        if self._failed:
+            self._drop()
+        else:
+            try:
+                self._queue.put_nowait(self._chunk)
+            except queue.Full:
+                self._drop()
+        self._chunk = self._new_chunk()
+
+    def _flush_loop(self):
+        while True:
+            chunk = self._queue.get()
+            if chunk is None:
+                break
+            if self._failed:
+                self._drop()  # queued before the write failed
+                continue
+            try:
+                self._file.write(chunk.tobytes())
+                self._file.flush()
+            except Exception as error:
+                # Keep draining so close() never blocks on a full queue
+                with self._lock:
+                    self._failed = True
+                    self._error = error
+                self._drop()
+
+    def close(self):
+        """Write the partial last chunk, wait for the flusher and re-raise its error."""
+        if self._chunk['count']:
+            if self._failed:
+                self._drop()
+            else:
+                self._queue.put(self._chunk)  # the flusher keeps draining, even after a failure
+        self._queue.put(None)
+        self._flusher.join()
+        self._file.close()
+        self._raise_error()
+
+
+class TraceFile:
+    """
+    Memory-mapped landmark trace.
+
+    chunks is a structured array of shape (num_chunks,); its fields (e.g.
+    trace.chunks['landmarks'], shape (num_chunks, chunk_frames, max_hands,
+    21, 3)) are zero-copy views into the file. valid marks the rows that
+    hold recorded frames (the last chunk is usually only partly filled).
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.meta, offset = _read_header(f)
+        self.gesture_names = self.meta['gestures']
+        dtype = chunk_dtype(self.meta['chunk_frames'], self.meta['max_hands'])
+        num_chunks = (os.path.getsize(path) - offset) // dtype.itemsize
+        if num_chunks:
+            self.chunks = np.memmap(path, dtype=dtype, mode='r', offset=offset,
+                                    shape=(num_chunks,))
+        else:
+            self.chunks = np.zeros(0, dtype=dtype)
+        rows = np.arange(self.meta['chunk_frames'])
+        self.valid = rows < self.chunks['count'][:, None]
+
+    def __len__(self):
+        return int(self.chunks['count'].sum())
+
+    def column(self, name):
+        """Concatenated valid rows of one column (this one copies)."""
+        return self.chunks[name][self.valid]
+
+    def gesture_labels(self):
+        """Gesture names per recorded frame (None where nothing was detected)."""
+        names = self.gesture_names
+        return [names[g] if g < len(names) else None for g in self.column('gestures')]
+
+
+def read_trace(path):
+    """Open a trace written by TraceRecorder."""
+    return TraceFile(path)
+
+
+def is_trace(path):
+    """Whether path is a file written by TraceRecorder (checks its magic)."""
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
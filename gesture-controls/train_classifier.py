@@ -0,0 +1,170 @@
+"""
+AeroTouch - Gesture classifier training
+Trains the learned gesture classifier (gesture_classifier.py) on recorded
+landmarks and evaluates it against the rule-based registry.
+
+Inputs are landmark recordings:
+- LABEL=PATH: every frame with a hand in PATH (a .npz trace or a
+  TraceRecorder file) shows the gesture LABEL ('none' for no gesture)
+- PATH: a TraceRecorder file, labelled per frame with the gesture that was
+  recognized while recording (frames without one are 'none'). These labels
+  come from the rules, so use them to imitate the rules, LABEL=PATH
+  recordings to do better than them.
+--synthetic N adds N labelled poses from synthetic_hands.py.
+
+Usage:
+    python train_classifier.py train closed_fist=fist.npz point_up=point.npz ... -o gestures.model
+    python train_classifier.py train --synthetic 20000 -o gestures.model
+    python train_classifier.py eval gestures.model session.trace
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+import gesture_classifier as gcl
+import landmark_features as lf
+import synthetic_hands
+from gesture_registry import registry
+from input_sources import load_trace
+from trace_recorder import read_trace
+
+
+def load_labelled(spec):
+    """(landmarks (N, 21, 3), label names) of one input (see the module docstring)."""
+    label, _, path = spec.rpartition('=')
+    if label:
+        landmarks, present, _ = load_trace(path)
+        return landmarks[present], [label] * int(present.sum())
+    if path.endswith('.npz'):
+        raise SystemExit(f"{path}: .npz traces have no gesture labels; give one as LABEL={path}")
+    trace = read_trace(path)
+    landmarks = trace.column('landmarks')[:, 0].astype(np.float32)
+    labels = [name or gcl.NONE_CLASS for name in trace.gesture_labels()]
+    return landmarks, labels
+
+
+def synthetic(count, seed):
+    """count synthetic poses and their label names."""
+    landmarks, labels = synthetic_hands.random_poses(count, seed=seed)
+    return landmarks, [synthetic_hands.GESTURES[i] if i != synthetic_hands.NONE
+                       else gcl.NONE_CLASS for i in labels]
+
+
+def load_inputs(specs, synthetic_count=0, seed=0):
+    """All inputs concatenated: (landmarks, label names)."""
+    parts = [load_labelled(spec) for spec in specs]
+    if synthetic_count:
+        parts.append(synthetic(synthetic_count, seed))
+    if not parts:
+        raise SystemExit("No inputs (give recordings or --synthetic N)")
+    landmarks = np.concatenate([landmarks for landmarks, _ in parts])
+    labels = [label for _, names in parts for label in names]
+    return landmarks, labels
+
+
+def class_order(labels):
+    """Classes in registry priority order, then any others, then 'none'."""
+    found = set(labels)
+    classes = [name for name in registry.names if name in found]
+    classes += sorted(found - set(classes) - {gcl.NONE_CLASS})
+    return classes + [gcl.NONE_CLASS]
+
+
+def rule_predictions(landmarks, classes):
+    """Class index the rules pick per hand (gestures the classes lack count as 'none')."""
+    winners = registry.classify_batch(lf.compute_features(landmarks))
+    lookup = np.array([classes.index(name) if name in classes else len(classes) - 1
+                       for name in registry.names] + [len(classes) - 1])
+    return lookup[winners]
+
+
+def confusion(truth, predicted, count):
+    matrix = np.zeros((count, count), dtype=np.int64)
+    np.add.at(matrix, (truth, predicted), 1)
+    return matrix
+
+
+def format_confusion(matrix, classes):
+    """Rows: true class, columns: predicted class."""
+    width = max(6, max(len(name) for name in classes))
+    short = [name[:6] for name in classes]
+    lines = [f"  {'':{width}} " + " ".join(f"{name:>6}" for name in short) + "  recall"]
+    for name, row in zip(classes, matrix):
+        recall = f"{row[classes.index(name)] / row.sum():6.1%}" if row.sum() else f"{'-':>6}"
+        lines.append(f"  {name:{width}} " + " ".join(f"{n:6d}" for n in row) + f"  {recall}")
+    return "\n".join(lines)
+
+
+def evaluate(model, landmarks, labels):
+    """Print the accuracy and confusion of the model and of the rules."""
+    classes = model.classes
+    known = np.array([label in classes for label in labels])
+    if not known.all():
+        print(f"skipping {int((~known).sum())} frames with labels the model does not know")
+    landmarks = landmarks[known]
+    truth = np.array([classes.index(label) for label, ok in zip(labels, known) if ok])
+    start = time.perf_counter()
+    predicted = model.predict(landmarks)
+    elapsed = time.perf_counter() - start
+    rules = rule_predictions(landmarks, classes)
+    print(f"{len(truth)} frames, model inference {elapsed / max(len(truth), 1) * 1e6:.2f} us/frame "
+          f"batched")
+    for name, guesses in ((f"model ({model.kind})", predicted), ("rules", rules)):
+        print(f"\n{name}: accuracy {np.mean(guesses == truth):.1%}")
+        print(format_confusion(confusion(truth, guesses, len(classes)), classes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest='command', required=True)
+    train = commands.add_parser('train', help="train a model")
+    train.add_argument('inputs', nargs='*', metavar='[LABEL=]PATH')
+    train.add_argument('-o', '--output', default='gestures.model', metavar='PATH',
+                       help="model file to write (default: gestures.model)")
+    train.add_argument('--model', choices=gcl.MODEL_KINDS, default='mlp')
+    train.add_argument('--hidden', type=int, default=gcl.HIDDEN,
+                       help=f"hidden units of the MLP (default: {gcl.HIDDEN})")
+    train.add_argument('--epochs', type=int, default=gcl.EPOCHS,
+                       help=f"MLP training epochs (default: {gcl.EPOCHS})")
+    train.add_argument('--holdout', type=float, default=0.2,
+                       help="fraction of frames kept out of training to evaluate on (default: 0.2)")
+    evaluate_parser = commands.add_parser('eval', help="evaluate a model against the rules")
+    evaluate_parser.add_argument('model', help="model file")
+    evaluate_parser.add_argument('inputs', nargs='*', metavar='[LABEL=]PATH')
+    for command in (train, evaluate_parser):
+        command.add_argument('--synthetic', type=int, default=0, metavar='N',
+                             help="add N synthetic poses")
+        command.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    landmarks, labels = load_inputs(args.inputs, args.synthetic, args.seed)
+    if args.command == 'eval':
+        evaluate(gcl.load_classifier(args.model), landmarks, labels)
+        return
+
+    classes = class_order(labels)
+    targets = np.array([classes.index(label) for label in labels])
+    order = np.random.default_rng(args.seed).permutation(len(targets))
+    held = order[:int(len(order) * args.holdout)]
+    used = order[len(held):]
+    print(f"{len(used)} training frames, {len(held)} held out; classes: {', '.join(classes)}")
+    start = time.perf_counter()
+    if args.model == 'mlp':
+        model = gcl.train_mlp(landmarks[used], targets[used], classes, args.hidden, args.epochs,
+                              seed=args.seed,
+                              log=lambda epoch, loss: print(f"  epoch {epoch + 1}: loss {loss:.4f}"))
+    else:
+        model = gcl.train_centroid(landmarks[used], targets[used], classes)
+    print(f"trained in {time.perf_counter() - start:.1f} s")
+    model.save(args.output)
+    print(f"wrote {args.output} ({os.path.getsize(args.output)} bytes)")
+    if len(held):
+        print("\nheld-out frames:")
+        evaluate(model, landmarks[held], [labels[i] for i in held])
+
+
+if __name__ == "__main__":
+    main()
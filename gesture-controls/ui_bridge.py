@@ -0,0 +1,435 @@
+"""
+AeroTouch - WebSocket bridge to the kiosk UI
+Streams cursor positions and gesture events straight to the kiosk page
+(UI/script.js) over a local WebSocket, instead of synthesizing OS mouse
+events. Runs an asyncio server on its own thread; the frame loop only hands
+it pre-encoded messages.
+
+Messages are compact JSON text frames, each with a sequence number n:
+
+- {"t":"c","n":1,"x":0.5123,"y":0.4012}: cursor position (0..1 of the page)
+- {"t":"click","n":2,"x":...,"y":...}: click at a position
+- {"t":"scroll","n":3,"dy":3}: scroll, positive is up
+- {"t":"key","n":4,"key":"left"}: key press (swipe navigation)
+- {"t":"gesture","n":5,"kind":"start","g":"claw_open"}: stable gesture changes
+
+Pages acknowledge cursor messages with {"t":"ack","n":...}. Each client has
+one slot for the newest cursor position and a queue for the other events;
+a cursor position is only sent while fewer than MAX_IN_FLIGHT are
+unacknowledged (and, for clients that never acknowledge, once the previous
+write has left the process). Until then newer positions replace the waiting
+one, so a stalled page gets the latest position instead of a backlog of
+stale ones (the replaced positions are counted as dropped). Other events
+are never replaced; a page that falls EVENT_QUEUE_SIZE events behind is
+closed with 1008 (policy violation) instead, its queued events are counted
+as lost, and the page reconnects with a fresh state.
+
+The protocol is implemented on asyncio streams (RFC 6455 version 13,
+unfragmented text frames, ping/pong and close only), so there is no extra
+dependency. Handshakes for other versions get 426 Upgrade Required;
+fragmented and binary messages are closed with 1003 (unsupported data),
+oversized frames with 1009 and unknown opcodes with 1002. open_client() and
+read_message() give a minimal client for scripts and benchmarks.
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import socket
+import struct
+import threading
+from collections import deque
+
+from actuation import DEFAULT_SCREEN_SIZE
+
+UI_HOST = '127.0.0.1'
+UI_PORT = 8765
+
+# Events kept per client while it is not reading; one more closes the client
+EVENT_QUEUE_SIZE = 256
+
+# Unacknowledged cursor messages allowed per acknowledging client
+MAX_IN_FLIGHT = 4
+
+# Kernel send buffer per client, kept small so backpressure shows up early
+SEND_BUFFER = 16384
+
+# Largest frame accepted from a client (acks, pings and closes)
+MAX_CLIENT_FRAME = 4096
+
+# Page origins allowed to connect: pages served from this host. Browsers send
+# the opaque origin "null" for file:// pages and sandboxed frames, which any
+# page can get, so it is not allowed; serve UI/ from localhost instead.
+ALLOWED_ORIGINS = ('file://', 'http://localhost', 'http://127.0.0.1',
+                   'https://localhost', 'https://127.0.0.1')
+
+# Close codes (RFC 6455 section 7.4.1)
+CLOSE_PROTOCOL_ERROR = 1002
+CLOSE_UNSUPPORTED_DATA = 1003
+CLOSE_POLICY_VIOLATION = 1008
+CLOSE_TOO_BIG = 1009
+
+_WEBSOCKET_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+_CONTINUATION, _TEXT, _BINARY, _CLOSE, _PING, _PONG = 0x0, 0x1, 0x2, 0x8, 0x9, 0xA
+
+
+class ProtocolError(ValueError):
+    """A frame this implementation does not accept; code is the close code to answer with."""
+
+    def __init__(self, message, code=CLOSE_PROTOCOL_ERROR):
+        super().__init__(message)
+        self.code = code
+
+
+def encode_frame(payload, opcode=_TEXT, mask=False):
+    """Encode one WebSocket frame (clients must mask, servers must not)."""
+    length = len(payload)
+    mask_bit = 0x80 if mask else 0
+    if length < 126:
+        header = struct.pack('!BB', 0x80 | opcode, mask_bit | length)
+    elif length < 1 << 16:
+        header = struct.pack('!BBH', 0x80 | opcode, mask_bit | 126, length)
+    else:
+        header = struct.pack('!BBQ', 0x80 | opcode, mask_bit | 127, length)
+    if mask:
+        key = os.urandom(4)
+        payload = bytes(b ^ key[i % 4] for i, b in enumerate(payload))
+        header += key
+    return header + payload
+
+
+async def read_frame(reader, max_length=None):
+    """Read one frame; returns (opcode, payload)."""
+    first, second = await reader.readexactly(2)
+    if not first & 0x80 or first & 0x0F == _CONTINUATION:
+        raise ProtocolError("Fragmented WebSocket messages are not supported",
+                            CLOSE_UNSUPPORTED_DATA)
+    length = second & 0x7F
+    if length == 126:
+        length, = struct.unpack('!H', await reader.readexactly(2))
+    elif length == 127:
+        length, = struct.unpack('!Q', await reader.readexactly(8))
+    if max_length is not None and length > max_length:
+        raise ProtocolError(f"WebSocket frame of {length} bytes is too large", CLOSE_TOO_BIG)
+    key = await reader.readexactly(4) if second & 0x80 else None
+    payload = await reader.readexactly(length)
+    if key is not None:
+        payload = bytes(b ^ key[i % 4] for i, b in enumerate(payload))
+    return first & 0x0F, payload
+
+
+def _accept_key(key):
+    return base64.b64encode(hashlib.sha1((key + _WEBSOCKET_GUID).encode()).digest()).decode()
+
+
+def _origin_allowed(origin):
+    return origin is None or any(origin == allowed or origin.startswith(allowed + ':')
+                                 or origin.startswith(allowed + '/') for allowed in ALLOWED_ORIGINS)
+
+
+class _Client:
+    """Pending messages of one connected page."""
+
+    __slots__ = ('writer', 'cursor', 'events', 'wake', 'dropped', 'acks', 'in_flight')
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.cursor = None  # (seq, frame) of the newest unsent cursor position
+        self.events = deque()
+        self.wake = asyncio.Event()
+        self.dropped = 0
+        self.acks = False        # whether the page acknowledges cursor messages
+        self.in_flight = deque()  # seqs of sent, unacknowledged cursor messages
+
+    def acknowledge(self, seq):
+        self.acks = True
+        while self.in_flight and self.in_flight[0] <= seq:
+            self.in_flight.popleft()
+        if self.cursor is not None:
+            self.wake.set()
+
+    def may_send_cursor(self):
+        return not self.acks or len(self.in_flight) < MAX_IN_FLIGHT
+
+
+class UiBridge:
+    """WebSocket server pushing cursor and gesture events to connected pages."""
+
+    def __init__(self, host=UI_HOST, port=UI_PORT):
+        self.host = host
+        self.port = port
+        self.clients = set()
+        self.connections = 0
+        self.sent = 0
+        self.dropped = 0
+        self.lost = 0        # events queued for pages closed for falling behind
+        self.overflows = 0   # pages closed for falling behind
+        self._seq = 0
+        self._cursor = None  # newest (seq, frame) cursor, for pages that connect later
+        self.loop = asyncio.new_event_loop()
+        self._server = None
+        started = threading.Event()
+        errors = []
+        self._thread = threading.Thread(target=self._run, args=(started, errors),
+                                        name='aerotouch-ui-bridge', daemon=True)
+        self._thread.start()
+        started.wait()
+        if errors:
+            raise errors[0]
+
+    def _run(self, started, errors):
+        asyncio.set_event_loop(self.loop)
+        try:
+            self._server = self.loop.run_until_complete(
+                asyncio.start_server(self._serve, self.host, self.port))
+        except OSError as error:
+            errors.append(error)
+            started.set()
+            return
+        self.port = self._server.sockets[0].getsockname()[1]
+        started.set()
+        self.loop.run_forever()
+        self.loop.close()
+
+    # Publishing (any thread)
+
+    def _next(self):
+        self._seq += 1
+        return self._seq
+
+    def cursor(self, x, y):
+        """Publish a cursor position (0..1 of the page width/height); returns its seq."""
+        seq = self._next()
+        frame = encode_frame(b'{"t":"c","n":%d,"x":%.4f,"y":%.4f}' % (seq, x, y))
+        self.loop.call_soon_threadsafe(self._put_cursor, (seq, frame))
+        return seq
+
+    def send(self, event):
+        """Publish an event dict (with at least a "t" key) to every page; returns its seq."""
+        seq = self._next()
+        frame = encode_frame(json.dumps(dict(event, n=seq), separators=(',', ':')).encode())
+        self.loop.call_soon_threadsafe(self._put_event, frame)
+        return seq
+
+    # Event loop side
+
+    def _put_cursor(self, cursor):
+        self._cursor = cursor
+        for client in self.clients:
+            if client.cursor is not None:
+                client.dropped += 1
+            client.cursor = cursor
+            client.wake.set()
+
+    def _put_event(self, frame):
+        for client in list(self.clients):
+            self._queue_event(client, frame)
+
+    def _queue_event(self, client, frame):
+        if len(client.events) < EVENT_QUEUE_SIZE:
+            client.events.append(frame)
+            client.wake.set()
+            return
+        # Dropping a click or key would go unnoticed; closing makes the page reconnect
+        self.clients.discard(client)
+        self.lost += len(client.events) + 1
+        self.overflows += 1
+        client.events.clear()
+        client.writer.write(encode_frame(struct.pack('!H', CLOSE_POLICY_VIOLATION), _CLOSE))
+        client.writer.close()
+
+    async def _handshake(self, reader, writer):
+        """Answer the HTTP upgrade request; returns True if it was accepted."""
+        try:
+            request = await reader.readuntil(b'\r\n\r\n')
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            return False
+        lines = request.decode('latin-1').split('\r\n')
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        key = headers.get('sec-websocket-key')
+        if not lines[0].startswith('GET ') or headers.get('upgrade', '').lower() != 'websocket' or not key:
+            writer.write(b'HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n')
+            return False
+        if headers.get('sec-websocket-version') != '13':
+            writer.write(b'HTTP/1.1 426 Upgrade Required\r\nSec-WebSocket-Version: 13\r\n'
+                         b'Content-Length: 0\r\n\r\n')
+            return False
+        if not _origin_allowed(headers.get('origin')):
+            writer.write(b'HTTP/1.1 403 Forbidden\r\nContent-Length: 0\r\n\r\n')
+            return False
+        writer.write(b'HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\n'
+                     b'Connection: Upgrade\r\nSec-WebSocket-Accept: '
+                     + _accept_key(key).encode() + b'\r\n\r\n')
+        return True
+
+    async def _send_loop(self, client):
+        writer = client.writer
+        try:
+            while True:
+                await client.wake.wait()
+                client.wake.clear()
+                frames = list(client.events)
+                client.events.clear()
+                if client.cursor is not None and client.may_send_cursor():
+                    seq, frame = client.cursor
+                    frames.append(frame)
+                    client.in_flight.append(seq)
+                    client.cursor = None
+                if not frames:
+                    continue  # the cursor waits for an acknowledgement
+                writer.write(b''.join(frames))
+                self.sent += len(frames)
+                # Wait until the data has left the process; cursor updates
+                # that arrive meanwhile replace each other
+                await writer.drain()
+        except ConnectionError:
+            pass
+
+    async def _serve(self, reader, writer):
+        sock = writer.get_extra_info('socket')
+        if sock is not None:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SEND_BUFFER)
+        if not await self._handshake(reader, writer):
+            writer.close()
+            return
+        writer.transport.set_write_buffer_limits(high=0)
+
+        client = _Client(writer)
+        self.clients.add(client)
+        self.connections += 1
+        if self._cursor is not None:
+            client.cursor = self._cursor
+            client.wake.set()
+        sender = asyncio.create_task(self._send_loop(client))
+        try:
+            while True:
+                opcode, payload = await read_frame(reader, MAX_CLIENT_FRAME)
+                if opcode == _CLOSE:
+                    writer.write(encode_frame(payload[:2], _CLOSE))
+                    break
+                if opcode == _PING:
+                    self._queue_event(client, encode_frame(payload, _PONG))
+                elif opcode == _TEXT:
+                    message = json.loads(payload)
+                    if isinstance(message, dict) and message.get('t') == 'ack':
+                        client.acknowledge(int(message['n']))
+                elif opcode == _BINARY:
+                    raise ProtocolError("Binary messages are not supported",
+                                        CLOSE_UNSUPPORTED_DATA)
+                elif opcode != _PONG:
+                    raise ProtocolError(f"Unknown WebSocket opcode {opcode:#x}")
+        except ProtocolError as error:
+            writer.write(encode_frame(struct.pack('!H', error.code), _CLOSE))
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError, KeyError, TypeError):
+            pass
+        finally:
+            self.clients.discard(client)
+            self.dropped += client.dropped
+            sender.cancel()
+            writer.close()
+
+    async def _shutdown(self):
+        self._server.close()
+        for client in list(self.clients):
+            client.writer.write(encode_frame(struct.pack('!H', 1001), _CLOSE))
+            client.writer.close()
+        # Let the connection handlers see the closed connections and finish
+        tasks = asyncio.all_tasks() - {asyncio.current_task()}
+        if tasks:
+            await asyncio.wait(tasks, timeout=0.5)
+
+    def close(self):
+        """Close all connections and stop the server thread."""
+        if self._server is None or self.loop.is_closed():
+            return
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop).result(timeout=1.0)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=1.0)
+
+    def format(self):
+        dropped = self.dropped + sum(client.dropped for client in self.clients)
+        return (f"ui bridge: ws://{self.host}:{self.port}, {len(self.clients)} connected "
+                f"({self.connections} total), {self.sent} messages sent, "
+                f"{dropped} stale cursor updates dropped, {self.lost} events lost "
+                f"({self.overflows} pages closed for falling behind)")
+
+
+class BridgeBackend:
+    """
+    Output backend that sends the controller's mouse actions to the kiosk
+    page through a UiBridge; positions are in a virtual screen of
+    screen_size pixels, normalized when sent.
+    """
+
+    def __init__(self, bridge, screen_size=DEFAULT_SCREEN_SIZE):
+        self.bridge = bridge
+        self.screen_size = screen_size
+        self.cursor = (screen_size[0] // 2, screen_size[1] // 2)
+
+    def size(self):
+        return self.screen_size
+
+    def position(self):
+        return self.cursor
+
+    def _normalized(self):
+        return (round(self.cursor[0] / self.screen_size[0], 4),
+                round(self.cursor[1] / self.screen_size[1], 4))
+
+    def move_to(self, x, y):
+        self.cursor = (x, y)
+        self.bridge.cursor(*self._normalized())
+
+    def click(self):
+        x, y = self._normalized()
+        self.bridge.send({'t': 'click', 'x': x, 'y': y})
+
+    def scroll(self, amount):
+        self.bridge.send({'t': 'scroll', 'dy': amount})
+
+    def press(self, key):
+        self.bridge.send({'t': 'key', 'key': key})
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.bridge.close()
+
+
+async def open_client(host=UI_HOST, port=UI_PORT, origin=None):
+    """Connect a minimal WebSocket client; returns (reader, writer)."""
+    reader, writer = await asyncio.open_connection(host, port)
+    key = base64.b64encode(os.urandom(16)).decode()
+    request = (f"GET / HTTP/1.1\r\nHost: {host}:{port}\r\nUpgrade: websocket\r\n"
+               f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\n"
+               f"Sec-WebSocket-Version: 13\r\n")
+    if origin is not None:
+        request += f"Origin: {origin}\r\n"
+    writer.write((request + "\r\n").encode())
+    response = await reader.readuntil(b'\r\n\r\n')
+    if not response.startswith(b'HTTP/1.1 101') or _accept_key(key).encode() not in response:
+        writer.close()
+        raise ConnectionError(f"WebSocket handshake refused: {response.splitlines()[0].decode()}")
+    return reader, writer
+
+
+def send_ack(writer, seq):
+    """Acknowledge the cursor message with sequence number seq (client side)."""
+    writer.write(encode_frame(b'{"t":"ack","n":%d}' % seq, mask=True))
+
+
+async def read_message(reader):
+    """Next text message from the server as a dict, or None once it closed."""
+    while True:
+        opcode, payload = await read_frame(reader)
+        if opcode == _TEXT:
+            return json.loads(payload)
+        if opcode == _CLOSE:
+            return None